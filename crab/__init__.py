@@ -699,23 +699,49 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from .core import Behaviour
-from .core import BehaviourUI
-from .core import Component
-from .core import Process
-from .core import Rig
-from .core import tools
-from .core.tools import AnimTool
-from .core.tools import RigTool
+import importlib
 
-from . import config
-from . import utils
-from . import create
+__version__ = "4.0.0"
 
-from .apps import animator
-from .apps import creator
-from .apps import menu
+# -- Crab is used in headless sessions (such as batch builds in mayapy) as well
+# -- as interactive ones. Rather than importing everything up front, the members
+# -- of the package are imported the first time they are accessed. This means the
+# -- user interfaces (and therefore Qt) are only imported when they are used.
+_LAZY_MEMBERS = dict(
+    Behaviour=(".core", "Behaviour"),
+    BehaviourUI=(".core", "BehaviourUI"),
+    Component=(".core", "Component"),
+    Process=(".core", "Process"),
+    Rig=(".core", "Rig"),
+    tools=(".core", "tools"),
+    AnimTool=(".core.tools", "AnimTool"),
+    RigTool=(".core.tools", "RigTool"),
+    get=(".core.rig", "get"),
+    config=(".config", None),
+    utils=(".utils", None),
+    create=(".create", None),
+    animator=(".apps.animator", None),
+    creator=(".apps.creator", None),
+    menu=(".apps.menu", None),
+)
 
-from .core.rig import get
 
-__version__ = "4.0.0"
+# --------------------------------------------------------------------------------------
+def __getattr__(name):
+    if name not in _LAZY_MEMBERS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    module_name, attribute_name = _LAZY_MEMBERS[name]
+    module = importlib.import_module(module_name, __name__)
+
+    value = getattr(module, attribute_name) if attribute_name else module
+
+    # -- Store the member so we do not come through here again
+    globals()[name] = value
+
+    return value
+
+
+# --------------------------------------------------------------------------------------
+def __dir__():
+    return sorted(set(globals().keys()) | set(_LAZY_MEMBERS.keys()))
@@ -1,7 +1,24 @@
 """
 The apps module contains the user facing tools within crab
 """
-from . import menu
-from . import animator
-from . import creator
+import importlib
 
+# -- The apps pull in Qt, so they are only imported when they are accessed
+_SUBMODULES = [
+    "menu",
+    "animator",
+    "creator",
+]
+
+
+# --------------------------------------------------------------------------------------
+def __getattr__(name):
+    if name not in _SUBMODULES:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    return importlib.import_module("." + name, __name__)
+
+
+# --------------------------------------------------------------------------------------
+def __dir__():
+    return sorted(set(globals().keys()) | set(_SUBMODULES))
@@ -402,8 +402,13 @@ class CrabCreator(qute.QWidget):
         if not self.rig:
             return
 
-        for component_type in sorted(self.rig.factories.components.identifiers()):
-            component = self.rig.factories.components.request(component_type)
+        # -- We populate from the descriptors so that we do not import
+        # -- every component just to list them
+        for component in sorted(
+            self.rig.factories.components.descriptors(),
+            key=lambda plugin: plugin.identifier,
+        ):
+            component_type = component.identifier
 
             # -- If we do have a filter, then check it against the identifier
             # -- and the display name. Only show the tool if one of them matches
@@ -825,8 +830,13 @@ class CrabCreator(qute.QWidget):
         if not self.rig:
             return
 
-        for behaviour_type in sorted(self.rig.factories.behaviours.identifiers()):
-            behaviour = self.rig.factories.behaviours.request(behaviour_type)
+        # -- We populate from the descriptors so that we do not import
+        # -- every behaviour just to list them
+        for behaviour in sorted(
+            self.rig.factories.behaviours.descriptors(),
+            key=lambda plugin: plugin.identifier,
+        ):
+            behaviour_type = behaviour.identifier
 
             # -- If we do have a filter, then check it against the identifier
             # -- and the display name. Only show the tool if one of them matches
@@ -1006,8 +1016,12 @@ class CrabCreator(qute.QWidget):
         """
         self.ui.toolList.clear()
 
-        for tool in sorted(tools.rigging().identifiers()):
-            tool = tools.rigging().request(tool)
+        # -- We populate from the descriptors so that we do not import
+        # -- every tool just to list them
+        for tool in sorted(
+            tools.rigging().descriptors(),
+            key=lambda plugin: plugin.identifier,
+        ):
 
             # -- If we"re filtering by favourites, then check if this is in
             # -- our favourites
@@ -20,6 +20,12 @@ def _menu_build_rig(*args, **kwargs):
         rig.build()
 
 
+# --------------------------------------------------------------------------------------
+def _menu_build_rig_incremental(*args, **kwargs):
+    for rig in crab.Rig.all():
+        rig.build(incremental=True)
+
+
 # --------------------------------------------------------------------------------------
 def _menu_goto_website(*args, **kwargs):
     webbrowser.open("https://github.com/mikemalinowski/crab")
@@ -59,6 +65,7 @@ def initialize():
     pm.menuItem(divider=True, parent=new_menu)
     add_menu_item("Edit", _menu_edit_rig)
     add_menu_item("Build", _menu_build_rig)
+    add_menu_item("Build Changed", _menu_build_rig_incremental)
 
     pm.menuItem(divider=True, parent=new_menu)
     add_menu_item("Website", _menu_goto_website)
@@ -1,4 +1,5 @@
-import pymel.core as pm
+import maya.cmds as mc
+import maya.api.OpenMaya as om
 
 # --------------------------------------------------------------------------------------
 # -- This is a list of Component types. These are used in META nodes
@@ -11,15 +12,20 @@ META_IDENTIFIER = "Identifier"
 META_VERSION = "Version"
 META_OPTIONS = "Options"
 META_CONTENTS = "Contents"
+META_FINGERPRINT = "Fingerprint"
 
 # --------------------------------------------------------------------------------------
 # -- This is a list of attribute names used by the internals of
 # -- crab to resolve relationships between objects
 BOUND = "crabBinding"
 BEHAVIOUR_DATA = "crabBehaviours"
+BEHAVIOUR_CONTENTS = "crabBehaviourContents"
 
 # --------------------------------------------------------------------------------------
 RIG_ROOT_LINK_ATTR = "crabRigHost"
+COMPONENT_INDEX_ATTR = "crabComponents"
+MIRROR_TABLE_ATTR = "crabMirrorTable"
+DEFAULTS_TABLE_ATTR = "crabDefaultsTable"
 CONNECTION_PREFIX = "crabRootConnection"
 SKELETON_ROOT_LINK_ATTR = "%sSkeleton" % CONNECTION_PREFIX
 CONTROL_ROOT_LINK_ATTR = "%sControls" % CONNECTION_PREFIX
@@ -155,21 +161,229 @@ def name(prefix, description, side, counter=1):
 
     :return:
     """
-    while True:
-        candidate = "%s_%s_%s_%s" % (
-            prefix.upper(),
-            description,
-            counter,
-            side.upper(),
-        )
-
-        # -- If the name is unique, return it
-        if not pm.objExists(candidate):
-            return candidate
-
-        # -- The name already exists, so increment our
-        # -- counter
-        counter += 1
+    return _NAME_ALLOCATOR.allocate(prefix, description, side, counter)
+
+
+# --------------------------------------------------------------------------------------
+def name_tracking():
+    """
+    Returns a context within which the counters used by name() are held in
+    memory rather than being read from the scene for every name. This is
+    entered for the duration of a rig build.
+
+    :return: NameAllocator
+    """
+    return _NAME_ALLOCATOR
+
+
+# --------------------------------------------------------------------------------------
+class NameAllocator(object):
+    """
+    Hands out unique names for config.name. Rather than testing every counter
+    with objExists, the scene is scanned once for each prefix, description and
+    side combination to find the counters in use.
+
+    Outside of a build the scan is made for every name requested. Whilst a
+    rig is being built the allocator is entered as a context, and the counters
+    in use are then held in memory, with node creation, deletion and renaming
+    tracked through callbacks so they stay correct. The callbacks are removed
+    and the counters dropped when the context is exited.
+
+    ..code-block:: python
+
+        >>> with config.name_tracking():
+        ...     config.name("CTL", "Arm", "LF")
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self):
+        # -- (prefix, description, side) -> set of counters in use
+        self._used = dict()
+
+        # -- (prefix, description, side) -> lowest counter which may be free
+        self._lowest = dict()
+
+        self._callback_ids = list()
+
+        # -- How many times the context has been entered, allowing builds
+        # -- to be nested
+        self._depth = 0
+
+    # ----------------------------------------------------------------------------------
+    def __enter__(self):
+        if not self._depth:
+            self._register_callbacks()
+
+        self._depth += 1
+        return self
+
+    # ----------------------------------------------------------------------------------
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+
+        if not self._depth:
+            om.MMessage.removeCallbacks(self._callback_ids)
+            self._callback_ids = list()
+            self.clear()
+
+    # ----------------------------------------------------------------------------------
+    def allocate(self, prefix, description, side, counter=1):
+        """
+        Returns a unique name with the given naming parts, using the lowest
+        counter which is free and not less than the given counter. The
+        counter of the returned name is reserved straight away, so asking
+        again before the node is created gives a different name.
+
+        :param prefix: The prefix of the name
+        :type prefix: str
+
+        :param description: The descriptive element of the name
+        :type description: str
+
+        :param side: The side of the name
+        :type side: str
+
+        :param counter: The counter to start from
+        :type counter: int
+
+        :return: str
+        """
+        key = (prefix.upper(), description, side.upper())
+
+        # -- Without the callbacks we cannot know whether the scene has
+        # -- changed since we last looked, so we always scan
+        if not self._depth or key not in self._used:
+            self._scan(key)
+
+        used = self._used[key]
+
+        # -- Only jump to the lowest possible free counter if we are
+        # -- not being asked to start beyond it
+        if counter <= self._lowest[key]:
+            counter = self._lowest[key]
+            track_lowest = True
+
+        else:
+            track_lowest = False
+
+        while True:
+            while counter in used:
+                counter += 1
+
+            candidate = "%s_%s_%s_%s" % (key[0], key[1], counter, key[2])
+
+            # -- This should always be unique, but as a safeguard against
+            # -- anything we could not track we check it once
+            if not mc.objExists(candidate):
+                break
+
+            used.add(counter)
+
+        used.add(counter)
+
+        if track_lowest:
+            self._lowest[key] = counter + 1
+
+        return candidate
+
+    # ----------------------------------------------------------------------------------
+    def clear(self):
+        """
+        Clears all the counters held in memory, forcing the scene to be
+        scanned again the next time a name is requested.
+
+        :return: None
+        """
+        self._used = dict()
+        self._lowest = dict()
+
+    # ----------------------------------------------------------------------------------
+    def _scan(self, key):
+        """
+        Finds all the counters in use for the given naming key
+
+        :param key: tuple(prefix, description, side)
+        :type key: tuple
+
+        :return: None
+        """
+        self._used[key] = set()
+        self._lowest[key] = 1
+
+        for node_name in mc.ls("%s_%s_*_%s" % key) or list():
+            self._track(node_name, True)
+
+    # ----------------------------------------------------------------------------------
+    def _track(self, node_name, in_use):
+        """
+        Marks the counter of the given name as being in use or free, providing
+        we are already tracking its naming key.
+
+        :param node_name: The name of the node
+        :type node_name: str
+
+        :param in_use: Whether the name is now in use
+        :type in_use: bool
+
+        :return: None
+        """
+        node_name = node_name.split("|")[-1]
+
+        # -- Names within a namespace do not clash with ours
+        if ":" in node_name:
+            return
+
+        parts = node_name.split("_")
+
+        if len(parts) < 4 or not parts[-2].isdigit():
+            return
+
+        key = (parts[0], "_".join(parts[1:-2]), parts[-1])
+
+        if key not in self._used:
+            return
+
+        counter = int(parts[-2])
+
+        if in_use:
+            self._used[key].add(counter)
+
+        else:
+            self._used[key].discard(counter)
+            self._lowest[key] = min(self._lowest[key], counter)
+
+    # ----------------------------------------------------------------------------------
+    def _node_added(self, node, *args):
+        self._track(om.MFnDependencyNode(node).name(), True)
+
+    # ----------------------------------------------------------------------------------
+    def _node_removed(self, node, *args):
+        self._track(om.MFnDependencyNode(node).name(), False)
+
+    # ----------------------------------------------------------------------------------
+    def _name_changed(self, node, previous_name, *args):
+        self._track(previous_name, False)
+        self._track(om.MFnDependencyNode(node).name(), True)
+
+    # ----------------------------------------------------------------------------------
+    def _register_callbacks(self):
+        """
+        Registers the callbacks which keep the counters in step with the
+        scene whilst the context is active.
+
+        :return: None
+        """
+        self._callback_ids = [
+            om.MDGMessage.addNodeAddedCallback(self._node_added, "dependNode"),
+            om.MDGMessage.addNodeRemovedCallback(self._node_removed, "dependNode"),
+            om.MNodeMessage.addNameChangedCallback(
+                om.MObject.kNullObj,
+                self._name_changed,
+            ),
+        ]
+
+
+_NAME_ALLOCATOR = NameAllocator()
 
 
 # --------------------------------------------------------------------------------------
@@ -15,3 +15,39 @@ PLUGIN_LOCATIONS = [
 
 # --------------------------------------------------------------------------------------
 PLUGIN_ENVIRONMENT_VARIABLE = "CRAB_PLUGIN_PATHS"
+
+# --------------------------------------------------------------------------------------
+# -- If this is set then every rig build is profiled and the reports are
+# -- written into the directory it points to
+PROFILE_ENVIRONMENT_VARIABLE = "CRAB_PROFILE_PATH"
+
+# --------------------------------------------------------------------------------------
+# -- The plugin manifest records which files hold which plugins so that unchanged
+# -- plugin locations do not need to be inspected on every launch. Its location
+# -- can be overridden with this environment variable
+PLUGIN_MANIFEST_ENVIRONMENT_VARIABLE = "CRAB_PLUGIN_MANIFEST"
+PLUGIN_MANIFEST_PATH = os.path.join(
+    os.path.expanduser("~"),
+    ".crab",
+    "plugin_manifest.json",
+)
+
+# --------------------------------------------------------------------------------------
+# -- Animation poses are stored in one file per character within this directory.
+# -- Its location can be overridden with this environment variable
+POSE_LIBRARY_ENVIRONMENT_VARIABLE = "CRAB_POSE_LIBRARY"
+POSE_LIBRARY_PATH = os.path.join(
+    os.path.expanduser("~"),
+    ".crab",
+    "poses",
+)
+
+# -- These are the plugin attributes which are stored in the manifest. They can be
+# -- read from the factories descriptors without the plugin being imported
+PLUGIN_METADATA = [
+    "display_name",
+    "icon",
+    "legacy_identifiers",
+    "rich_help",
+    "find_icon",
+]
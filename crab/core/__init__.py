@@ -1,7 +1,8 @@
+import importlib
+
 from .process import Process
 from .component import Component
 from .behaviour import Behaviour
-from .behaviour import BehaviourUI
 from .rig import Rig
 from ._factories import factory_manager
 
@@ -10,3 +11,13 @@ from .tools import AnimTool
 from .tools import RigTool
 
 from .rig import get
+
+
+# --------------------------------------------------------------------------------------
+def __getattr__(name):
+    # -- The behaviour ui requires Qt, so we only import it when it
+    # -- is asked for
+    if name == "BehaviourUI":
+        return importlib.import_module(".behaviour_ui", __name__).BehaviourUI
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -1,10 +1,12 @@
-import json
+import os
 
+from . import resolution
 from .component import Component
 from .behaviour import Behaviour
 from .process import Process
+from .tools import AnimTool
+from .tools import RigTool
 
-from .. import config
 from .. import constants
 from ..vendor import factories
 
@@ -30,28 +32,25 @@ class ComponentFactory(factories.Factory):
 
         :return: crab.Component instance
         """
-        while True:
-            meta = Component.is_component_root(node)
+        meta = resolution.meta(node)
 
-            if not meta:
-                node = node.getParent()
-                continue
+        if not meta:
+            return None
 
-            component_type = meta.attr(config.META_IDENTIFIER).get()
+        component_type, options = resolution.snapshot(meta)
 
-            plugin = factory_manager().components.request(component_type)
+        plugin = factory_manager().components.request(component_type)
 
-            if not plugin:
-                print("Could not resolve component from %s" % node)
-                return None
+        if not plugin:
+            print("Could not resolve component from %s" % node)
+            return None
 
-            # -- Instance the plugin
-            plugin = plugin(node)
+        # -- Instance the plugin
+        plugin = plugin(node)
+        plugin._meta = meta
 
-            plugin.options.update(
-                json.loads(meta.attr(config.META_OPTIONS).get()),
-            )
-            return plugin
+        plugin.options.update(options)
+        return plugin
 
     # ----------------------------------------------------------------------------------
     def request(self, plugin_identifier, version=None):
@@ -64,9 +63,11 @@ class ComponentFactory(factories.Factory):
         if result:
             return result
 
-        for plugin in self.plugins():
-            if plugin_identifier in plugin.legacy_identifiers:
-                return plugin
+        # -- The legacy identifiers are stored in the plugin manifest so
+        # -- we can check them without importing every component
+        for plugin in self.descriptors():
+            if plugin_identifier in (plugin.legacy_identifiers or list()):
+                return super(ComponentFactory, self).request(plugin.identifier)
 
         return None
 
@@ -74,7 +75,7 @@ class ComponentFactory(factories.Factory):
 # --------------------------------------------------------------------------------------
 class Factories(object):
     """
-    This holds all three factories which a crab rig workflow relies upon
+    This holds all the factories which a crab rig workflow relies upon
     """
 
     # ----------------------------------------------------------------------------------
@@ -85,8 +86,6 @@ class Factories(object):
             abstract=Component,
             plugin_identifier="identifier",
             versioning_identifier="version",
-            paths=constants.PLUGIN_LOCATIONS,
-            envvar=constants.PLUGIN_ENVIRONMENT_VARIABLE,
         )
 
         # -- This stores all the process plugins. These are plugins
@@ -96,8 +95,6 @@ class Factories(object):
             abstract=Process,
             plugin_identifier="identifier",
             versioning_identifier="version",
-            paths=constants.PLUGIN_LOCATIONS,
-            envvar=constants.PLUGIN_ENVIRONMENT_VARIABLE,
         )
 
         # -- This is a library of all the behaviours which are available
@@ -106,10 +103,49 @@ class Factories(object):
             abstract=Behaviour,
             plugin_identifier="identifier",
             versioning_identifier="version",
-            paths=constants.PLUGIN_LOCATIONS,
-            envvar=constants.PLUGIN_ENVIRONMENT_VARIABLE,
         )
 
+        # -- These are the rigging and animation tools, which are
+        # -- accessed through crab.tools.rigging() and crab.tools.animation()
+        self.rig_tools = factories.Factory(
+            abstract=RigTool,
+            plugin_identifier="identifier",
+            versioning_identifier="version",
+        )
+
+        self.anim_tools = factories.Factory(
+            abstract=AnimTool,
+            plugin_identifier="identifier",
+            versioning_identifier="version",
+        )
+
+        # -- All the factories search the same locations, so rather than
+        # -- have each one search them we populate them all in one pass
+        self.discovery = factories.Discovery(
+            factories=[
+                self.components,
+                self.processes,
+                self.behaviours,
+                self.rig_tools,
+                self.anim_tools,
+            ],
+            manifest=os.environ.get(
+                constants.PLUGIN_MANIFEST_ENVIRONMENT_VARIABLE,
+                constants.PLUGIN_MANIFEST_PATH,
+            ),
+            lazy=True,
+            metadata=constants.PLUGIN_METADATA,
+        )
+
+        for path in constants.PLUGIN_LOCATIONS:
+            self.discovery.add_path(path)
+
+        if constants.PLUGIN_ENVIRONMENT_VARIABLE in os.environ:
+            for path in os.environ[constants.PLUGIN_ENVIRONMENT_VARIABLE].split(";"):
+                self.discovery.add_path(path)
+
+        self.discovery.populate()
+
     @property
     def component_abstract(self):
         return Component
@@ -1,7 +1,7 @@
 from .. import utils
 from .. import config
-from ..vendor import qute
 
+import copy
 import json
 import uuid
 
@@ -91,18 +91,7 @@ class Behaviour(object):
         """
         This will save any option data in the behaviour
         """
-        all_behaviour_data = json.loads(
-            self.rig.meta().attr(config.BEHAVIOUR_DATA).get()
-        )
-
-        for behaviour_data in all_behaviour_data:
-            if behaviour_data.get("id") == self.uuid:
-                behaviour_data["options"] = self.options
-
-        # -- Now write the data into the attribute
-        self.rig.meta().attr(config.BEHAVIOUR_DATA).set(
-            json.dumps(all_behaviour_data),
-        )
+        return self.rig.behaviour_store.update(self.uuid, self.options)
 
     # ----------------------------------------------------------------------------------
     def remove(self):
@@ -115,22 +104,7 @@ class Behaviour(object):
 
         :return: True if the behaviour was removed
         """
-        # -- Get the current behaviour manifest
-        current_data = json.loads(self.rig.meta().attr(config.BEHAVIOUR_DATA).get())
-
-        # -- Look for a behaviour with the given behaviour id
-        for idx, behaviour_data in enumerate(current_data):
-            if behaviour_data["id"] == self.uuid:
-                current_data.pop(idx)
-
-                # -- Now write the data into the attribute
-                self.rig.meta().attr(config.BEHAVIOUR_DATA).set(
-                    json.dumps(current_data),
-                )
-
-                return True
-
-        return False
+        return self.rig.behaviour_store.remove(self.uuid)
 
     # ----------------------------------------------------------------------------------
     def shift_order(self, shift_offset):
@@ -145,25 +119,7 @@ class Behaviour(object):
 
         :return: True if the operation was successful
         """
-        # -- Get the current behaviour manifest
-        current_data = json.loads(self.rig.meta().attr(config.BEHAVIOUR_DATA).get())
-
-        # -- Look for a behaviour with the given behaviour id
-        for idx, behaviour_data in enumerate(current_data):
-            if behaviour_data["id"] == self.uuid:
-                # -- Offset the data be the required amount
-                current_data.insert(
-                    current_data.index(behaviour_data) + shift_offset,
-                    current_data.pop(current_data.index(behaviour_data)),
-                )
-
-                # -- Now write the data into the attribute
-                self.rig.meta().attr(config.BEHAVIOUR_DATA).set(
-                    json.dumps(current_data),
-                )
-                return True
-
-        return False
+        return self.rig.behaviour_store.shift(self.uuid, shift_offset)
 
     # ----------------------------------------------------------------------------------
     def can_build(self, available_nodes):
@@ -206,19 +162,295 @@ class Behaviour(object):
 
 
 # --------------------------------------------------------------------------------------
-class BehaviourUI(qute.QWidget):
+class BehaviourStore(object):
+    """
+    This is an in-memory representation of the behaviours assigned to a rig.
+    The behaviour data is stored as a json string on the rig meta node, and
+    rather than parsing that every time it is needed the store parses it once
+    and indexes the entries by their id.
+
+    Changes are only written back to the attribute when something actually
+    changes. If the attribute is edited outside of crab (including through
+    undo) the store notices the string differs from the one it last saw and
+    re-parses it.
+
+    Note: Every call returns new behaviour instances holding their own copy
+    of the options, so option changes are only seen by other callers once
+    save() has been called
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, rig):
+        self._rig = rig
+
+        # -- This is the attribute value we last read or wrote
+        self._raw = None
+
+        # -- The ordered behaviour entries, along with an index of
+        # -- those entries by id
+        self._entries = list()
+        self._index = dict()
+
+        # -- Behaviour plugin classes keyed by their type
+        self._classes = dict()
+
+    # ----------------------------------------------------------------------------------
+    def _attr(self):
+        return self._rig.meta().attr(config.BEHAVIOUR_DATA)
+
     # ----------------------------------------------------------------------------------
-    def __init__(self, behaviour_instance, parent):
-        super(BehaviourUI, self).__init__(parent)
+    def _sync(self):
+        """
+        Ensures the store reflects the data on the rig, re-parsing only if
+        the attribute has changed since we last saw it.
+
+        :return: None
+        """
+        raw = self._attr().get()
 
-        self.behaviour_instance = behaviour_instance
+        if raw == self._raw:
+            return
+
+        self._raw = raw
+        self._entries = json.loads(raw or "[]")
+        self._index = dict(
+            (entry.get("id"), entry)
+            for entry in self._entries
+        )
 
     # ----------------------------------------------------------------------------------
-    @classmethod
-    def unhandled_options(cls):
+    def _commit(self):
+        """
+        Writes the entries back onto the rig if they differ from what is
+        currently stored.
+
+        :return: True if the attribute was written
+        """
+        raw = json.dumps(self._entries)
+
+        if raw == self._raw:
+            return False
+
+        self._attr().set(raw)
+        self._raw = raw
+
+        return True
+
+    # ----------------------------------------------------------------------------------
+    def invalidate(self):
+        """
+        Forces the store to re-read the data from the rig on its next access
+
+        :return: None
+        """
+        self._raw = None
+
+    # ----------------------------------------------------------------------------------
+    def ids(self):
+        """
+        Returns the ids of all the stored behaviours in build order
+
+        :return: list(str, str, ...)
+        """
+        self._sync()
+        return [entry.get("id") for entry in self._entries]
+
+    # ----------------------------------------------------------------------------------
+    def get(self, unique_id):
+        """
+        Returns the behaviour instance with the given id
+
+        :param unique_id: The id of the behaviour
+        :type unique_id: str
+
+        :return: crab.Behaviour or None
+        """
+        self._sync()
+
+        entry = self._index.get(unique_id)
+
+        if not entry:
+            return None
+
+        return self._instance(entry)
+
+    # ----------------------------------------------------------------------------------
+    def all(self):
+        """
+        Returns instances of all the stored behaviours in build order. Any
+        behaviours which cannot be resolved are skipped.
+
+        :return: list(crab.Behaviour, ...)
+        """
+        self._sync()
+
+        behaviours = list()
+
+        for entry in self._entries:
+            behaviour = self._instance(entry)
+
+            if behaviour:
+                behaviours.append(behaviour)
+
+        return behaviours
+
+    # ----------------------------------------------------------------------------------
+    def add(self, behaviour_type, options, index=None):
         """
-        This should return a list of any options in the behaviour that
-        are not handled by this ui and should therefore be displayed
-        using the built in mechanisms of crab
+        Adds a new behaviour entry to the store
+
+        :param behaviour_type: The identifier of the behaviour
+        :type behaviour_type: str
+
+        :param options: The options for the behaviour
+        :type options: dict
+
+        :param index: Where in the build order the behaviour should be
+            placed. By default it is added to the end.
+        :type index: int
+
+        :return: The id of the new behaviour
+        """
+        self._sync()
+
+        unique_id = str(uuid.uuid4())
+
+        entry = dict(
+            type=behaviour_type,
+            options=options,
+            id=unique_id,
+        )
+
+        if index is None:
+            self._entries.append(entry)
+
+        else:
+            self._entries.insert(index, entry)
+
+        self._index[unique_id] = entry
+        self._commit()
+
+        return unique_id
+
+    # ----------------------------------------------------------------------------------
+    def update(self, unique_id, options):
+        """
+        Stores the given options against the behaviour with the given id
+
+        :param unique_id: The id of the behaviour
+        :type unique_id: str
+
+        :param options: The options to store
+        :type options: dict
+
+        :return: True if the behaviour exists
+        """
+        self._sync()
+
+        entry = self._index.get(unique_id)
+
+        if not entry:
+            return False
+
+        entry["options"] = copy.deepcopy(dict(options))
+        self._commit()
+
+        return True
+
+    # ----------------------------------------------------------------------------------
+    def remove(self, unique_id):
+        """
+        Removes the behaviour with the given id
+
+        :param unique_id: The id of the behaviour
+        :type unique_id: str
+
+        :return: True if the behaviour was removed
+        """
+        self._sync()
+
+        entry = self._index.pop(unique_id, None)
+
+        if not entry:
+            return False
+
+        self._entries.remove(entry)
+        self._commit()
+
+        return True
+
+    # ----------------------------------------------------------------------------------
+    def shift(self, unique_id, offset):
+        """
+        Shifts the behaviour with the given id forward or backward in the
+        build order
+
+        :param unique_id: The id of the behaviour
+        :type unique_id: str
+
+        :param offset: The amount to shift by
+        :type offset: int
+
+        :return: True if the behaviour exists
+        """
+        self._sync()
+
+        entry = self._index.get(unique_id)
+
+        if not entry:
+            return False
+
+        idx = self._entries.index(entry)
+
+        self._entries.insert(
+            max(0, idx + offset),
+            self._entries.pop(idx),
+        )
+        self._commit()
+
+        return True
+
+    # ----------------------------------------------------------------------------------
+    def _instance(self, entry):
         """
-        return list()
+        Returns a new behaviour instance for the given entry. The plugin
+        class is only resolved once per type, but each instance is given
+        its own copy of the options so that unsaved edits made by one
+        caller are never seen by another.
+
+        :param entry: Behaviour entry
+        :type entry: dict
+
+        :return: crab.Behaviour or None
+        """
+        behaviour_type = entry.get("type", "")
+
+        if behaviour_type not in self._classes:
+            factory = self._rig.factories.behaviours
+
+            # -- If we do not recognise the behaviour, log it and continue
+            if behaviour_type not in factory.identifiers():
+                print("{} is not a recognised behaviour".format(behaviour_type))
+                return None
+
+            self._classes[behaviour_type] = factory.request(behaviour_type)
+
+        # -- Instance the behaviour and update it with all its option information
+        behaviour = self._classes[behaviour_type](
+            rig=self._rig,
+            instance_id=entry.get("id"),
+        )
+        behaviour.options.update(copy.deepcopy(entry.get("options", {})))
+
+        return behaviour
+
+
+# --------------------------------------------------------------------------------------
+def __getattr__(name):
+    # -- The behaviour ui used to live in this module. It requires Qt, so it
+    # -- is now only imported when it is asked for
+    if name == "BehaviourUI":
+        from .behaviour_ui import BehaviourUI
+        return BehaviourUI
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -1,8 +1,12 @@
 import re
+import ast
 import json
+import hashlib
+import maya.cmds as mc
 import pymel.core as pm
 
-from ..vendor import qute
+from . import resolution
+
 from .. import utils
 from .. import config
 from .. import create
@@ -170,6 +174,7 @@ class Component(object):
         meta_node.Options.set(
             json.dumps(self.options),
         )
+        resolution.invalidate(meta_node)
 
     # ----------------------------------------------------------------------------------
     @classmethod
@@ -201,6 +206,7 @@ class Component(object):
         self._reference = node
         meta_node = self.create_meta()
         node.message.connect(meta_node.attr(config.SKELETON_ROOT_LINK_ATTR))
+        resolution.invalidate()
 
         # -- Set an outliner colour for skeletal roots
         node.useOutlinerColor.set(True)
@@ -290,7 +296,7 @@ class Component(object):
             return None
 
         try:
-            meta_node.attr(config.CONTROL_ROOT_LINK_ATTR).inputs()[0]
+            return meta_node.attr(config.CONTROL_ROOT_LINK_ATTR).inputs()[0]
 
         except IndexError:
             return None
@@ -330,31 +336,12 @@ class Component(object):
         if self._meta:
             return self._meta
 
-        # -- We need to cycle upward, so create a tracking variable
-        node = self._reference
-
-        while True:
-            # -- If we have hit the scene root then there is nothing
-            # -- more for us to do
-            if not node:
-                return None
-
-            # -- Cycle all the messaging attributes looking
-            # -- for an attribute of the type we"re expecting
-            for attribute in node.message.outputs(plugs=True):
-                # -- We"re looking specifically for the crab identifer
-                if config.CONNECTION_PREFIX not in attribute.name(includeNode=False):
-                    continue
-
-                # -- Cache the node so we do not need to repeat the
-                # -- search again
-                self._meta = attribute.node()
+        # -- The look up is shared across the session so repeated
+        # -- resolutions of the same node are cheap
+        if self._reference:
+            self._meta = resolution.meta(self._reference)
 
-                return self._meta
-
-            # -- This node has no component markers, so lets go up
-            # -- to the next parent
-            node = node.getParent()
+        return self._meta
 
     # ----------------------------------------------------------------------------------
     def tag(self, target, label):
@@ -646,6 +633,7 @@ class Component(object):
         self.meta().Options.set(
             json.dumps(self.options),
         )
+        resolution.invalidate(self.meta())
 
     # ----------------------------------------------------------------------------------
     def parent_component(self):
@@ -698,6 +686,116 @@ class Component(object):
 
         return joints
 
+    # ----------------------------------------------------------------------------------
+    def contents(self):
+        """
+        Returns the names of all the nodes which were created by this component
+        the last time its control rig was built.
+
+        :return: list(str, str, ...)
+        """
+        meta_node = self.meta()
+
+        if not meta_node or not meta_node.hasAttr(config.META_CONTENTS):
+            return list()
+
+        contents = meta_node.attr(config.META_CONTENTS).get()
+
+        if not contents:
+            return list()
+
+        # -- Contents were historically stored as the string representation
+        # -- of a python list, so fall back to that if it is not json
+        try:
+            return json.loads(contents)
+
+        except ValueError:
+            return ast.literal_eval(contents)
+
+    # ----------------------------------------------------------------------------------
+    def set_contents(self, names):
+        """
+        Stores the names of the nodes which make up this components control
+        rig onto the meta node.
+
+        :param names: List of node names
+        :type names: list(str, str, ...)
+
+        :return: None
+        """
+        meta_node = self.meta()
+
+        if not meta_node.hasAttr(config.META_CONTENTS):
+            meta_node.addAttr(
+                config.META_CONTENTS,
+                dt="string",
+            )
+
+        meta_node.attr(config.META_CONTENTS).set(
+            json.dumps(names, separators=(",", ":")),
+        )
+
+    # ----------------------------------------------------------------------------------
+    def fingerprint(self):
+        """
+        Returns a hash of everything which influences the control rig this
+        component builds - its identifier, version, options and the rest
+        transforms of its skeletal joints. This is stored on the meta node
+        during a build and compared against during incremental builds.
+
+        The rest transform of a joint is its stored APose. Joints without
+        one have no rest transform which is independent of the current pose,
+        so only their names are included. This means posing a built rig never
+        changes its fingerprint.
+
+        :return: str
+        """
+        meta_node = self.meta()
+
+        # -- The options are re-serialised with sorted keys so that differences
+        # -- in key ordering are not mistaken for option changes
+        data = dict(
+            identifier=meta_node.attr(config.META_IDENTIFIER).get(),
+            version=meta_node.attr(config.META_VERSION).get(),
+            options=json.loads(meta_node.attr(config.META_OPTIONS).get()),
+            parent=str(self.skeletal_root().getParent()),
+            joints=list(),
+        )
+
+        for joint in sorted(self.skeletal_joints(), key=lambda j: j.name()):
+            if not joint.hasAttr("APose"):
+                data["joints"].append([joint.name(), None])
+                continue
+
+            # -- Round the values to prevent floating point noise from
+            # -- marking the component as dirty
+            data["joints"].append(
+                [
+                    joint.name(),
+                    [round(value, 4) for value in mc.getAttr(joint.name() + ".APose")],
+                ],
+            )
+
+        return hashlib.sha1(
+            json.dumps(data, sort_keys=True).encode("utf-8"),
+        ).hexdigest()
+
+    # ----------------------------------------------------------------------------------
+    def stored_fingerprint(self):
+        """
+        Returns the fingerprint which was stored against this component when
+        its control rig was last built. If it has never been built this will
+        return an empty string.
+
+        :return: str
+        """
+        meta_node = self.meta()
+
+        if not meta_node or not meta_node.hasAttr(config.META_FINGERPRINT):
+            return ""
+
+        return meta_node.attr(config.META_FINGERPRINT).get() or ""
+
     # ----------------------------------------------------------------------------------
     def remove(self):
         """
@@ -739,6 +837,10 @@ class Component(object):
         # -- Because the joint is still being used we now have to ask the user if its ok
         # -- for us to forcefully remove the skin weights
         if meshes_still_using_joints:
+            # -- This is the only part of a component which needs a ui, so
+            # -- we only import qute when we need it
+            from ..vendor import qute
+
             mesh_names = [mesh.name() for mesh in meshes_still_using_joints]
 
             message = (
@@ -812,4 +914,8 @@ class Component(object):
         except:
             pass
 
+        # -- The hierarchy of the rig has changed, so any cached
+        # -- resolutions are no longer reliable
+        resolution.invalidate()
+
         return True
@@ -0,0 +1,345 @@
+import os
+import json
+import time
+import maya.cmds as mc
+import maya.api.OpenMaya as om
+import pymel.internal.pmcmds as pmcmds
+
+
+# --------------------------------------------------------------------------------------
+class BuildProfiler(object):
+    """
+    The build profiler records the cost of each phase of a rig build. For
+    every phase the wall time, the number of nodes created and the number
+    of maya commands called (whether through maya.cmds or pymel) is stored.
+
+    Reports can be written out as plain json or in the chrome trace_event
+    format, which can be loaded into chrome://tracing or perfetto.
+
+    ..code-block:: python
+
+        >>> import crab
+        >>>
+        >>> rig = crab.get()
+        >>> rig.build(profile=True)
+        >>>
+        >>> # -- Print the phases which took the longest
+        >>> for entry in rig.profiler.summary()[:10]:
+        ...     print(entry)
+        >>>
+        >>> rig.profiler.write_chrome_trace("c:/temp/build.trace.json")
+
+    If the CRAB_PROFILE_PATH environment variable is set then every build is
+    profiled and both reports are written into that directory.
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, label=""):
+        self.label = label
+        self.events = list()
+
+        # -- These are running totals which each phase samples when it
+        # -- starts and finishes
+        self.node_count = 0
+        self.command_count = 0
+
+        self._depth = 0
+        self._origin = None
+        self._end = None
+        self._callback_id = None
+        self._wrapped = list()
+
+    # ----------------------------------------------------------------------------------
+    def start(self):
+        """
+        Starts tracking node creation and command calls. Phases should only
+        be recorded whilst the profiler is running.
+
+        :return: None
+        """
+        if self._origin is not None:
+            return
+
+        self._origin = time.perf_counter()
+
+        self._callback_id = om.MDGMessage.addNodeAddedCallback(
+            self._node_added,
+            "dependNode",
+        )
+
+        # -- Wrap every command in both maya.cmds and pymels command layer
+        # -- so we can count them. Pymel captures its own references to the
+        # -- maya.cmds functions, so both need wrapping.
+        for module in (mc, pmcmds):
+            for name in dir(module):
+                if name.startswith("_"):
+                    continue
+
+                func = getattr(module, name)
+
+                if not callable(func) or isinstance(func, type):
+                    continue
+
+                self._wrapped.append((module, name, func))
+                setattr(module, name, self._counted(func))
+
+    # ----------------------------------------------------------------------------------
+    def stop(self):
+        """
+        Stops tracking node creation and restores all the wrapped commands.
+
+        :return: None
+        """
+        if self._callback_id is not None:
+            om.MMessage.removeCallback(self._callback_id)
+            self._callback_id = None
+            self._end = time.perf_counter()
+
+        for module, name, func in self._wrapped:
+            setattr(module, name, func)
+
+        self._wrapped = list()
+
+    # ----------------------------------------------------------------------------------
+    def is_running(self):
+        """
+        Returns True if the profiler has been started and not yet stopped
+
+        :return: bool
+        """
+        return self._callback_id is not None
+
+    # ----------------------------------------------------------------------------------
+    def phase(self, category, name):
+        """
+        Returns a context which records a phase of the build.
+
+        :param category: The type of phase, such as "component" or "behaviour"
+        :type category: str
+
+        :param name: The name of the phase, typically the plugin identifier
+        :type name: str
+
+        :return: Phase
+        """
+        return Phase(self, category, name)
+
+    # ----------------------------------------------------------------------------------
+    def elapsed(self):
+        """
+        Returns the time in seconds since the profiler was started, or the
+        total time it ran for if it has been stopped.
+
+        :return: float
+        """
+        if self._origin is None:
+            return 0.0
+
+        return (self._end or time.perf_counter()) - self._origin
+
+    # ----------------------------------------------------------------------------------
+    def summary(self):
+        """
+        Returns the recorded phases grouped by category and name, sorted with
+        the most expensive first. This makes it easy to see which plugins
+        dominate a build.
+
+        :return: list(dict, ...)
+        """
+        totals = dict()
+
+        for event in self.events:
+            key = (event["category"], event["name"])
+
+            if key not in totals:
+                totals[key] = dict(
+                    category=event["category"],
+                    name=event["name"],
+                    calls=0,
+                    duration=0.0,
+                    nodes=0,
+                    commands=0,
+                )
+
+            entry = totals[key]
+            entry["calls"] += 1
+            entry["duration"] += event["duration"]
+            entry["nodes"] += event["nodes"]
+            entry["commands"] += event["commands"]
+
+        return sorted(
+            totals.values(),
+            key=lambda item: item["duration"],
+            reverse=True,
+        )
+
+    # ----------------------------------------------------------------------------------
+    def report(self):
+        """
+        Returns all the profiling information as a json serialisable dictionary
+
+        :return: dict
+        """
+        return dict(
+            label=self.label,
+            duration=self.elapsed(),
+            nodes=self.node_count,
+            commands=self.command_count,
+            events=self.events,
+            summary=self.summary(),
+        )
+
+    # ----------------------------------------------------------------------------------
+    def chrome_trace(self):
+        """
+        Returns the recorded phases in the chrome trace_event format
+
+        :return: dict
+        """
+        trace_events = list()
+
+        for event in self.events:
+            trace_events.append(
+                dict(
+                    name=event["name"],
+                    cat=event["category"],
+                    ph="X",
+                    ts=event["start"] * 1000000,
+                    dur=event["duration"] * 1000000,
+                    pid=1,
+                    tid=1,
+                    args=dict(
+                        nodes=event["nodes"],
+                        commands=event["commands"],
+                    ),
+                )
+            )
+
+        return dict(
+            traceEvents=trace_events,
+            displayTimeUnit="ms",
+            otherData=dict(label=self.label),
+        )
+
+    # ----------------------------------------------------------------------------------
+    def write(self, filepath):
+        """
+        Writes the json report to the given filepath
+
+        :param filepath: Path to write the report to
+        :type filepath: str
+
+        :return: None
+        """
+        with open(filepath, "w") as f:
+            json.dump(self.report(), f, indent=4)
+
+    # ----------------------------------------------------------------------------------
+    def write_chrome_trace(self, filepath):
+        """
+        Writes the chrome trace_event report to the given filepath
+
+        :param filepath: Path to write the report to
+        :type filepath: str
+
+        :return: None
+        """
+        with open(filepath, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    # ----------------------------------------------------------------------------------
+    def save(self, directory):
+        """
+        Writes both the json report and the chrome trace into the given
+        directory, using the profiler label and a timestamp as the file name.
+
+        :param directory: Directory to write the reports into
+        :type directory: str
+
+        :return: list(str, str)
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        filename = "%s_%s" % (
+            self.label.replace(":", "_") or "build",
+            time.strftime("%Y%m%d_%H%M%S"),
+        )
+
+        report_path = os.path.join(directory, filename + ".json")
+        trace_path = os.path.join(directory, filename + ".trace.json")
+
+        self.write(report_path)
+        self.write_chrome_trace(trace_path)
+
+        return [report_path, trace_path]
+
+    # ----------------------------------------------------------------------------------
+    def _node_added(self, *args):
+        self.node_count += 1
+
+    # ----------------------------------------------------------------------------------
+    def _counted(self, func):
+        def wrapper(*args, **kwargs):
+            self.command_count += 1
+            return func(*args, **kwargs)
+
+        return wrapper
+
+
+# --------------------------------------------------------------------------------------
+class Phase(object):
+    """
+    Context which records a single phase against a BuildProfiler. Phases may
+    be nested, in which case the outer phase includes the cost of the inner.
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, profiler, category, name):
+        self._profiler = profiler
+        self._category = category
+        self._name = name
+
+        self._start = 0.0
+        self._nodes = 0
+        self._commands = 0
+
+    # ----------------------------------------------------------------------------------
+    def __enter__(self):
+        self._start = self._profiler.elapsed()
+        self._nodes = self._profiler.node_count
+        self._commands = self._profiler.command_count
+
+        self._profiler._depth += 1
+        return self
+
+    # ----------------------------------------------------------------------------------
+    def __exit__(self, *exc_info):
+        self._profiler._depth -= 1
+
+        self._profiler.events.append(
+            dict(
+                category=self._category,
+                name=str(self._name),
+                start=self._start,
+                duration=self._profiler.elapsed() - self._start,
+                nodes=self._profiler.node_count - self._nodes,
+                commands=self._profiler.command_count - self._commands,
+                depth=self._profiler._depth,
+            )
+        )
+
+
+# --------------------------------------------------------------------------------------
+class NullPhase(object):
+    """
+    Stand-in for a Phase when no profiling is taking place
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    # ----------------------------------------------------------------------------------
+    def __exit__(self, *exc_info):
+        pass
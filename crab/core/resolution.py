@@ -0,0 +1,207 @@
+"""
+Resolving which component a node belongs to requires walking up the hierarchy
+and inspecting the message connections at every level. As this is done
+continuously by the tools and ui's we cache the results for the session.
+
+The cache maps any node which has been resolved to the meta node of the
+component which owns it and holds a parsed snapshot of the options of each
+meta node. Nodes are keyed by their object handle rather than their uuid, as
+a rig which is referenced more than once has the same uuids in each
+reference. Nodes which are not part of a component are not cached, so a node
+which is later parented into a component is always resolved correctly.
+
+The cache is cleared whenever crab alters the component structure of a rig and
+whenever a scene is opened or a new scene is created. If you alter the
+structure of a rig outside of crab you should call invalidate() yourself.
+"""
+import copy
+import json
+
+import pymel.core as pm
+import maya.api.OpenMaya as om
+
+from .. import config
+
+
+# -- handle hash -> (om.MObjectHandle, meta node of the owning component)
+_OWNERS = dict()
+
+# -- meta node handle hash -> (om.MObjectHandle, identifier, options)
+_SNAPSHOTS = dict()
+
+# -- Ids of the scene callbacks which clear the cache
+_CALLBACK_IDS = list()
+
+
+# --------------------------------------------------------------------------------------
+def meta(node):
+    """
+    Returns the meta node of the component which the given node belongs to, or
+    None if the node is not part of a component.
+
+    :param node: The node to resolve
+    :type node: pm.nt.DagNode
+
+    :return: pm.nt.Network or None
+    """
+    _register_callbacks()
+
+    visited = list()
+    result = None
+
+    while node:
+        handle = _handle(node)
+        entry = _lookup(_OWNERS, handle)
+
+        if entry:
+            result = entry[1]
+
+            # -- If the meta node has since been deleted then this entry is
+            # -- no longer valid and we need to resolve it again
+            if result.exists():
+                break
+
+            _OWNERS.pop(handle.hashCode())
+            result = None
+
+        visited.append(handle)
+
+        result = _component_meta(node)
+
+        if result:
+            break
+
+        node = node.getParent()
+
+    # -- Every node we passed through on the way resolves to the same
+    # -- meta node, so store them all. Nodes which are not part of a
+    # -- component are not stored, as they may be parented into one later
+    if result:
+        for handle in visited:
+            _OWNERS[handle.hashCode()] = (handle, result)
+
+    return result
+
+
+# --------------------------------------------------------------------------------------
+def snapshot(meta_node):
+    """
+    Returns the identifier and a copy of the parsed options for the given
+    component meta node.
+
+    :param meta_node: The component meta node
+    :type meta_node: pm.nt.Network
+
+    :return: tuple(str, dict)
+    """
+    handle = _handle(meta_node)
+    entry = _lookup(_SNAPSHOTS, handle)
+
+    if not entry:
+        entry = (
+            handle,
+            meta_node.attr(config.META_IDENTIFIER).get(),
+            json.loads(meta_node.attr(config.META_OPTIONS).get()),
+        )
+        _SNAPSHOTS[handle.hashCode()] = entry
+
+    _, identifier, options = entry
+
+    # -- The options are copied so that changes made to a components
+    # -- options do not leak back into the cache
+    return identifier, copy.deepcopy(options)
+
+
+# --------------------------------------------------------------------------------------
+def invalidate(meta_node=None):
+    """
+    Clears the cache. If a meta node is given then only the options snapshot
+    of that component is cleared.
+
+    :param meta_node: Optional meta node to clear the options snapshot for
+    :type meta_node: pm.nt.Network
+
+    :return: None
+    """
+    if meta_node:
+        _SNAPSHOTS.pop(_handle(meta_node).hashCode(), None)
+        return
+
+    _OWNERS.clear()
+    _SNAPSHOTS.clear()
+
+
+# --------------------------------------------------------------------------------------
+def _component_meta(node):
+    """
+    Returns the meta node connected to the given node if it is a component
+    root.
+
+    :param node: The node to inspect
+    :type node: pm.nt.DependNode
+
+    :return: pm.nt.Network or None
+    """
+    for attribute in node.message.outputs(plugs=True):
+        # -- We"re looking specifically for the crab identifer
+        if config.CONNECTION_PREFIX in attribute.name(includeNode=False):
+            return attribute.node()
+
+    return None
+
+
+# --------------------------------------------------------------------------------------
+def _handle(node):
+    # -- pymel hands out api 1.0 objects, so we look the node up by name
+    # -- to get an api 2.0 object
+    selection = om.MSelectionList()
+    selection.add(node.longName() if isinstance(node, pm.nt.DagNode) else node.name())
+
+    return om.MObjectHandle(selection.getDependNode(0))
+
+
+# --------------------------------------------------------------------------------------
+def _lookup(cache, handle):
+    """
+    Returns the cache entry for the given handle. Hash codes can be reused
+    once a node is deleted, so the entry is only returned if it was stored
+    against the same node and that node still exists.
+    """
+    entry = cache.get(handle.hashCode())
+
+    if not entry:
+        return None
+
+    if not entry[0].isValid() or entry[0].object() != handle.object():
+        cache.pop(handle.hashCode())
+        return None
+
+    return entry
+
+
+# --------------------------------------------------------------------------------------
+# noinspection PyUnusedLocal
+def _scene_changed(*args):
+    invalidate()
+
+
+# --------------------------------------------------------------------------------------
+def _register_callbacks():
+    """
+    Registers the scene callbacks which clear the cache. This is only done
+    once per session.
+
+    :return: None
+    """
+    if _CALLBACK_IDS:
+        return
+
+    for message in [
+        om.MSceneMessage.kAfterNew,
+        om.MSceneMessage.kAfterOpen,
+        om.MSceneMessage.kAfterCreateReference,
+        om.MSceneMessage.kAfterRemoveReference,
+    ]:
+        _CALLBACK_IDS.append(
+            om.MSceneMessage.addCallback(message, _scene_changed),
+        )
@@ -1,5 +1,5 @@
+import os
 import json
-import uuid
 import time
 import operator
 import traceback
@@ -7,10 +7,14 @@ import maya.cmds as mc
 import pymel.core as pm
 
 from . import _factories
+from . import profiling
+from . import resolution
+from .behaviour import BehaviourStore
 
 from .. import utils
 from .. import config
 from .. import create
+from .. import constants
 from ..constants import log
 
 
@@ -87,11 +91,18 @@ class Rig(object):
         # -- Instance our factory
         self.factories = _factories.factory_manager()
 
+        # -- If a build is profiled, the profiler is stored here so the
+        # -- results can be inspected once the build is complete
+        self.profiler = None
+
         # -- Find the rig root to allow all our functionality to
         # -- interact with it
         self._meta = None
         self._reference = node
 
+        # -- Behaviours are parsed from the meta node once and held here
+        self.behaviour_store = BehaviourStore(self)
+
     # ----------------------------------------------------------------------------------
     def built_successfully(self):
         """
@@ -231,6 +242,14 @@ class Rig(object):
         )
         rig_meta.attr(config.BEHAVIOUR_DATA).set("[]")
 
+        # -- Every component meta node is connected into this, giving us
+        # -- a direct index of the components in the rig
+        rig_meta.addAttr(
+            config.COMPONENT_INDEX_ATTR,
+            at="message",
+            multi=True,
+        )
+
         # -- Create our sub-category nodes. These allow us to create
         # -- clear distinctions between our control rig, skeleton and
         # -- guides.
@@ -386,41 +405,19 @@ class Rig(object):
     # ----------------------------------------------------------------------------------
     def behaviours(self, unique_id=None):
         """
-        This will return a list of component classes (not instanced)
-
-        :return: List(crab.Component, crab.Component)
-        """
-        all_behaviour_data = json.loads(self.meta().attr(config.BEHAVIOUR_DATA).get())
-
-        behaviours = list()
+        Returns all the behaviours assigned to the rig in the order they
+        will be built. If a unique id is given then only the behaviour with
+        that id is returned.
 
-        for behaviour_data in all_behaviour_data:
-            # -- If we do not recognise the behaviour, log it and continu
-            if (
-                behaviour_data.get("type", "")
-                not in self.factories.behaviours.identifiers()
-            ):
-                print("{} is not a recognised behaviour".format(behaviour_data["type"]))
-                continue
+        :param unique_id: Optional id of a specific behaviour to return
+        :type unique_id: str
 
-            # -- Instance the behaviour
-            behaviour_class = self.factories.behaviours.request(behaviour_data["type"])
-            behaviour = behaviour_class(
-                rig=self, instance_id=behaviour_data.get("id", None)
-            )
-
-            # -- Update the behaviour with all its option information
-            behaviour.options.update(behaviour_data.get("options", {}))
-
-            # -- If we"re given a specific behaviour id to look for, and it matches
-            # -- then lets return it
-            if unique_id and behaviour_data.get("id") == unique_id:
-                return behaviour
-
-            # -- Add the behaviour to the list
-            behaviours.append(behaviour)
+        :return: List(crab.Behaviour, crab.Behaviour) or crab.Behaviour
+        """
+        if unique_id:
+            return self.behaviour_store.get(unique_id)
 
-        return behaviours
+        return self.behaviour_store.all()
 
     # ----------------------------------------------------------------------------------
     def serialise_behaviour(self, behaviour):
@@ -448,18 +445,7 @@ class Rig(object):
         contents = list()
 
         for component in self.components():
-            meta_node = component.meta()
-
-            # -- If this node has no contents skip it
-            if not meta_node.hasAttr(config.META_CONTENTS):
-                continue
-
-            # -- Scoop up the list
-            contents.extend(
-                eval(
-                    meta_node.attr(config.META_CONTENTS).get(),
-                ),
-            )
+            contents.extend(component.contents())
 
         # -- Now cycle teh list of behaviours and check each one is capable
         # -- of building correctly
@@ -534,6 +520,9 @@ class Rig(object):
         if not result or not plugin.meta():
             return plugin
 
+        # -- Add the component to the rigs component index
+        self._register_component(plugin.meta())
+
         with utils.contexts.RestoredSelection():
             # -- Create the guide, generating a guide root and passing
             # -- that through as the parent
@@ -661,17 +650,28 @@ class Rig(object):
             self.performing_action.emit(
                 "Performing Snapshot : {}".format(proc.identifier)
             )
-            proc(self).snapshot()
+
+            with self._phase("process.snapshot", proc.identifier):
+                proc(self).snapshot()
 
         # -- Now we must remove the control rig
         self.performing_action.emit("Deleting control rig")
-        pm.delete(self.control_roots())
+
+        with self._phase("edit", "Deleting control rig"):
+            pm.delete(self.control_roots())
+
+        # -- Any cached resolutions of the control rig are now stale
+        resolution.invalidate()
+        utils.access.invalidate_controls()
+        utils.snap.invalidate()
 
         for proc in self.factories.processes.plugins():
             self.performing_action.emit(
                 "Running post-edit processes : {}".format(proc.identifier)
             )
-            proc(self).post_edit()
+
+            with self._phase("process.post_edit", proc.identifier):
+                proc(self).post_edit()
 
         # -- Show all guides
         for skeleton_component_root in self.skeleton_roots():
@@ -690,22 +690,82 @@ class Rig(object):
             guide_root.visibility.set(True)
 
             # -- Link the guide to the skeleton
-            component = self.factories.components.find_from_node(guide_root)
-            component.link_guide()
+            with self._phase("guide.link", guide_root):
+                component = self.factories.components.find_from_node(guide_root)
+                component.link_guide()
 
         self.edit_complete.emit(True)
         return True
 
     # ----------------------------------------------------------------------------------
-    def build(self):
+    def build(self, incremental=False, profile=False):
         """
         This builds the rig. It first places the rig into an editable
         state and removes any guide infrastructure. It will then proceed
         to build the control rig before executing the post functions of
         all the stored processes.
 
+        :param incremental: If True and the rig is already built, only the
+            components which have changed since they were last built (along
+            with the behaviours which reference them) will be rebuilt. If the
+            rig is currently editable a full build is always performed.
+        :type incremental: bool
+
+        :param profile: If True, the time, node creation and maya command
+            count of every phase of the build is recorded. The results are
+            accessible through rig.profiler once the build is complete. This
+            is always enabled if the CRAB_PROFILE_PATH environment variable
+            is set, in which case the reports are written there.
+        :type profile: bool
+
         :return: True if the build was successful
         """
+        self.profiler = None
+        profile_path = os.environ.get(constants.PROFILE_ENVIRONMENT_VARIABLE)
+
+        # -- Shapes are cached throughout the build, so this is our
+        # -- oppotunity to pick up any changes made to them on disk
+        utils.shapes.library().validate()
+
+        # -- Rigs created before the component index existed are given one
+        # -- here, as the build is allowed to modify the rig
+        if not self.meta().hasAttr(config.COMPONENT_INDEX_ATTR):
+            self.repair_component_index()
+
+        if profile or profile_path:
+            self.profiler = profiling.BuildProfiler(label=self.node().name())
+            self.profiler.start()
+
+        try:
+            with config.name_tracking():
+                with self._phase("build", "incremental" if incremental else "full"):
+                    if incremental and not self.is_editable():
+                        return self._build_incremental()
+
+                    return self._build_full()
+
+        finally:
+            # -- The build creates and removes a lot of nodes, so drop
+            # -- any cached resolutions or control indices
+            resolution.invalidate()
+            utils.access.invalidate_controls()
+            utils.snap.invalidate()
+
+            if self.profiler:
+                self.profiler.stop()
+
+                if profile_path:
+                    self.profiler.save(profile_path)
+
+    # ----------------------------------------------------------------------------------
+    def _build_full(self):
+        """
+        Performs a complete rebuild of the rig, placing it into an editable
+        state and building every component and behaviour.
+
+        :return: True if the build was successful
+        """
+
         # -- Log the action of starting a rig build
         log.info("Commencing rig build.")
 
@@ -722,7 +782,8 @@ class Rig(object):
         self.node().isClean.set(False)
 
         # -- Ensure the rig is in an editable state
-        self.edit()
+        with self._phase("edit", "edit"):
+            self.edit()
 
         # -- Check if our rig node has the built successfully attribute. This is crucual
         # -- for processes to know what state the rig is in
@@ -752,9 +813,51 @@ class Rig(object):
 
         # -- Run any validation before we start. If any validation fails then
         # -- we do not continue
+        if not self._prepare_build():
+            return False
+
+        # -- Hide all guides
+        for guide_root in self.guide_roots():
+            self.performing_action.emit("Unlinking Guide : {}".format(guide_root))
+
+            guide_root.visibility.set(False)
+
+            # -- UnLink the guide to the skeleton
+            with self._phase("guide.unlink", guide_root):
+                component = self.factories.components.find_from_node(guide_root)
+                component.unlink_guide()
+
+        # -- Finally we can start cycling components and requested
+        # -- a control build
+        for skeleton_component_root in self.skeleton_roots():
+            if not self._build_component(skeleton_component_root):
+                return False
+
+        # -- Every behaviour is about to be applied from scratch, so anything
+        # -- recorded against previous applications no longer applies
+        self._set_behaviour_contents(dict())
+
+        # -- Now we need to apply any behaviours
+        for behaviour in self.behaviours():
+            if not self._apply_behaviour(behaviour):
+                return False
+
+        return self._complete_build(start_time)
+
+    # ----------------------------------------------------------------------------------
+    def _prepare_build(self):
+        """
+        Runs the validate step of every process, followed by the pre_build
+        step of every process. This is done by both full and incremental
+        builds once the control rigs being rebuilt have been removed.
+
+        :return: False if any process failed its validation
+        """
         for proc in self.factories.processes.plugins():
             self.performing_action.emit("Running Process : {}".format(proc.identifier))
-            result = proc(self).validate()
+
+            with self._phase("process.validate", proc.identifier):
+                result = proc(self).validate()
 
             if not result:
                 print(
@@ -765,103 +868,307 @@ class Rig(object):
 
         for proc in self.factories.processes.plugins():
             self.performing_action.emit("Running Process : {}".format(proc.identifier))
-            proc(self).pre_build()
 
-        # -- Hide all guides
-        for guide_root in self.guide_roots():
-            self.performing_action.emit("Unlinking Guide : {}".format(guide_root))
+            with self._phase("process.pre_build", proc.identifier):
+                proc(self).pre_build()
 
-            guide_root.visibility.set(False)
+        return True
 
-            # -- UnLink the guide to the skeleton
-            component = self.factories.components.find_from_node(guide_root)
-            component.unlink_guide()
+    # ----------------------------------------------------------------------------------
+    def _build_incremental(self):
+        """
+        Rebuilds only the parts of an already built rig which have changed
+        since the last build. The control rigs of the changed components are
+        removed and rebuilt, and any behaviours referencing their nodes are
+        re-applied. The nodes and attributes those behaviours created when
+        they were last applied are removed before they are re-applied.
 
-        # -- Finally we can start cycling components and requested
-        # -- a control build
-        for skeleton_component_root in self.skeleton_roots():
+        The processes are run in the same order as a full build, with their
+        post_edit, validate and pre_build steps run once the changed control
+        rigs are removed, so the rebuilt components are built from the same
+        pose as they would be in a full build.
+
+        :return: True if the build was successful
+        """
+        log.info("Commencing incremental rig build.")
+
+        # -- Track the start time
+        start_time = time.time()
+
+        components, behaviours = self._incremental_targets()
+
+        if not components:
+            log.info("No components have changed since the last build.")
+            return True
+
+        action_count = len(self.factories.processes.plugins()) * 5
+        action_count += len(components)
+        action_count += len(behaviours)
+
+        self.node().isClean.set(False)
+        self.node().built_successfully.set(False)
+
+        # -- Emit the edit starting action
+        self.edit_started.emit(action_count)
+
+        # -- Give all the processes the oppotunity to snapshot the rig before
+        # -- we start removing parts of it
+        for proc in self.factories.processes.plugins():
             self.performing_action.emit(
-                "Building Component : {}".format(skeleton_component_root)
+                "Performing Snapshot : {}".format(proc.identifier)
             )
 
-            # -- Attempt to find the specific control parent
-            rig_parent = self.control_org()
-            component_parent = skeleton_component_root.getParent()
+            with self._phase("process.snapshot", proc.identifier):
+                proc(self).snapshot()
 
-            if component_parent.hasAttr(config.BOUND):
-                for potential in component_parent.attr(config.BOUND).inputs():
-                    rig_parent = potential
-                    break
+        # -- Remove the control rigs of the components we are rebuilding. Child
+        # -- components live below their parents so may already be gone
+        self.performing_action.emit("Deleting changed control rigs")
+        control_roots = [
+            component.control_root()
+            for component in components
+            if component.control_root()
+        ]
 
-            # -- Get a component class instance which is targeted at the
-            # -- skeletal component root
-            component_plugin = self.factories.components.find_from_node(
-                skeleton_component_root
-            )
+        if control_roots:
+            with self._phase("edit", "Deleting changed control rigs"):
+                pm.delete(control_roots)
+
+        # -- Remove whatever the affected behaviours created outside of the
+        # -- control rigs we have just deleted, so re-applying them does not
+        # -- duplicate it
+        self.performing_action.emit("Removing behaviour contents")
+
+        with self._phase("edit", "Removing behaviour contents"):
+            for behaviour in behaviours:
+                self._remove_behaviour_contents(behaviour)
 
-            print(
-                "Starting build of : %s (%s)"
-                % (component_plugin.identifier, skeleton_component_root)
+        # -- Any cached resolutions of the control rigs we removed are stale
+        resolution.invalidate()
+        utils.access.invalidate_controls()
+        utils.snap.invalidate()
+
+        # -- With the changed control rigs removed their joints are free, so
+        # -- the processes can return them to their rest pose, validate it and
+        # -- prepare them for building just as a full build would
+        for proc in self.factories.processes.plugins():
+            self.performing_action.emit(
+                "Running post-edit processes : {}".format(proc.identifier)
             )
 
-            try:
-                meta_node = component_plugin.meta()
+            with self._phase("process.post_edit", proc.identifier):
+                proc(self).post_edit()
 
-                # -- Ensure we have a contents node
-                if not meta_node.hasAttr(config.META_CONTENTS):
-                    meta_node.addAttr(
-                        config.META_CONTENTS,
-                        dt="string",
-                    )
-                    meta_node.attr(config.META_CONTENTS).set("[]")
+        if not self._prepare_build():
+            return False
+
+        for component in components:
+            if not self._build_component(component.skeletal_root()):
+                return False
 
-                # -- Snapshot the scene list
-                scene_list = set(mc.ls(dag=True))
+        for behaviour in behaviours:
+            if not self._apply_behaviour(behaviour):
+                return False
 
-                # -- Build the rig, generating a control component org
-                result = component_plugin.create_rig(
-                    parent=component_plugin.create_control_root(
-                        rig_parent,
-                        component_plugin.meta(),
-                    )
-                )
+        return self._complete_build(start_time)
+
+    # ----------------------------------------------------------------------------------
+    def _build_component(self, skeleton_component_root):
+        """
+        Builds the control rig for the component represented by the given
+        skeletal root, storing the nodes it creates along with its fingerprint
+        on its meta node.
+
+        :param skeleton_component_root: The skeletal root of the component
+        :type skeleton_component_root: pm.nt.Joint
+
+        :return: True if the component was built successfully
+        """
+        self.performing_action.emit(
+            "Building Component : {}".format(skeleton_component_root)
+        )
+
+        # -- Attempt to find the specific control parent
+        rig_parent = self.control_org()
+        component_parent = skeleton_component_root.getParent()
 
-                # -- Capture the delta
-                new_scene_list = set(mc.ls(dag=True))
-                meta_node.attr(config.META_CONTENTS).set(
-                    str(list(new_scene_list - scene_list))
+        if component_parent.hasAttr(config.BOUND):
+            for potential in component_parent.attr(config.BOUND).inputs():
+                rig_parent = potential
+                break
+
+        # -- Get a component class instance which is targeted at the
+        # -- skeletal component root
+        component_plugin = self.factories.components.find_from_node(
+            skeleton_component_root
+        )
+
+        print(
+            "Starting build of : %s (%s)"
+            % (component_plugin.identifier, skeleton_component_root)
+        )
+
+        try:
+            meta_node = component_plugin.meta()
+
+            # -- Ensure we have a fingerprint attribute
+            if not meta_node.hasAttr(config.META_FINGERPRINT):
+                meta_node.addAttr(
+                    config.META_FINGERPRINT,
+                    dt="string",
                 )
 
-                if not result:
-                    print(
-                        "%s returned False during build." % component_plugin.identifier
+            # -- Take the fingerprint before the build, whilst the skeleton
+            # -- is in the state the rig will be built from
+            fingerprint = component_plugin.fingerprint()
+
+            # -- Build the rig, generating a control component org. We track
+            # -- every node created during the build so we know exactly what
+            # -- this component is made up of
+            with utils.contexts.TrackedNodes() as tracker:
+                with self._phase("component", component_plugin.identifier):
+                    result = component_plugin.create_rig(
+                        parent=component_plugin.create_control_root(
+                            rig_parent,
+                            component_plugin.meta(),
+                        )
                     )
-                    return False
 
-            except:
-                traceback.print_exc()
+            component_plugin.set_contents(tracker.names())
+
+            if not result:
+                print("%s returned False during build." % component_plugin.identifier)
                 return False
 
-            print("\tBuild complete")
+            meta_node.attr(config.META_FINGERPRINT).set(fingerprint)
 
-        # -- Now we need to apply any behaviours
-        for behaviour in self.behaviours():
-            self.performing_action.emit(
-                "Building Behaviour : {}".format(behaviour.identifier)
-            )
+        except:
+            traceback.print_exc()
+            return False
 
-            print("Starting application of : %s" % behaviour.identifier)
+        print("\tBuild complete")
+        return True
 
-            try:
-                # -- Finally apply the behaviour
-                behaviour.apply()
+    # ----------------------------------------------------------------------------------
+    def _apply_behaviour(self, behaviour):
+        """
+        Applies the given behaviour as part of a rig build
 
-            except:
-                traceback.print_exc()
-                return False
+        :param behaviour: The behaviour instance to apply
+        :type behaviour: crab.Behaviour
+
+        :return: True if the behaviour was applied successfully
+        """
+        self.performing_action.emit(
+            "Building Behaviour : {}".format(behaviour.identifier)
+        )
+
+        print("Starting application of : %s" % behaviour.identifier)
+
+        # -- Record the attributes of the nodes the behaviour references so
+        # -- we can tell which ones it adds
+        references = [
+            node
+            for node in self._behaviour_references(behaviour)
+            if mc.objExists(node)
+        ]
+
+        existing_attributes = dict(
+            (node, set(mc.listAttr(node, userDefined=True) or list()))
+            for node in references
+        )
+
+        try:
+            # -- Finally apply the behaviour, tracking every node it creates
+            with utils.contexts.TrackedNodes(node_type="dependNode") as tracker:
+                with self._phase("behaviour", behaviour.identifier):
+                    behaviour.apply()
+
+        except:
+            traceback.print_exc()
+            return False
+
+        attributes = list()
+
+        for node, existing in existing_attributes.items():
+            for attribute in mc.listAttr(node, userDefined=True) or list():
+                if attribute not in existing:
+                    attributes.append("%s.%s" % (node, attribute))
+
+        contents = self.behaviour_contents()
+        contents[behaviour.uuid] = dict(
+            nodes=tracker.names(),
+            attributes=attributes,
+        )
+        self._set_behaviour_contents(contents)
+
+        print("\tApplication complete")
+        return True
+
+    # ----------------------------------------------------------------------------------
+    def behaviour_contents(self):
+        """
+        Returns the nodes and attributes each behaviour created the last time
+        it was applied, keyed by the uuid of the behaviour.
+
+        :return: dict(uuid -> dict(nodes=list(str, ...), attributes=list(str, ...)))
+        """
+        if not self.meta().hasAttr(config.BEHAVIOUR_CONTENTS):
+            return dict()
+
+        return json.loads(self.meta().attr(config.BEHAVIOUR_CONTENTS).get() or "{}")
+
+    # ----------------------------------------------------------------------------------
+    def _set_behaviour_contents(self, contents):
+        if not self.meta().hasAttr(config.BEHAVIOUR_CONTENTS):
+            self.meta().addAttr(config.BEHAVIOUR_CONTENTS, dt="string")
+
+        self.meta().attr(config.BEHAVIOUR_CONTENTS).set(
+            json.dumps(contents, separators=(",", ":")),
+        )
+
+    # ----------------------------------------------------------------------------------
+    def _remove_behaviour_contents(self, behaviour):
+        """
+        Deletes the nodes and attributes the given behaviour created the last
+        time it was applied. Anything which has since been removed (such as
+        nodes which lived within a deleted control rig) is skipped.
+
+        :param behaviour: The behaviour to remove the contents of
+        :type behaviour: crab.Behaviour
 
-            print("\tApplication complete")
+        :return: None
+        """
+        contents = self.behaviour_contents()
+        entry = contents.pop(behaviour.uuid, None)
+
+        if not entry:
+            return
+
+        for attribute in entry["attributes"]:
+            if mc.objExists(attribute):
+                mc.setAttr(attribute, lock=False)
+                mc.deleteAttr(attribute)
+
+        nodes = mc.ls(entry["nodes"])
+
+        if nodes:
+            mc.lockNode(nodes, lock=False)
+            mc.delete(nodes)
+
+        self._set_behaviour_contents(contents)
 
+    # ----------------------------------------------------------------------------------
+    def _complete_build(self, start_time):
+        """
+        Runs the post build processes and marks the rig as being successfully
+        built. This is the final stage of both full and incremental builds.
+
+        :param start_time: The time the build started
+        :type start_time: float
+
+        :return: True if the post build processes were successful
+        """
         # -- Mark the rig build as clean
         self.node().isClean.set(True)
 
@@ -874,7 +1181,8 @@ class Rig(object):
 
             print("Starting Process : %s" % proc.identifier)
             try:
-                proc(self).post_build()
+                with self._phase("process.post_build", proc.identifier):
+                    proc(self).post_build()
 
             except:
                 traceback.print_exc()
@@ -882,6 +1190,14 @@ class Rig(object):
 
             print("\tProcess complete")
 
+        # -- Store the left/right pairings now that all the nodes exist
+        with self._phase("build", "Storing mirror table"):
+            self.store_mirror_table()
+
+        # -- Along with the values the controls should be reset to
+        with self._phase("build", "Storing default values"):
+            self.store_defaults_table()
+
         # -- To reach this point our rig build has been succesful, so we should
         # -- mark it as such
         self.node().built_successfully.set(True)
@@ -895,6 +1211,146 @@ class Rig(object):
 
         return True
 
+    # ----------------------------------------------------------------------------------
+    def _phase(self, category, name):
+        """
+        Returns a context which records the wrapped block against the build
+        profiler if the current build is being profiled.
+
+        :param category: The type of phase, such as "component" or "behaviour"
+        :type category: str
+
+        :param name: The name of the phase, typically the plugin identifier
+        :type name: str
+
+        :return: context
+        """
+        if self.profiler and self.profiler.is_running():
+            return self.profiler.phase(category, name)
+
+        return profiling.NullPhase()
+
+    # ----------------------------------------------------------------------------------
+    def dirty_components(self):
+        """
+        Returns all the components whose fingerprint no longer matches the
+        one stored when they were last built, or which currently have no
+        control rig.
+
+        :return: list(crab.Component, ...)
+        """
+        return [
+            component
+            for component in self.components()
+            if not component.control_root()
+            or component.fingerprint() != component.stored_fingerprint()
+        ]
+
+    # ----------------------------------------------------------------------------------
+    def _incremental_targets(self):
+        """
+        Resolves the components and behaviours which need to be rebuilt during
+        an incremental build.
+
+        Any component sitting below a dirty component has its control rig
+        removed along with its parent, so it is also rebuilt. Behaviours which
+        reference nodes of a dirty component are re-applied, and because this
+        re-application touches every node they reference, the components owning
+        those nodes are rebuilt too. This is repeated until nothing new is
+        pulled in.
+
+        :return: tuple(list(crab.Component, ...), list(crab.Behaviour, ...))
+        """
+        all_components = self.components()
+
+        # -- Map the names of every node created by a component to the
+        # -- component which created it
+        owners = dict()
+        root_paths = dict()
+
+        for component in all_components:
+            meta_name = component.meta().name()
+            root_paths[meta_name] = component.skeletal_root().longName()
+
+            for node_name in component.contents():
+                owners[node_name] = meta_name
+
+        dirty = set(component.meta().name() for component in self.dirty_components())
+
+        behaviours = self.behaviours()
+        references = dict(
+            (behaviour.uuid, self._behaviour_references(behaviour))
+            for behaviour in behaviours
+        )
+
+        affected = list()
+
+        while dirty:
+            # -- Pull in any components which sit below a dirty component
+            dirty_paths = [root_paths[meta_name] for meta_name in dirty]
+
+            for meta_name, root_path in root_paths.items():
+                for dirty_path in dirty_paths:
+                    if root_path.startswith(dirty_path + "|"):
+                        dirty.add(meta_name)
+                        break
+
+            # -- Find the behaviours which reference any of the dirty nodes
+            affected = [
+                behaviour
+                for behaviour in behaviours
+                if any(owners.get(ref) in dirty for ref in references[behaviour.uuid])
+            ]
+
+            # -- Any components referenced by those behaviours must now be
+            # -- rebuilt too, so that re-applying the behaviour is safe
+            expanded = set(dirty)
+
+            for behaviour in affected:
+                for reference in references[behaviour.uuid]:
+                    if reference in owners:
+                        expanded.add(owners[reference])
+
+            if expanded == dirty:
+                break
+
+            dirty = expanded
+
+        components = [
+            component
+            for component in all_components
+            if component.meta().name() in dirty
+        ]
+
+        return components, affected
+
+    # ----------------------------------------------------------------------------------
+    @classmethod
+    def _behaviour_references(cls, behaviour):
+        """
+        Returns the names of all the nodes a behaviour references through its
+        options. Options may hold ; separated lists of nodes, attributes (in
+        the form node.attr) or label=node pairs.
+
+        :param behaviour: The behaviour to inspect
+        :type behaviour: crab.Behaviour
+
+        :return: set(str, ...)
+        """
+        references = set()
+
+        for value in behaviour.options.values():
+            if not isinstance(value, str):
+                continue
+
+            for token in value.split(";"):
+                token = token.split("=")[-1].split(".")[0].strip()
+
+                if token:
+                    references.add(token)
+
+        return references
+
     # ----------------------------------------------------------------------------------
     def is_editable(self):
         """
@@ -940,27 +1396,10 @@ class Rig(object):
             log.error("%s could not be found." % behaviour_type)
             return False
 
-        # -- Get the current behaviour data
-        current_data = json.loads(self.meta().attr(config.BEHAVIOUR_DATA).get())
-
-        # -- Create a data block to add it to
-        unique_id = str(uuid.uuid4())
-        behaviour_data = dict(
-            type=behaviour_type,
-            options=options,
-            id=unique_id,
-        )
-
-        # -- Assign our data into the current data
-        if index is None:
-            current_data.append(behaviour_data)
-
-        else:
-            current_data.insert(index, behaviour_data)
-
-        # -- Now write the data into the attribute
-        self.meta().attr(config.BEHAVIOUR_DATA).set(
-            json.dumps(current_data),
+        unique_id = self.behaviour_store.add(
+            behaviour_type,
+            options,
+            index=index,
         )
 
         return self.behaviours(unique_id=unique_id)
@@ -972,13 +1411,7 @@ class Rig(object):
 
         :return: list of all the guide roots
         """
-        results = list()
-
-        for child in reversed(self.guide_org().getChildren(allDescendents=True)):
-            if self.factories.component_abstract.is_component_root(child):
-                results.append(child)
-
-        return results
+        return self._component_links(config.GUIDE_ROOT_LINK_ATTR)
 
     # ----------------------------------------------------------------------------------
     def control_roots(self):
@@ -988,19 +1421,112 @@ class Rig(object):
 
         :return: list (pm.nt.DagNode, ...)
         """
+        return self._component_links(config.CONTROL_ROOT_LINK_ATTR)
+
+    # ----------------------------------------------------------------------------------
+    def skeleton_roots(self):
+        """
+        Returns all the component roots within the skeletal hierarchy
+        of the rig
+
+        :return: list(pm.nt.DagNode, ...)
+        """
+        return [root for _, root in self._component_entries()]
+
+    # ----------------------------------------------------------------------------------
+    def component_metas(self):
+        """
+        Returns the meta nodes of all the components in the rig, ordered such
+        that a parent component always comes before its children.
+
+        :return: list(pm.nt.Network, ...)
+        """
+        return [meta_node for meta_node, _ in self._component_entries()]
+
+    # ----------------------------------------------------------------------------------
+    def _component_entries(self):
+        """
+        Reads the component index from the rig meta node, returning each
+        component meta node along with its skeletal root. These are sorted
+        into the depth first order of the skeletal roots within the skeleton
+        (the same order a scan of the skeleton gives), which guarantees
+        parents are listed before their children and that siblings keep
+        their hierarchy order.
+
+        :return: list(tuple(pm.nt.Network, pm.nt.DagNode), ...)
+        """
+        rig_meta = self.meta()
+
+        # -- Rigs created before the index existed (or referenced rigs which
+        # -- cannot be given one) fall back to scanning the skeleton. This is
+        # -- a query, so the index is only generated by a build or an
+        # -- explicit call to repair_component_index
+        if not rig_meta.hasAttr(config.COMPONENT_INDEX_ATTR):
+            return [
+                (self.factories.component_abstract.is_component_root(root), root)
+                for root in self._scan_skeleton_roots()
+            ]
+
+        entries = list()
+
+        for meta_node in rig_meta.attr(config.COMPONENT_INDEX_ATTR).inputs():
+            roots = meta_node.attr(config.SKELETON_ROOT_LINK_ATTR).inputs()
+
+            if roots:
+                entries.append((meta_node, roots[0]))
+
+        # -- Order each root by its position amongst its siblings at every
+        # -- level of its path. Only the children of the ancestors of the
+        # -- roots are read, so this is far cheaper than scanning the skeleton
+        children = dict()
+        children[""] = mc.ls(assemblies=True, long=True)
+
+        orders = list()
+
+        for entry in entries:
+            order = list()
+            parent = ""
+
+            for name in entry[1].longName().split("|")[1:]:
+                path = "%s|%s" % (parent, name)
+
+                if parent not in children:
+                    children[parent] = mc.listRelatives(
+                        parent,
+                        children=True,
+                        fullPath=True,
+                    ) or list()
+
+                order.append(children[parent].index(path))
+                parent = path
+
+            orders.append((order, entry))
+
+        return [entry for _, entry in sorted(orders, key=lambda item: item[0])]
+
+    # ----------------------------------------------------------------------------------
+    def _component_links(self, link_attr):
+        """
+        Returns the nodes connected to the given link attribute of every
+        component meta node in the rig.
+
+        :param link_attr: Name of the link attribute to read
+        :type link_attr: str
+
+        :return: list(pm.nt.DagNode, ...)
+        """
         results = list()
 
-        for child in reversed(self.control_org().getChildren(allDescendents=True)):
-            if self.factories.component_abstract.is_component_root(child):
-                results.append(child)
+        for meta_node in self.component_metas():
+            results.extend(meta_node.attr(link_attr).inputs())
 
         return results
 
     # ----------------------------------------------------------------------------------
-    def skeleton_roots(self):
+    def _scan_skeleton_roots(self):
         """
-        Returns all the component roots within the skeletal hierarchy
-        of the rig
+        Finds the component roots by searching the entire skeletal hierarchy.
+        This is only used to generate the component index.
 
         :return: list(pm.nt.DagNode, ...)
         """
@@ -1012,6 +1538,64 @@ class Rig(object):
 
         return results
 
+    # ----------------------------------------------------------------------------------
+    def _register_component(self, component_meta):
+        """
+        Adds the given component meta node to the rigs component index
+
+        :param component_meta: The meta node of the component
+        :type component_meta: pm.nt.Network
+
+        :return: None
+        """
+        rig_meta = self.meta()
+
+        if not rig_meta.hasAttr(config.COMPONENT_INDEX_ATTR):
+            self.repair_component_index()
+            return
+
+        index_attr = rig_meta.attr(config.COMPONENT_INDEX_ATTR)
+        indices = index_attr.getArrayIndices()
+
+        component_meta.message.connect(
+            index_attr[max(indices) + 1 if indices else 0],
+        )
+
+    # ----------------------------------------------------------------------------------
+    def repair_component_index(self):
+        """
+        Regenerates the component index on the rig meta node by scanning the
+        skeleton for component roots. This is needed for rigs created before
+        the index existed, or if the index has been damaged.
+
+        :return: True if the index was repaired
+        """
+        rig_meta = self.meta()
+
+        if not rig_meta.hasAttr(config.COMPONENT_INDEX_ATTR):
+            # -- We do not want to be making edits to referenced rigs
+            if rig_meta.isReferenced():
+                return False
+
+            rig_meta.addAttr(
+                config.COMPONENT_INDEX_ATTR,
+                at="message",
+                multi=True,
+            )
+
+        index_attr = rig_meta.attr(config.COMPONENT_INDEX_ATTR)
+
+        # -- Clear out the current index entirely
+        for idx in index_attr.getArrayIndices():
+            pm.removeMultiInstance(index_attr[idx], b=True)
+
+        for idx, root in enumerate(self._scan_skeleton_roots()):
+            component_meta = self.factories.component_abstract.is_component_root(root)
+            component_meta.message.connect(index_attr[idx])
+
+        log.info("Repaired component index for %s" % self.node())
+        return True
+
     # ----------------------------------------------------------------------------------
     def components(self):
         components = list()
@@ -1023,6 +1607,129 @@ class Rig(object):
 
         return components
 
+    # ----------------------------------------------------------------------------------
+    def store_mirror_table(self):
+        """
+        Pairs every control and skeletal joint with the node on the opposite
+        side, along with the axes which need inverting to mirror local
+        transforms between the two. Middle nodes are paired with themselves.
+        The table is stored on the rig meta node and is read by the tools
+        through crab.utils.access.opposite and crab.utils.access.mirror_axes.
+
+        This is done at the end of every build.
+
+        :return: None
+        """
+        nodes = self._control_paths()
+
+        if self.skeleton_org():
+            nodes.extend(
+                mc.listRelatives(
+                    self.skeleton_org().longName(),
+                    allDescendents=True,
+                    type="joint",
+                    fullPath=True,
+                ) or list()
+            )
+
+        # -- Key the nodes by their name without any namespace
+        names = dict(
+            (node.split("|")[-1].split(":")[-1], node)
+            for node in nodes
+        )
+
+        opposite_sides = {
+            config.LEFT: config.RIGHT,
+            config.RIGHT: config.LEFT,
+            config.MIDDLE: config.MIDDLE,
+        }
+
+        pairs = list()
+
+        for name, node in names.items():
+            side = config.get_side(name)
+
+            if side not in opposite_sides:
+                continue
+
+            opposite = name[:-len(side)] + opposite_sides[side]
+
+            if opposite not in names:
+                continue
+
+            pairs.append(
+                [
+                    name,
+                    opposite,
+                    utils.maths.mirror_signs(
+                        mc.xform(node, query=True, matrix=True, worldSpace=True),
+                        mc.xform(
+                            names[opposite],
+                            query=True,
+                            matrix=True,
+                            worldSpace=True,
+                        ),
+                    ),
+                ]
+            )
+
+        if not self.meta().hasAttr(config.MIRROR_TABLE_ATTR):
+            self.meta().addAttr(config.MIRROR_TABLE_ATTR, dt="string")
+
+        self.meta().attr(config.MIRROR_TABLE_ATTR).set(
+            json.dumps(dict(version=1, pairs=pairs)),
+        )
+
+        utils.access.invalidate_controls()
+
+    # ----------------------------------------------------------------------------------
+    def store_defaults_table(self):
+        """
+        Records the value each keyable, unlocked attribute of every control
+        should be reset to. Translation and rotation reset to zero, scale
+        resets to one and user defined attributes reset to their default
+        value. The table is stored on the rig meta node and is applied by
+        crab.utils.access.reset.
+
+        This is done at the end of every build.
+
+        :return: None
+        """
+        table = dict()
+
+        for node in self._control_paths():
+            table[node.split("|")[-1].split(":")[-1]] = utils.access.default_values(node)
+
+        if not self.meta().hasAttr(config.DEFAULTS_TABLE_ATTR):
+            self.meta().addAttr(config.DEFAULTS_TABLE_ATTR, dt="string")
+
+        self.meta().attr(config.DEFAULTS_TABLE_ATTR).set(
+            json.dumps(dict(version=1, controls=table)),
+        )
+
+        utils.access.invalidate_controls()
+
+    # ----------------------------------------------------------------------------------
+    def _control_paths(self):
+        """
+        Returns the full paths of all the controls in the control rig
+
+        :return: list(str, ...)
+        """
+        if not self.control_org():
+            return list()
+
+        return [
+            node
+            for node in mc.listRelatives(
+                self.control_org().longName(),
+                allDescendents=True,
+                type="transform",
+                fullPath=True,
+            ) or list()
+            if node.split("|")[-1].split(":")[-1].startswith(config.CONTROL + "_")
+        ]
+
     # ----------------------------------------------------------------------------------
     @classmethod
     def all(cls):
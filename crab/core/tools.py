@@ -1,16 +1,8 @@
 import os
 
-from ..vendor import factories
-
 from .. import utils
 from .. import constants
 
-# -- We do not want to re-populate the tool factories
-# -- continously, therefore we cache them globally and
-# -- re-use them.
-_rig_library = None
-_anim_library = None
-
 
 # --------------------------------------------------------------------------------------
 # noinspection PyUnusedLocal
@@ -126,19 +118,12 @@ class AnimTool(object):
         :return:
         """
         if not cls.icon:
-            print("no icon")
             return os.path.join(os.path.dirname(__file__), "resources", "tool.png")
 
         if os.path.exists(cls.icon):
             return cls.icon
 
-        search_locations = rigging().paths()
-        search_locations.append(
-            os.path.join(
-                os.path.dirname(__file__),
-                "resources",
-            )
-        )
+        search_locations = _search_locations()
 
         for search_location in search_locations:
             for root, _, __ in os.walk(search_location):
@@ -242,13 +227,7 @@ class RigTool(object):
         if os.path.exists(cls.icon):
             return cls.icon
 
-        search_locations = rigging().paths()
-        search_locations.append(
-            os.path.join(
-                os.path.dirname(__file__),
-                "resources",
-            )
-        )
+        search_locations = _search_locations()
 
         for search_location in search_locations:
             for root, _, __ in os.walk(search_location):
@@ -272,6 +251,34 @@ class RigTool(object):
         )
 
 
+# --------------------------------------------------------------------------------------
+def _search_locations():
+    """
+    Returns the locations which should be searched for tool icons. These are
+    the plugin locations along with the crab resources folder.
+
+    Note: This deliberately does not use the tool factories, as icons are
+    resolved whilst the factories are being populated.
+
+    :return: list(str, str, ...)
+    """
+    search_locations = list(constants.PLUGIN_LOCATIONS)
+
+    if constants.PLUGIN_ENVIRONMENT_VARIABLE in os.environ:
+        search_locations.extend(
+            os.environ[constants.PLUGIN_ENVIRONMENT_VARIABLE].split(";"),
+        )
+
+    search_locations.append(
+        os.path.join(
+            os.path.dirname(__file__),
+            "resources",
+        )
+    )
+
+    return search_locations
+
+
 # --------------------------------------------------------------------------------------
 def rigging():
     """
@@ -283,22 +290,11 @@ def rigging():
 
     :return: factories.Factory
     """
+    # -- The tool factories are populated alongside all the other
+    # -- crab factories
+    from . import _factories
 
-    # -- If we already have a cached factory return that
-    global _rig_library
-    if _rig_library:
-        return _rig_library
-
-    # -- Instance a new factory
-    _rig_library = factories.Factory(
-        abstract=RigTool,
-        plugin_identifier="identifier",
-        versioning_identifier="version",
-        envvar=constants.PLUGIN_ENVIRONMENT_VARIABLE,
-        paths=constants.PLUGIN_LOCATIONS,
-    )
-
-    return _rig_library
+    return _factories.factory_manager().rig_tools
 
 
 # --------------------------------------------------------------------------------------
@@ -312,19 +308,8 @@ def animation():
 
     :return: factories.Factory
     """
+    # -- The tool factories are populated alongside all the other
+    # -- crab factories
+    from . import _factories
 
-    # -- If we already have a cached factory return that
-    global _anim_library
-    if _anim_library:
-        return _anim_library
-
-    # -- Instance a new factory
-    _anim_library = factories.Factory(
-        abstract=AnimTool,
-        plugin_identifier="identifier",
-        versioning_identifier="version",
-        envvar=constants.PLUGIN_ENVIRONMENT_VARIABLE,
-        paths=constants.PLUGIN_LOCATIONS,
-    )
-
-    return _anim_library
+    return _factories.factory_manager().anim_tools
@@ -21,7 +21,10 @@ class LayerProcess(crab.Process):
 
         :return:
         """
-        crab.tools.rigging().request("poses_apply_a_pose")().run()
+        crab.utils.skeleton_poses.apply(
+            crab.utils.skeleton_poses.nodes(root=self.rig.node()),
+            "APose",
+        )
 
     # --------------------------------------------------------------------------
     # noinspection PyUnresolvedReferences
@@ -32,4 +35,7 @@ class LayerProcess(crab.Process):
 
         :return:
         """
-        crab.tools.rigging().request("poses_apply_t_pose")().run()
+        crab.utils.skeleton_poses.apply(
+            crab.utils.skeleton_poses.nodes(root=self.rig.node()),
+            "TPose",
+        )
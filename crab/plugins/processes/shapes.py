@@ -1,7 +1,25 @@
+import sys
 import json
+import zlib
+import array
+import base64
+import struct
+
 import crab
 import pymel.core as pm
 
+from crab.constants import log
+
+
+# -- Compact snapshots are stored as this prefix followed by the base64
+# -- encoding of the zlib compressed payload. Anything else is treated as
+# -- the original json snapshot format
+ENCODED_PREFIX = "crabShapes:2:"
+
+# -- The payload starts with the length of the json header, which is then
+# -- followed by the packed float data
+_PAYLOAD_HEADER = struct.Struct("<I")
+
 
 # --------------------------------------------------------------------------------------
 class ShapeStoreProcess(crab.Process):
@@ -63,7 +81,7 @@ class ShapeStoreProcess(crab.Process):
 
         # -- Store all the data into the rig so we can call
         # -- upon it at a later stage
-        self.rig.node().attr("shapeInfo").set(json.dumps(data_sets))
+        self.rig.node().attr("shapeInfo").set(encode(data_sets))
 
     # ----------------------------------------------------------------------------------
     # noinspection PyUnresolvedReferences
@@ -81,13 +99,19 @@ class ShapeStoreProcess(crab.Process):
 
         # -- Read the stored data, and return if anything goes wrong
         try:
-            shape_data = json.loads(
+            shape_data = decode(
                 self.rig.node().attr("shapeInfo").get(),
             )
 
-        except ValueError:
+        except (ValueError, TypeError, KeyError, zlib.error, struct.error):
+            log.warning("Could not read the stored shape information")
             return
 
+        # -- Track how many controls we could update in place and how many
+        # -- needed their shapes rebuilding
+        updated = 0
+        rebuilt = 0
+
         # -- Cycle over the data looking for matching names
         for data in shape_data:
 
@@ -97,15 +121,30 @@ class ShapeStoreProcess(crab.Process):
             # -- Get the node in question
             node = pm.PyNode(data["node"])
 
+            # -- If the shapes which were built match the topology of the
+            # -- stored shapes we only need to move the cvs
+            if update(node, data):
+                updated += 1
+                continue
+
             # -- Remove any pre-existing shapes
             if node.getShapes():
                 pm.delete(node.getShapes())
 
             # -- Now apply our new shapes
             apply(
-                pm.PyNode(data["node"]),
+                node,
                 data,
             )
+            rebuilt += 1
+
+        log.info(
+            "Restored shapes on %s controls (%s updated in place, %s rebuilt)" % (
+                updated + rebuilt,
+                updated,
+                rebuilt,
+            )
+        )
 
 
 # --------------------------------------------------------------------------------------
@@ -159,6 +198,251 @@ def read(node):
     return data
 
 
+# --------------------------------------------------------------------------------------
+def encode(data_sets):
+    """
+    Encodes the given shape data (as returned by read) into a compact
+    string. The cvs and knots of every control are stored as delta encoded
+    floats and the whole payload is zlib compressed and base64 encoded.
+
+    :param data_sets: List of shape data to encode
+    :type data_sets: list(dict, ...)
+
+    :return: str
+    """
+    controls = list()
+    values = array.array("d")
+
+    for data in data_sets:
+        curves = list()
+
+        for curve_data in data["curves"]:
+            curves.append(
+                dict(
+                    degree=curve_data["degree"],
+                    form=curve_data["form"],
+                    cv_count=len(curve_data["cvs"]),
+                    knot_count=len(curve_data["knots"]),
+                ),
+            )
+
+            # -- Neighbouring cvs tend to be close together, so storing
+            # -- the difference between them compresses far better
+            previous = [0.0, 0.0, 0.0]
+
+            for cv in curve_data["cvs"]:
+                values.extend(cv[idx] - previous[idx] for idx in range(3))
+                previous = cv
+
+            previous = 0.0
+
+            for knot in curve_data["knots"]:
+                values.append(knot - previous)
+                previous = knot
+
+        controls.append(
+            dict(
+                node=data["node"],
+                curves=curves,
+            ),
+        )
+
+    # -- The float data is always stored little endian
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    header = json.dumps(dict(controls=controls)).encode("utf-8")
+
+    payload = zlib.compress(
+        _PAYLOAD_HEADER.pack(len(header)) + header + values.tobytes(),
+        9,
+    )
+
+    return ENCODED_PREFIX + base64.b64encode(payload).decode("ascii")
+
+
+# --------------------------------------------------------------------------------------
+def decode(text):
+    """
+    Decodes the given shape information back into a list of shape data. This
+    supports both the compact format written by encode and the original json
+    format.
+
+    :param text: The stored shape information
+    :type text: str
+
+    :return: list(dict, ...)
+    """
+    if not text.startswith(ENCODED_PREFIX):
+        return json.loads(text)
+
+    payload = zlib.decompress(base64.b64decode(text[len(ENCODED_PREFIX):]))
+
+    header_length = _PAYLOAD_HEADER.unpack_from(payload, 0)[0]
+    header_end = _PAYLOAD_HEADER.size + header_length
+
+    header = json.loads(payload[_PAYLOAD_HEADER.size:header_end].decode("utf-8"))
+
+    values = array.array("d")
+    values.frombytes(payload[header_end:])
+
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    data_sets = list()
+    offset = 0
+
+    for control in header["controls"]:
+
+        # -- Earlier snapshots stored some controls as a reference to a
+        # -- library shape, which can only be resolved against the library
+        if "curves" not in control:
+            data = _from_library(control)
+
+            if data:
+                data_sets.append(data)
+
+            continue
+
+        curves = list()
+
+        for curve in control["curves"]:
+            cvs = list()
+            previous = [0.0, 0.0, 0.0]
+
+            for _ in range(curve["cv_count"]):
+                previous = [
+                    previous[idx] + values[offset + idx]
+                    for idx in range(3)
+                ]
+                cvs.append(previous)
+                offset += 3
+
+            knots = list()
+            previous = 0.0
+
+            for _ in range(curve["knot_count"]):
+                previous += values[offset]
+                knots.append(previous)
+                offset += 1
+
+            curves.append(
+                dict(
+                    cvs=cvs,
+                    knots=knots,
+                    degree=curve["degree"],
+                    form=curve["form"],
+                ),
+            )
+
+        data_sets.append(
+            dict(
+                node=control["node"],
+                curves=curves,
+            ),
+        )
+
+    return data_sets
+
+
+# --------------------------------------------------------------------------------------
+def _from_library(control):
+    """
+    Builds the shape data for a control which was stored as a reference to
+    a library shape.
+
+    :param control: The stored control entry
+    :type control: dict
+
+    :return: dict or None
+    """
+    library_data = crab.utils.shapes.library().get(control["shape"])
+
+    if not library_data:
+        log.warning(
+            "Could not find shape %s for %s" % (control["shape"], control["node"]),
+        )
+        return None
+
+    matrix = control["matrix"]
+    curves = list()
+
+    for curve_data in library_data["curves"]:
+        cvs = list()
+
+        for cv in curve_data["cvs"]:
+            cvs.append(
+                [
+                    cv[0] * matrix[column]
+                    + cv[1] * matrix[4 + column]
+                    + cv[2] * matrix[8 + column]
+                    + matrix[12 + column]
+                    for column in range(3)
+                ]
+            )
+
+        curves.append(
+            dict(
+                cvs=cvs,
+                knots=list(curve_data["knots"]),
+                degree=curve_data["degree"],
+                form=curve_data["form"],
+            ),
+        )
+
+    return dict(
+        node=control["node"],
+        curves=curves,
+    )
+
+
+# --------------------------------------------------------------------------------------
+def update(node, data):
+    """
+    Writes the cvs in the given shape data directly onto the existing shapes
+    of the given node. This is only done if the node has exactly the same
+    number of curves as the data and each curve has the same degree, form,
+    knot count and cv count as the curve it is being matched to.
+
+    :param node: Node to apply to
+    :type node: pm.nt.DagNode
+
+    :param data: Shape data to apply
+    :type data: dict
+
+    :return: True if the shapes were updated
+    """
+    shapes = [
+        shape
+        for shape in node.getShapes()
+        if isinstance(shape, pm.nt.NurbsCurve)
+    ]
+
+    if len(shapes) != len(node.getShapes()) or len(shapes) != len(data["curves"]):
+        return False
+
+    for shape, curve_data in zip(shapes, data["curves"]):
+        if shape.degree() != curve_data["degree"]:
+            return False
+
+        if shape.f.get() != curve_data["form"]:
+            return False
+
+        if shape.numKnots() != len(curve_data["knots"]):
+            return False
+
+        if shape.numCVs() != len(curve_data["cvs"]):
+            return False
+
+    crab.utils.curves.write(
+        shapes,
+        [cv for curve_data in data["curves"] for cv in curve_data["cvs"]],
+        [len(curve_data["cvs"]) for curve_data in data["curves"]],
+    )
+
+    return True
+
+
 # --------------------------------------------------------------------------------------
 def apply(node, data):
     """
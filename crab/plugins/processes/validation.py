@@ -1,14 +1,30 @@
 import crab
 import pymel.core as pm
+import maya.api.OpenMaya as om
 
 from crab.vendor import qute
 
+# -- Numpy is not available in every maya distribution, so we fall back
+# -- to comparing the matrices in python when it is not
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
 
 # --------------------------------------------------------------------------------------
 class CheckPose(crab.Process):
 
     identifier = "APose Validation"
 
+    # -- The largest difference allowed between any element of a joints
+    # -- current matrix and its stored APose matrix
+    tolerance = om.MMatrix.kTolerance
+
+    # -- The number of failing joints to list, worst first
+    report_limit = 10
+
     def validate(self):
         """
         We want to check that the pose the rig is in is the same as the stored
@@ -16,22 +32,31 @@ class CheckPose(crab.Process):
         """
         print("running APose Validation")
 
-        failures = list()
-
-        for joint in pm.ls(crab.config.SKELETON + "*"):
-            if joint.hasAttr("APose"):
-                expected_matrix = joint.APose.get()
-                current_matrix = joint.getMatrix()
+        names, expected, current = self._matrices()
 
-                if not current_matrix.isEquivalent(expected_matrix):
-                    failures.append(joint)
+        failures = self._compare(names, expected, current)
 
         # -- If we have failures, lets call them out
         if failures:
 
-            # -- Print each failure
-            for failure in failures:
-                print("%s is not in its APose, your current pose might be lost" % failure.name())
+            # -- Print the worst failures along with how far out they are
+            print(
+                "%s joints are not in their APose, your current pose might be lost" % (
+                    len(failures),
+                )
+            )
+
+            for name, delta, distance in failures[:self.report_limit]:
+                print(
+                    "\t%s (largest difference : %s, translation difference : %s)" % (
+                        name,
+                        delta,
+                        distance,
+                    )
+                )
+
+            if len(failures) > self.report_limit:
+                print("\t... and %s more" % (len(failures) - self.report_limit))
 
             # -- If we are in batch mode then we return, we ignore this issue
             if pm.about(batch=True):
@@ -54,3 +79,105 @@ class CheckPose(crab.Process):
             print("\tNo failures found.")
 
         return True
+
+    # ----------------------------------------------------------------------------------
+    def _matrices(self):
+        """
+        Reads the stored APose matrix and the current local matrix of every
+        skeleton joint of the rig being built which has an APose. Joints
+        which are still driven by a control rig (such as the joints of the
+        components left in place by an incremental build) are not posed by
+        the build, so they are skipped.
+
+        :return: tuple(list(str, ...), list(float, ...), list(float, ...))
+            where the matrices are flattened one after another
+        """
+        names = list()
+        expected = list()
+        current = list()
+
+        skeleton_org = self.rig.skeleton_org()
+
+        if not skeleton_org:
+            return names, expected, current
+
+        selection = om.MSelectionList()
+        selection.add(skeleton_org.longName())
+
+        iterator = om.MItDag(om.MItDag.kDepthFirst, om.MFn.kJoint)
+        iterator.reset(selection.getDependNode(0), om.MItDag.kDepthFirst, om.MFn.kJoint)
+
+        while not iterator.isDone():
+            fn = om.MFnDependencyNode(iterator.currentItem())
+            iterator.next()
+
+            if not fn.name().split(":")[-1].startswith(crab.config.SKELETON):
+                continue
+
+            if not fn.hasAttribute("APose"):
+                continue
+
+            if not any(
+                crab.utils.access.writable(fn.findPlug(attribute + axis, False))
+                for attribute in ["translate", "rotate"]
+                for axis in "XYZ"
+            ):
+                continue
+
+            names.append(fn.name())
+            expected.extend(
+                om.MFnMatrixData(fn.findPlug("APose", False).asMObject()).matrix()
+            )
+            current.extend(
+                om.MFnMatrixData(fn.findPlug("matrix", False).asMObject()).matrix()
+            )
+
+        return names, expected, current
+
+    # ----------------------------------------------------------------------------------
+    def _compare(self, names, expected, current):
+        """
+        Compares the given matrices, returning the joints whose matrices
+        differ by more than the tolerance.
+
+        :return: list(tuple(name, largest difference, translation difference), ...)
+            ordered with the largest differences first
+        """
+        if not names:
+            return list()
+
+        if numpy is not None:
+            difference = numpy.abs(
+                numpy.array(current, dtype=numpy.float64).reshape(-1, 16)
+                - numpy.array(expected, dtype=numpy.float64).reshape(-1, 16)
+            )
+
+            deltas = difference.max(axis=1)
+            distances = numpy.linalg.norm(difference[:, 12:15], axis=1)
+
+            failing = numpy.nonzero(deltas > self.tolerance)[0]
+            failing = failing[numpy.argsort(-deltas[failing])]
+
+            return [
+                (names[idx], float(deltas[idx]), float(distances[idx]))
+                for idx in failing
+            ]
+
+        failures = list()
+
+        for idx, name in enumerate(names):
+            difference = [
+                abs(value - stored)
+                for value, stored in zip(
+                    current[idx * 16:(idx + 1) * 16],
+                    expected[idx * 16:(idx + 1) * 16],
+                )
+            ]
+
+            delta = max(difference)
+
+            if delta > self.tolerance:
+                distance = sum(value * value for value in difference[12:15]) ** 0.5
+                failures.append((name, delta, distance))
+
+        return sorted(failures, key=lambda failure: -failure[1])
@@ -12,14 +12,6 @@ def get_icon(name):
     )
 
 
-# --------------------------------------------------------------------------------------
-def get_namespace(node):
-    if ":" in node:
-        return ":".join(pm.selected()[0].name().split(":")[:-1])
-
-    return None
-
-
 # --------------------------------------------------------------------------------------
 class CopyPoseTool(crab.tools.AnimTool):
     """
@@ -31,13 +23,12 @@ class CopyPoseTool(crab.tools.AnimTool):
     display_name = "Pose : Copy"
     icon = get_icon("pose_store")
 
-    Pose = dict()
+    Pose = None
 
     def run(self, nodes=None):
         nodes = nodes or pm.selected()
 
-        for ctl in nodes:
-            CopyPoseTool.Pose[ctl.name().split(":")[-1]] = ctl.getMatrix()
+        CopyPoseTool.Pose = crab.utils.pose_library.Pose.capture("clipboard", nodes)
 
 
 # --------------------------------------------------------------------------------------
@@ -68,30 +59,279 @@ class PastePoseTool(crab.tools.AnimTool):
     def run(self, nodes=None):
         nodes = nodes or pm.selected()
 
-        selected_names = [
-            node.name()
-            for node in nodes
-        ]
+        if not nodes or not CopyPoseTool.Pose:
+            return
+
+        crab.utils.pose_library.apply(
+            CopyPoseTool.Pose,
+            namespace=nodes[0].namespace(),
+            controls=[
+                node.nodeName().split(":")[-1]
+                for node in nodes
+            ] if self.options.selection_only else None,
+        )
+
+
+# --------------------------------------------------------------------------------------
+class StoreLibraryPoseTool(crab.tools.AnimTool):
+    """
+    This will store the current pose of the selected character into its pose
+    library under the given name, replacing any pose with the same name.
+
+    If "Selection Only" is turned on, then only the selected controls are
+    stored.
+    """
+
+    identifier = "poses_library_store"
+    display_name = "Pose : Library : Store"
+    icon = get_icon("pose_store")
+
+    tooltips = dict(
+        pose_name="The name to store the pose under",
+        selection_only="If True only the selected controls are stored",
+    )
+
+    def __init__(self):
+        super(StoreLibraryPoseTool, self).__init__()
+
+        self.options.pose_name = "pose"
+        self.options.selection_only = False
+
+    def run(self, nodes=None):
+        nodes = nodes or pm.selected()
 
-        if not selected_names:
+        if not nodes:
             return
 
-        ns = get_namespace(selected_names[0])
+        library = crab.utils.pose_library.PoseLibrary.for_node(nodes[0])
 
-        for ctl, pose in CopyPoseTool.Pose.items():
+        if not self.options.selection_only:
+            nodes = crab.utils.access.controls(nodes[0].namespace())
 
-            # -- Add the namespace onto the ctl
-            resolved_name = ctl
-            if ns:
-                resolved_name = ns + ":" + ctl
+        library.store(self.options.pose_name, nodes)
+        library.save()
+
+
+# --------------------------------------------------------------------------------------
+class ApplyLibraryPoseTool(crab.tools.AnimTool):
+    """
+    This will apply a pose from the pose library of the selected character.
+
+    If "Selection Only" is turned on, then the pose will only be applied to
+    the selected controls. The weight allows the pose to be blended with the
+    current pose.
+    """
+
+    identifier = "poses_library_apply"
+    display_name = "Pose : Library : Apply"
+    icon = get_icon("pose_apply")
+
+    tooltips = dict(
+        pose_name="The name of the pose to apply",
+        selection_only="If True the pose is only applied to the selected controls",
+        weight="How much of the pose to apply, from 0 to 1",
+    )
+
+    def __init__(self):
+        super(ApplyLibraryPoseTool, self).__init__()
+
+        self.options.pose_name = "pose"
+        self.options.selection_only = False
+        self.options.weight = 1.0
+
+    def run(self, nodes=None):
+        nodes = nodes or pm.selected()
+
+        if not nodes:
+            return
+
+        library = crab.utils.pose_library.PoseLibrary.for_node(nodes[0])
+        pose = library.get(self.options.pose_name)
+
+        if not pose:
+            print(
+                "%s has no pose called %s" % (
+                    library.character,
+                    self.options.pose_name,
+                )
+            )
+            return
 
-            if not pm.objExists(resolved_name):
+        crab.utils.pose_library.apply(
+            pose,
+            namespace=nodes[0].namespace(),
+            controls=[
+                node.nodeName().split(":")[-1]
+                for node in nodes
+            ] if self.options.selection_only else None,
+            weight=self.options.weight,
+        )
+
+
+# --------------------------------------------------------------------------------------
+class BlendLibraryPosesTool(crab.tools.AnimTool):
+    """
+    This will blend the selected character towards a mix of poses from its
+    pose library. Translation and scale are blended linearly and rotations
+    are blended spherically, so large rotations do not pass through
+    unexpected orientations.
+
+    The poses and their weights are given as comma separated lists. If
+    "Selection Only" is turned on, then only the selected controls are
+    blended.
+
+    Running the tool again with different weights, without posing the
+    character in between, re-blends from the same starting pose rather than
+    blending on top of the previous result, and undo returns to that pose.
+    Interactive tools (such as sliders) can call blender() and blend() the
+    result as the weights change, committing the final weights when done.
+    """
+
+    identifier = "poses_library_blend"
+    display_name = "Pose : Library : Blend"
+    icon = get_icon("pose_apply")
+
+    tooltips = dict(
+        pose_names="Comma separated names of the poses to blend",
+        weights="Comma separated weight of each pose, from 0 to 1",
+        selection_only="If True only the selected controls are blended",
+    )
+
+    def __init__(self):
+        super(BlendLibraryPosesTool, self).__init__()
+
+        self.options.pose_names = "pose"
+        self.options.weights = "0.5"
+        self.options.selection_only = False
+
+    # -- The blender from the last run, along with the poses, namespace and
+    # -- controls it was created for
+    Blender = None
+    BlenderKey = None
+
+    def run(self, nodes=None):
+        nodes = nodes or pm.selected()
+
+        if not nodes:
+            return
+
+        blender, weights = self.blender(nodes)
+
+        if blender:
+            blender.commit(*weights)
+
+    def blender(self, nodes):
+        """
+        Returns the pose blender for the given nodes along with the weights
+        given in the options. The blender from the last run is reused if it
+        was made for the same poses and controls and the character has not
+        been posed since it was committed.
+
+        :param nodes: The nodes being blended
+        :type nodes: list(pm.nt.Transform, ...)
+
+        :return: tuple(PoseBlender or None, list(float, ...))
+        """
+        library = crab.utils.pose_library.PoseLibrary.for_node(nodes[0])
+
+        poses = list()
+        weights = list()
+
+        for pose_name, weight in zip(
+            self.options.pose_names.split(","),
+            self.options.weights.split(","),
+        ):
+            pose = library.get(pose_name.strip())
+
+            if not pose:
+                print("%s has no pose called %s" % (library.character, pose_name.strip()))
                 continue
 
-            if self.options.selection_only and ctl not in selected_names:
+            poses.append(pose)
+            weights.append(float(weight))
+
+        if not poses:
+            return None, weights
+
+        controls = [
+            node.nodeName().split(":")[-1]
+            for node in nodes
+        ] if self.options.selection_only else None
+
+        key = (
+            library.character,
+            nodes[0].namespace(),
+            tuple(pose.name for pose in poses),
+            tuple(controls) if controls else None,
+        )
+
+        if (
+            BlendLibraryPosesTool.BlenderKey != key
+            or not BlendLibraryPosesTool.Blender.is_current()
+        ):
+            BlendLibraryPosesTool.Blender = crab.utils.pose_library.PoseBlender(
+                poses,
+                namespace=nodes[0].namespace(),
+                controls=controls,
+            )
+            BlendLibraryPosesTool.BlenderKey = key
+
+        return BlendLibraryPosesTool.Blender, weights
+
+
+# --------------------------------------------------------------------------------------
+class MirrorPoseTool(crab.tools.AnimTool):
+    """
+    This will mirror the local translation and rotation of the selected
+    controls onto the controls on the opposite side. Middle controls are
+    mirrored onto themselves. Where both sides are selected the poses are
+    swapped.
+    """
+
+    identifier = "poses_mirror"
+    display_name = "Pose : Mirror"
+    icon = get_icon("pose_apply")
+
+    def run(self, nodes=None):
+        nodes = nodes or pm.selected()
+
+        # -- Read everything before we write anything, so that selecting
+        # -- both sides swaps them
+        mirrored = list()
+
+        for node in nodes:
+            opposite = crab.utils.access.opposite(node)
+            axes = crab.utils.access.mirror_axes(node)
+
+            if not opposite or not axes:
                 continue
 
-            pm.PyNode(resolved_name).setMatrix(pose)
+            translate_signs, rotate_signs = axes
+
+            mirrored.append(
+                (
+                    opposite,
+                    [
+                        value * sign
+                        for value, sign in zip(node.translate.get(), translate_signs)
+                    ],
+                    [
+                        value * sign
+                        for value, sign in zip(node.rotate.get(), rotate_signs)
+                    ],
+                )
+            )
+
+        # -- Set each channel individually so that locked channels do
+        # -- not prevent the others from being set
+        for opposite, translation, rotation in mirrored:
+            for attr, values in [("translate", translation), ("rotate", rotation)]:
+                for axis, value in zip("XYZ", values):
+                    try:
+                        opposite.attr(attr + axis).set(value)
+
+                    except (RuntimeError, pm.MayaAttributeError):
+                        pass
 
 
 # --------------------------------------------------------------------------------------
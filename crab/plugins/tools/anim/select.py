@@ -54,6 +54,15 @@ class SelectOppositeTool(crab.tools.AnimTool):
 
         for node in current_selection:
 
+            # -- Look the opposite up in the rigs mirror table
+            opposite = crab.utils.access.opposite(node)
+
+            if opposite:
+                nodes_to_select.append(opposite)
+                continue
+
+            # -- Rigs built before mirror tables were stored need the
+            # -- opposite to be found by name
             side = crab.config.get_side(node)
             opp = crab.config.MIDDLE
 
@@ -100,8 +109,7 @@ class ResetSelection(crab.tools.AnimTool):
 
         nodes = nodes or pm.selected()
 
-        for node in nodes:
-            self.reset_node(node)
+        crab.utils.access.reset(nodes)
 
         if self.options.KeyOnReset:
             pm.setKeyframe(nodes)
@@ -109,37 +117,7 @@ class ResetSelection(crab.tools.AnimTool):
     # --------------------------------------------------------------------------
     @classmethod
     def reset_node(cls, node):
-
-        for attr in node.listAttr(k=True):
-
-            attr_name = attr.name(includeNode=False)
-
-            if "scale" in attr_name:
-                value = 1.0
-
-            elif "translate" in attr_name or "rotate" in attr_name:
-                value = 0.0
-
-            else:
-                continue
-
-            try:
-                attr.set(value)
-            except:
-                pass
-
-        for attr in node.listAttr(k=True, ud=True):
-            value = pm.attributeQuery(
-                attr.name(includeNode=False),
-                node=node,
-                listDefault=True,
-            )
-
-            try:
-                attr.set(value)
-
-            except:
-                continue
+        crab.utils.access.reset([node])
 
 
 # --------------------------------------------------------------------------------------
@@ -173,8 +151,8 @@ class ResetCharacter(crab.tools.AnimTool):
 
         nodes = crab.utils.access.get_controls(current_only=True)
 
-        for node in nodes:
-            ResetSelection.reset_node(node)
+        # -- Reset the whole character in one go
+        crab.utils.access.reset(nodes)
 
         if self.options.KeyOnReset:
             pm.setKeyframe(nodes)
@@ -47,11 +47,12 @@ class SnapTool(crab.tools.AnimTool):
             if crab.config.CONTROL in n.name()
         ]
 
-        # -- Create a unique list of labels
-        labels = list()
+        # -- Create a unique list of labels. These are read from the snap
+        # -- registry rather than from the nodes themselves
+        labels = set()
         for node in results:
-            labels.extend(crab.utils.snap.labels(node))
-        labels = list(set(labels))
+            labels.update(crab.utils.snap.labels(node))
+        labels = sorted(labels)
 
         if not labels:
             return
@@ -59,6 +60,7 @@ class SnapTool(crab.tools.AnimTool):
         # -- Apply the snap.
         crab.utils.snap.snap_label(
             label=labels[0],
+            namespace=pm.selected()[0].namespace(),
             restrict_to=pm.selected() if self.options.SelectionOnly else None,
             start_time=int(
                 pm.playbackOptions(
@@ -1,7 +1,6 @@
 import crab
 from crab.vendor import qute
 import pymel.core as pm
-import json
 
 
 # --------------------------------------------------------------------------------------
@@ -26,7 +25,6 @@ class DefineAPoseTool(crab.RigTool):
 
         confirm_result = "Yes"
         if self.options.selection_only:
-            nodes = pm.selected()
             selection_state_text = "selected joints"
 
         else:
@@ -38,15 +36,14 @@ class DefineAPoseTool(crab.RigTool):
                 cancelButton="No",
                 dismissString="No"
             )
-            nodes = pm.ls("%s_*" % crab.config.SKELETON, type="joint", r=True)
-            nodes.extend(pm.ls("%s_*" % crab.config.GUIDE, type="transform", r=True))
 
         if confirm_result == "Yes":
-            with crab.utils.contexts.UndoChunk():
-                for joint in nodes:
-                    if not joint.hasAttr(self.POSE_NAME):
-                        joint.addAttr(self.POSE_NAME, at="matrix")
-                    joint.attr(self.POSE_NAME).set(joint.getMatrix())
+            crab.utils.skeleton_poses.define(
+                crab.utils.skeleton_poses.nodes(
+                    selection_only=self.options.selection_only,
+                ),
+                self.POSE_NAME,
+            )
             pm.displayInfo(
                 "Updated: {} on {}".format(
                     self.POSE_NAME,
@@ -103,34 +100,22 @@ class ApplyAPoseTool(crab.RigTool):
         selection_state_text = "all joints"
         rotation_only_text = ""
         if self.options.selection_only:
-            nodes = pm.selected()
             selection_state_text = "selected joints"
 
-        else:
-            nodes = pm.ls("%s_*" % crab.config.SKELETON, type="joint", r=True)
-            nodes.extend(pm.ls("%s_*" % crab.config.GUIDE, type="transform", r=True))
-
-        with crab.utils.contexts.UndoChunk():
-            for joint in nodes:
-                if joint.hasAttr(self.POSE_NAME):
-
-                    pos = None
-                    if self.options.rotate_only:
-                        pos = joint.getTranslation()
-                        rotation_only_text = "rotation only"
-
-                    rot = None
-                    if self.options.translate_only:
-                        rot = joint.getRotation()
-                        rotation_only_text = "translation only"
+        if self.options.rotate_only:
+            rotation_only_text = "rotation only"
 
-                    joint.setMatrix(joint.attr(self.POSE_NAME).get())
+        elif self.options.translate_only:
+            rotation_only_text = "translation only"
 
-                    if pos:
-                        joint.setTranslation(pos)
-
-                    if rot:
-                        joint.setRotation(rot)
+        crab.utils.skeleton_poses.apply(
+            crab.utils.skeleton_poses.nodes(
+                selection_only=self.options.selection_only,
+            ),
+            self.POSE_NAME,
+            rotate_only=self.options.rotate_only,
+            translate_only=self.options.translate_only,
+        )
 
         pm.displayInfo("Loaded: {} to {} {}".format(
             self.POSE_NAME,
@@ -176,41 +161,18 @@ class StoreATPoses(crab.RigTool):
                 save=True,
             )
 
-            if not save_path.lower().endswith(".json"):
-                save_path = save_path + ".json"
+            if save_path and not save_path.lower().endswith(
+                crab.utils.skeleton_poses.EXTENSION,
+            ):
+                save_path = save_path + crab.utils.skeleton_poses.EXTENSION
 
         if not save_path:
             return
 
-        data_to_save = dict()
-
-        for joint in pm.ls("SKL_*", type="joint"):
-
-            a_matrix = list()
-            t_matrix = list()
-
-            if joint.hasAttr("APose"):
-
-                for part in joint.attr("APose").get():
-                    a_matrix.extend(part)
-
-            if joint.hasAttr("TPose"):
-                for part in joint.attr("TPose").get():
-                    t_matrix.extend(part)
-
-            attr_data = dict(
-                APose=a_matrix,
-                TPose=t_matrix,
-            )
-            data_to_save[joint.name()] = attr_data
-
-        with open(save_path, "w") as f:
-            json.dump(
-                data_to_save,
-                f,
-                sort_keys=True,
-                indent=4,
-            )
+        crab.utils.skeleton_poses.save(
+            save_path,
+            crab.utils.skeleton_poses.nodes(),
+        )
 
 
 # --------------------------------------------------------------------------------------
@@ -238,21 +200,8 @@ class ReadATPoses(crab.RigTool):
         if not file_path:
             return
 
-        with open(file_path, "r") as f:
-            data = json.load(f)
-
-            for bone_name, poses in data.iteritems():
-
-                if not pm.objExists(bone_name):
-                    print("{} does not exist. Skipping.".format(bone_name))
-                    continue
-
-                bone = pm.PyNode(bone_name)
-
-                if poses["APose"] and bone.hasAttr("APose"):
-                    bone.APose.set(pm.dt.Matrix(poses["APose"]))
-
-                if poses["TPose"] and bone.hasAttr("TPose"):
-                    bone.TPose.set(pm.dt.Matrix(poses["TPose"]))
+        crab.utils.skeleton_poses.write(
+            crab.utils.skeleton_poses.load(file_path),
+        )
 
         return True
@@ -1,4 +1,5 @@
 import pymel.core as pm
+import maya.api.OpenMaya as om
 import crab
 
 
@@ -68,69 +69,14 @@ class ShapeMirrorXTool(crab.RigTool):
 
     # ----------------------------------------------------------------------------------
     def run(self):
-        if not pm.selected():
-            return
-
-        for source_node in pm.selected()[:]:
-
-            target_node = None
-
-            # -- Look for the object in the alternate side
-            try:
-                if crab.config.LEFT in source_node.name():
-                    target_node = pm.PyNode(
-                        source_node.name().replace(
-                            crab.config.LEFT,
-                            crab.config.RIGHT,
-                        )
-                    )
-
-                else:
-                    target_node = pm.PyNode(
-                        source_node.name().replace(
-                            crab.config.RIGHT,
-                            crab.config.LEFT,
-                        )
-                    )
-
-            except:
-                print("%s does not have an alternate side" % source_node)
-
-            # -- Read the shape data from the current side
-            shape_data = crab.utils.shapes.read(source_node)
-
-            # -- Clear the shapes on the other side
-            if target_node.getShapes():
-                pm.delete(target_node.getShapes())
-
-            # -- Apply the shapes to that side
-            crab.utils.shapes.apply(target_node, shape_data)
-
-            # -- Invert the shape globally
-            for source_shape, target_shape in zip(source_node.getShapes(), target_node.getShapes()):
-
-                for idx in range(source_shape.numCVs()):
-
-                    # -- Get the worldspace position of the current cv
-                    source_pos = source_shape.getCV(
-                        idx,
-                        space="world",
-                    )
-
-                    # -- Set the position of the cv with the X axis
-                    # -- inverted
-                    target_shape.setCV(
-                        idx,
-                        [
-                            source_pos[0] * -1,
-                            source_pos[1],
-                            source_pos[2],
-                        ],
-                        space="world",
-                    )
-
-                # -- Update teh curve to propagate the change
-                target_shape.updateCurve()
+        mirror_shapes(
+            pm.selected(),
+            [
+                -1.0,
+                1.0,
+                1.0,
+            ]
+        )
 
 
 # --------------------------------------------------------------------------------------
@@ -142,73 +88,14 @@ class ShapeMirrorYTool(crab.RigTool):
 
     # ----------------------------------------------------------------------------------
     def run(self):
-        if not pm.selected():
-            return
-
-        for source_node in pm.selected()[:]:
-
-            target_node = None
-
-            # -- Look for the object in the alternate side
-            try:
-                if crab.config.LEFT in source_node.name():
-                    target_node = pm.PyNode(
-                        source_node.name().replace(
-                            crab.config.LEFT,
-                            crab.config.RIGHT,
-                        )
-                    )
-
-                else:
-                    target_node = pm.PyNode(
-                        source_node.name().replace(
-                            crab.config.RIGHT,
-                            crab.config.LEFT,
-                        )
-                    )
-
-            except:
-                pass
-
-            if not target_node:
-                print("%s does not have an alternate side" % source_node)
-                continue
-
-            # -- Read the shape data from the current side
-            shape_data = crab.utils.shapes.read(source_node)
-
-            # -- Clear the shapes on the other side
-            if target_node.getShapes():
-                pm.delete(target_node.getShapes())
-
-            # -- Apply the shapes to that side
-            crab.utils.shapes.apply(target_node, shape_data)
-
-            # -- Invert the shape globally
-            for source_shape, target_shape in zip(source_node.getShapes(), target_node.getShapes()):
-
-                for idx in range(source_shape.numCVs()):
-
-                    # -- Get the worldspace position of the current cv
-                    source_pos = source_shape.getCV(
-                        idx,
-                        space="world",
-                    )
-
-                    # -- Set the position of the cv with the X axis
-                    # -- inverted
-                    target_shape.setCV(
-                        idx,
-                        [
-                            source_pos[0],
-                            source_pos[1] * -1,
-                            source_pos[2],
-                        ],
-                        space="world",
-                    )
-
-                # -- Update teh curve to propagate the change
-                target_shape.updateCurve()
+        mirror_shapes(
+            pm.selected(),
+            [
+                1.0,
+                -1.0,
+                1.0,
+            ]
+        )
 
 
 # --------------------------------------------------------------------------------------
@@ -220,69 +107,14 @@ class ShapeMirrorZTool(crab.RigTool):
 
     # ----------------------------------------------------------------------------------
     def run(self):
-        if not pm.selected():
-            return
-
-        for source_node in pm.selected()[:]:
-
-            target_node = None
-
-            # -- Look for the object in the alternate side
-            try:
-                if crab.config.LEFT in source_node.name():
-                    target_node = pm.PyNode(
-                        source_node.name().replace(
-                            crab.config.LEFT,
-                            crab.config.RIGHT,
-                        )
-                    )
-
-                else:
-                    target_node = pm.PyNode(
-                        source_node.name().replace(
-                            crab.config.RIGHT,
-                            crab.config.LEFT,
-                        )
-                    )
-
-            except:
-                print("%s does not have an alternate side" % source_node)
-
-            # -- Read the shape data from the current side
-            shape_data = crab.utils.shapes.read(source_node)
-
-            # -- Clear the shapes on the other side
-            if target_node.getShapes():
-                pm.delete(target_node.getShapes())
-
-            # -- Apply the shapes to that side
-            crab.utils.shapes.apply(target_node, shape_data)
-
-            # -- Invert the shape globally
-            for source_shape, target_shape in zip(source_node.getShapes(), target_node.getShapes()):
-
-                for idx in range(source_shape.numCVs()):
-
-                    # -- Get the worldspace position of the current cv
-                    source_pos = source_shape.getCV(
-                        idx,
-                        space="world",
-                    )
-
-                    # -- Set the position of the cv with the X axis
-                    # -- inverted
-                    target_shape.setCV(
-                        idx,
-                        [
-                            source_pos[0],
-                            source_pos[1],
-                            source_pos[2] * -1,
-                        ],
-                        space="world",
-                    )
-
-                # -- Update teh curve to propagate the change
-                target_shape.updateCurve()
+        mirror_shapes(
+            pm.selected(),
+            [
+                1.0,
+                1.0,
+                -1.0,
+            ]
+        )
 
 
 # --------------------------------------------------------------------------------------
@@ -323,13 +155,11 @@ class ShapeMirrorLeftToRightTool(crab.RigTool):
             pass
 
         else:
-            left_controls = pm.ls(
-                "%s_*_%s" % (
-                    crab.config.CONTROL,
-                    crab.config.LEFT,
-                ),
-                type="transform",
-            )
+            left_controls = [
+                control
+                for control in crab.utils.access.controls()
+                if crab.config.get_side(control.nodeName()) == crab.config.LEFT
+            ]
 
             pm.select(
                 [
@@ -344,28 +174,88 @@ class ShapeMirrorLeftToRightTool(crab.RigTool):
 
 
 # --------------------------------------------------------------------------------------
-def invert_shapes(nodes, inversion_axis):
+def mirror_shapes(nodes, inversion_axis):
+    """
+    Copies the shapes of each of the given nodes onto the node on the
+    alternate side, inverting them in worldspace across the given axis.
+
+    :param nodes: The nodes to mirror the shapes from
+    :type nodes: list(pm.nt.Transform, ...)
 
-    for node in nodes:
+    :param inversion_axis: The value to multiply each worldspace axis by
+    :type inversion_axis: list(float, float, float)
 
-        if isinstance(node, pm.nt.NurbsCurve):
-            invert_shape(node, inversion_axis)
+    :return: None
+    """
+    for source_node in nodes[:]:
+
+        # -- Look the alternate side up in the rigs mirror table
+        target_node = crab.utils.access.opposite(source_node)
+
+        # -- Look for the object in the alternate side by name if the
+        # -- rig does not have a mirror table
+        if not target_node:
+            target_node = _opposite_by_name(source_node)
+
+        if not target_node:
+            print("%s does not have an alternate side" % source_node)
             continue
 
-        for shape in node.getShapes():
-            invert_shape(shape, inversion_axis)
+        # -- Read the shape data from the current side
+        shape_data = crab.utils.shapes.read(source_node)
 
+        # -- Clear the shapes on the other side
+        if target_node.getShapes():
+            pm.delete(target_node.getShapes())
 
-# --------------------------------------------------------------------------------------
-def invert_shape(shape, inversion_axis):
-    for idx, pos in enumerate(shape.getCVs()):
+        # -- Apply the shapes to that side
+        crab.utils.shapes.apply(target_node, shape_data)
 
-        shape.setCV(
-            idx,
-            [
-                pos[0] * inversion_axis[0],
-                pos[1] * inversion_axis[1],
-                pos[2] * inversion_axis[2],
-            ],
+        # -- Invert the shape globally, reading all the cvs from the
+        # -- source side and writing them all to the target side
+        crab.utils.curves.transform(
+            source_node,
+            crab.utils.curves.scale_matrix(*inversion_axis),
+            space=om.MSpace.kWorld,
+            targets=target_node,
         )
-        shape.updateCurve()
+
+
+# --------------------------------------------------------------------------------------
+def _opposite_by_name(node):
+    """
+    Returns the node on the alternate side of the given node by swapping
+    the side element of its name, or None if the name has no side or there
+    is no node with the swapped name.
+
+    :param node: The node to find the alternate side of
+    :type node: pm.nt.Transform
+
+    :return: pm.nt.Transform or None
+    """
+    if crab.config.LEFT in node.name():
+        name = node.name().replace(crab.config.LEFT, crab.config.RIGHT)
+
+    elif crab.config.RIGHT in node.name():
+        name = node.name().replace(crab.config.RIGHT, crab.config.LEFT)
+
+    else:
+        return None
+
+    if not pm.objExists(name):
+        return None
+
+    return pm.PyNode(name)
+
+
+# --------------------------------------------------------------------------------------
+def invert_shapes(nodes, inversion_axis):
+    crab.utils.curves.transform(
+        nodes,
+        crab.utils.curves.scale_matrix(*inversion_axis),
+    )
+
+
+# --------------------------------------------------------------------------------------
+def invert_shape(shape, inversion_axis):
+    invert_shapes([shape], inversion_axis)
@@ -0,0 +1,62 @@
+"""
+Maya plugin providing the crabSetValues command, which is used by
+crab.utils.batch to set many plug values in a single undoable step. The
+command is not intended to be called directly.
+"""
+import maya.api.OpenMaya as om
+
+# -- Tell maya this plugin uses the python api 2.0
+maya_useNewAPI = True
+
+
+# --------------------------------------------------------------------------------------
+class SetValuesCommand(om.MPxCommand):
+    """
+    Sets the values queued through crab.utils.batch.set_values with a single
+    MDGModifier, which is undone and redone as a whole.
+    """
+
+    name = "crabSetValues"
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self):
+        super(SetValuesCommand, self).__init__()
+        self._modifier = None
+
+    # ----------------------------------------------------------------------------------
+    @staticmethod
+    def creator():
+        return SetValuesCommand()
+
+    # ----------------------------------------------------------------------------------
+    def isUndoable(self):
+        return True
+
+    # ----------------------------------------------------------------------------------
+    def doIt(self, args):
+        # -- Imported here as maya loads this file outside of the package
+        from crab.utils import batch
+
+        self._modifier = batch.modifier()
+        self.redoIt()
+
+    # ----------------------------------------------------------------------------------
+    def redoIt(self):
+        self._modifier.doIt()
+
+    # ----------------------------------------------------------------------------------
+    def undoIt(self):
+        self._modifier.undoIt()
+
+
+# --------------------------------------------------------------------------------------
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin).registerCommand(
+        SetValuesCommand.name,
+        SetValuesCommand.creator,
+    )
+
+
+# --------------------------------------------------------------------------------------
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(SetValuesCommand.name)
@@ -1,12 +1,36 @@
-from . import snap
-from . import maths
-from . import types
-from . import joints
-from . import shapes
-from . import access
-from . import skinning
-from . import organise
-from . import contexts
-from . import hierarchy
-from . import transform
-from . import resources
+import importlib
+
+# -- The utility modules are imported the first time they are accessed
+# -- rather than all being imported up front
+_SUBMODULES = [
+    "snap",
+    "maths",
+    "types",
+    "joints",
+    "curves",
+    "shapes",
+    "shape_packs",
+    "skeleton_poses",
+    "pose_library",
+    "access",
+    "batch",
+    "skinning",
+    "organise",
+    "contexts",
+    "hierarchy",
+    "transform",
+    "resources",
+]
+
+
+# --------------------------------------------------------------------------------------
+def __getattr__(name):
+    if name not in _SUBMODULES:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    return importlib.import_module("." + name, __name__)
+
+
+# --------------------------------------------------------------------------------------
+def __dir__():
+    return sorted(set(globals().keys()) | set(_SUBMODULES))
@@ -1,8 +1,47 @@
+import json
+
+import maya.cmds as mc
 import pymel.core as pm
+import maya.api.OpenMaya as om
 
+from . import batch
+from . import contexts
 from .. import config
 
 
+# -- namespace -> controls of the rigs within that namespace. This is None
+# -- until it is first needed
+_CONTROLS = None
+
+# -- All the controls of all the rigs in the scene
+_ALL_CONTROLS = None
+
+# -- namespace -> name -> (opposite name, translate signs, rotate signs) as
+# -- read from the mirror table stored on each rig
+_MIRRORS = None
+
+# -- namespace -> name -> list of [attribute, value] as read from the
+# -- defaults table stored on each rig
+_DEFAULTS = None
+
+# -- namespace -> name -> list of (om.MPlug, value), with the values in
+# -- internal units. The plugs are resolved the first time a control in the
+# -- namespace is reset
+_RESET_PLUGS = dict()
+
+# -- The numeric types which are set as whole numbers
+_INTEGER_TYPES = [
+    om.MFnNumericData.kByte,
+    om.MFnNumericData.kChar,
+    om.MFnNumericData.kShort,
+    om.MFnNumericData.kInt,
+    om.MFnNumericData.kLong,
+]
+
+# -- Ids of the scene callbacks which clear the index
+_CALLBACK_IDS = list()
+
+
 # --------------------------------------------------------------------------------------
 def get_controls(current_only=False):
     """
@@ -13,19 +52,427 @@ def get_controls(current_only=False):
 
     :return: List(pm.nt.Transform, ..)
     """
+    if not current_only:
+        return controls()
+
     ns = ""
-    recursive = True
-
-    if current_only:
-        recursive = False
-        if pm.selected() and ":" in pm.selected()[0]:
-            ns = ":".join(pm.selected()[0].name().split(":")[:-1]) + ":"
-
-    return [
-        ctl
-        for ctl in pm.ls("%s%s_*" % (ns, config.CONTROL), r=recursive, type="transform")
-        if not isinstance(ctl, pm.nt.Constraint)
-    ]
+
+    if pm.selected() and ":" in pm.selected()[0]:
+        ns = ":".join(pm.selected()[0].name().split(":")[:-1])
+
+    return controls(ns)
+
+
+# --------------------------------------------------------------------------------------
+def controls(namespace=None):
+    """
+    Returns the controls of all the rigs within the given namespace. The
+    controls are read from an index which is built the first time it is
+    needed, so this does not search the scene.
+
+    :param namespace: The namespace of the character to return the controls
+        for. An empty string is the root namespace. If None then the controls
+        of every character are returned.
+    :type namespace: str
+
+    :return: List(pm.nt.Transform, ..)
+    """
+    _build_index()
+
+    if namespace is None:
+        return list(_ALL_CONTROLS)
+
+    return list(_CONTROLS.get(namespace.strip(":"), list()))
+
+
+# --------------------------------------------------------------------------------------
+def namespaces():
+    """
+    Returns the namespaces which contain crab rigs
+
+    :return: List(str, ..)
+    """
+    _build_index()
+
+    return list(_CONTROLS.keys())
+
+
+# --------------------------------------------------------------------------------------
+def opposite(node):
+    """
+    Returns the node on the opposite side of the rig to the given node, as
+    recorded in the mirror table when the rig was built. Middle nodes are
+    their own opposite.
+
+    :param node: The control or joint to find the opposite of
+    :type node: pm.nt.Transform
+
+    :return: pm.nt.Transform or None
+    """
+    entry = _mirror_entry(node)
+
+    if not entry:
+        return None
+
+    # -- The table is written at build time, so if the rig is being
+    # -- edited the opposite control may not currently exist
+    try:
+        return pm.PyNode(node.namespace() + entry[0])
+
+    except pm.MayaNodeError:
+        return None
+
+
+# --------------------------------------------------------------------------------------
+def mirror_axes(node):
+    """
+    Returns the values each local translation and rotation axis of the given
+    node must be multiplied by to mirror them onto the opposite node.
+
+    :param node: The control or joint to get the mirror axes for
+    :type node: pm.nt.Transform
+
+    :return: tuple(list(float, float, float), list(float, float, float)) or
+        None if the node is not in a mirror table
+    """
+    entry = _mirror_entry(node)
+
+    if not entry:
+        return None
+
+    return list(entry[1]), list(entry[2])
+
+
+# --------------------------------------------------------------------------------------
+def _mirror_entry(node):
+    _build_index()
+
+    return _MIRRORS.get(node.namespace().strip(":"), dict()).get(
+        node.nodeName().split(":")[-1],
+    )
+
+
+# --------------------------------------------------------------------------------------
+def reset(nodes):
+    """
+    Resets the keyable attributes of the given nodes to their defaults.
+    Translation and rotation are set to zero, scale to one and user defined
+    attributes to their default value. The whole reset is undone in one go.
+
+    The controls of rigs with a defaults table (stored at build time) have
+    their plugs resolved once, and all their values are then set in a
+    single batched write (see crab.utils.batch). Channels which have been
+    locked or connected since the rig was built are skipped. Any other nodes
+    have their defaults read and set one attribute at a time.
+
+    :param nodes: The nodes to reset
+    :type nodes: list(pm.nt.Transform, ...)
+
+    :return: None
+    """
+    _build_index()
+
+    values = list()
+
+    with contexts.UndoChunk():
+        for node in nodes:
+            plugs = _reset_plugs(node)
+
+            if plugs is None:
+                _reset_node(node)
+                continue
+
+            values.extend(
+                (plug, value)
+                for plug, value in plugs
+                if writable(plug)
+            )
+
+        batch.set_values(values)
+
+
+# --------------------------------------------------------------------------------------
+def default_values(node):
+    """
+    Returns the values which the keyable, unlocked attributes of the given
+    node should be reset to. Attributes which are driven by anything other
+    than an animation curve are skipped.
+
+    :param node: The name of the node
+    :type node: str
+
+    :return: list([attribute, value], ...)
+    """
+    values = list()
+
+    user_defined = set(mc.listAttr(node, keyable=True, userDefined=True) or list())
+    attributes = mc.listAttr(node, keyable=True, unlocked=True, scalar=True)
+
+    for attribute in attributes or list():
+
+        plug = "%s.%s" % (node, attribute)
+        sources = mc.listConnections(plug, source=True, destination=False) or list()
+
+        if any(not mc.objectType(source, isAType="animCurve") for source in sources):
+            continue
+
+        # -- User defined attributes reset to their default
+        if attribute in user_defined:
+            default = mc.attributeQuery(attribute, node=node, listDefault=True)
+
+            if not default:
+                continue
+
+            values.append([attribute, default[0]])
+
+        elif "scale" in attribute:
+            values.append([attribute, 1.0])
+
+        elif "translate" in attribute or "rotate" in attribute:
+            values.append([attribute, 0.0])
+
+    return values
+
+
+# --------------------------------------------------------------------------------------
+def _reset_plugs(node):
+    """
+    Returns the plugs and values to reset the given node with, or None if
+    the node is not in a defaults table.
+    """
+    namespace = node.namespace().strip(":")
+    name = node.nodeName().split(":")[-1]
+
+    table = _DEFAULTS.get(namespace)
+
+    if not table or name not in table:
+        return None
+
+    resolved = _RESET_PLUGS.setdefault(namespace, dict())
+
+    if name not in resolved:
+        plugs = list()
+
+        for attribute, value in table[name]:
+            selection = om.MSelectionList()
+
+            try:
+                selection.add("%s.%s" % (node.longName(), attribute))
+
+            except RuntimeError:
+                continue
+
+            plugs.append(_internal_value(selection.getPlug(0), value))
+
+        resolved[name] = plugs
+
+    return resolved[name]
+
+
+# --------------------------------------------------------------------------------------
+def _internal_value(plug, value):
+    """
+    The defaults are held in ui units, but the plugs are set in internal
+    units, with bool, int and enum attributes set as such.
+
+    :return: tuple(om.MPlug, value)
+    """
+    attribute = plug.attribute()
+
+    if attribute.hasFn(om.MFn.kUnitAttribute):
+        unit_type = om.MFnUnitAttribute(attribute).unitType()
+
+        if unit_type == om.MFnUnitAttribute.kAngle:
+            value = om.MAngle(value, om.MAngle.uiUnit()).asRadians()
+
+        elif unit_type == om.MFnUnitAttribute.kDistance:
+            value = om.MDistance(value, om.MDistance.uiUnit()).asCentimeters()
+
+    elif attribute.hasFn(om.MFn.kNumericAttribute) and (
+        om.MFnNumericAttribute(attribute).numericType() == om.MFnNumericData.kBoolean
+    ):
+        value = bool(value)
+
+    elif _is_integer(attribute):
+        value = int(round(value))
+
+    return plug, value
+
+
+# --------------------------------------------------------------------------------------
+def _is_integer(attribute):
+    """
+    Returns True if the given attribute holds whole numbers, such as bool,
+    int and enum attributes
+    """
+    if attribute.hasFn(om.MFn.kEnumAttribute):
+        return True
+
+    if attribute.hasFn(om.MFn.kNumericAttribute):
+        return om.MFnNumericAttribute(attribute).numericType() in _INTEGER_TYPES
+
+    return False
+
+
+# --------------------------------------------------------------------------------------
+def writable(plug):
+    """
+    Returns True if the given plug can be set by the anim tools, being
+    unlocked and not driven by anything other than an animation curve.
+    Channels may be locked or constrained at any time, so this should be
+    checked at the time the value is set.
+
+    :param plug: The plug to check
+    :type plug: om.MPlug
+
+    :return: bool
+    """
+    if plug.isLocked:
+        return False
+
+    if plug.isDestination and not plug.source().node().hasFn(om.MFn.kAnimCurve):
+        return False
+
+    return True
+
+
+# --------------------------------------------------------------------------------------
+def _reset_node(node):
+    """
+    Resets the given node one attribute at a time. This is used for nodes
+    which are not in a defaults table.
+    """
+    for attribute, value in default_values(node.longName()):
+        try:
+            node.attr(attribute).set(value)
+
+        except (RuntimeError, pm.MayaAttributeError):
+            pass
+
+
+# --------------------------------------------------------------------------------------
+def invalidate_controls():
+    """
+    Clears the control index. This is done automatically whenever a scene is
+    opened, a reference is loaded or unloaded and whenever a rig is built or
+    edited. If you add or remove controls outside of crab you should call
+    this yourself.
+
+    :return: None
+    """
+    global _CONTROLS
+    global _ALL_CONTROLS
+    global _MIRRORS
+    global _DEFAULTS
+
+    _CONTROLS = None
+    _ALL_CONTROLS = None
+    _MIRRORS = None
+    _DEFAULTS = None
+    _RESET_PLUGS.clear()
+
+
+# --------------------------------------------------------------------------------------
+def _build_index():
+    """
+    Builds the control index from the control org of every rig in the scene
+    if it is not already built (or any of its controls have been deleted).
+    The mirror tables of the rigs are read at the same time.
+
+    :return: None
+    """
+    global _CONTROLS
+    global _ALL_CONTROLS
+    global _MIRRORS
+    global _DEFAULTS
+
+    _register_callbacks()
+
+    # -- If the first control has been deleted then the rig has been
+    # -- altered outside of crab and the index is stale
+    if _ALL_CONTROLS is not None:
+        if not _ALL_CONTROLS or _ALL_CONTROLS[0].exists():
+            return
+
+    # -- Imported here as the rig module depends on the utils
+    from ..core.rig import Rig
+
+    _CONTROLS = dict()
+    _ALL_CONTROLS = list()
+    _MIRRORS = dict()
+    _DEFAULTS = dict()
+    _RESET_PLUGS.clear()
+
+    tag = "%s_" % config.CONTROL
+
+    for rig in Rig.all():
+        control_org = rig.control_org()
+
+        if not control_org:
+            continue
+
+        namespace = rig.node().namespace().strip(":")
+
+        rig_controls = [
+            ctl
+            for ctl in control_org.getChildren(ad=True, type="transform")
+            if ctl.name().split(":")[-1].startswith(tag)
+            and not isinstance(ctl, pm.nt.Constraint)
+        ]
+
+        _CONTROLS.setdefault(namespace, list()).extend(rig_controls)
+        _ALL_CONTROLS.extend(rig_controls)
+
+        # -- Rigs built before defaults tables were introduced will not
+        # -- have one
+        if rig.meta().hasAttr(config.DEFAULTS_TABLE_ATTR):
+            table = json.loads(rig.meta().attr(config.DEFAULTS_TABLE_ATTR).get() or "{}")
+            _DEFAULTS.setdefault(namespace, dict()).update(table.get("controls", dict()))
+
+        # -- Likewise for mirror tables
+        if not rig.meta().hasAttr(config.MIRROR_TABLE_ATTR):
+            continue
+
+        table = json.loads(rig.meta().attr(config.MIRROR_TABLE_ATTR).get() or "{}")
+        mirrors = _MIRRORS.setdefault(namespace, dict())
+
+        for name, opposite_name, signs in table.get("pairs", list()):
+            mirrors[name] = (
+                opposite_name,
+                tuple(signs),
+                tuple(-sign for sign in signs),
+            )
+
+
+# --------------------------------------------------------------------------------------
+# noinspection PyUnusedLocal
+def _scene_changed(*args):
+    invalidate_controls()
+
+
+# --------------------------------------------------------------------------------------
+def _register_callbacks():
+    """
+    Registers the scene callbacks which clear the control index. This is
+    only done once per session.
+
+    :return: None
+    """
+    if _CALLBACK_IDS:
+        return
+
+    for message in [
+        om.MSceneMessage.kAfterNew,
+        om.MSceneMessage.kAfterOpen,
+        om.MSceneMessage.kAfterCreateReference,
+        om.MSceneMessage.kAfterRemoveReference,
+        om.MSceneMessage.kAfterLoadReference,
+        om.MSceneMessage.kAfterUnloadReference,
+        om.MSceneMessage.kAfterImport,
+    ]:
+        _CALLBACK_IDS.append(
+            om.MSceneMessage.addCallback(message, _scene_changed),
+        )
 
 
 # --------------------------------------------------------------------------------------
@@ -0,0 +1,85 @@
+"""
+Sets the values of many plugs in a single undoable step. The values are
+written with one MDGModifier through the crabSetValues command (provided by
+the plugin in crab/resources/plugins), so the whole write is added to the
+undo queue as one item and is undone and redone as a whole.
+
+..code-block:: python
+
+    >>> import crab
+    >>>
+    >>> crab.utils.batch.set_values([(plug, 0.0) for plug in plugs])
+"""
+import os
+
+import maya.cmds as mc
+import maya.api.OpenMaya as om
+
+
+# -- The name of the command and the plugin which provides it
+COMMAND = "crabSetValues"
+
+_PLUGIN_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "resources",
+    "plugins",
+    "%s.py" % COMMAND,
+)
+
+# -- The values waiting to be picked up by the command
+_PENDING = list()
+
+
+# --------------------------------------------------------------------------------------
+def set_values(values):
+    """
+    Sets the given plug values in a single undoable step. Bool values are
+    set as bools, int values as ints and anything else as a double.
+
+    :param values: List of (plug, value) pairs, with the values given in
+        internal units
+    :type values: list(tuple(om.MPlug, float or int or bool), ...)
+
+    :return: None
+    """
+    if not values:
+        return
+
+    _load_plugin()
+
+    _PENDING[:] = list(values)
+
+    try:
+        getattr(mc, COMMAND)()
+
+    finally:
+        del _PENDING[:]
+
+
+# --------------------------------------------------------------------------------------
+def modifier():
+    """
+    Returns a modifier which sets the values passed to set_values. This is
+    called by the crabSetValues command.
+
+    :return: om.MDGModifier
+    """
+    result = om.MDGModifier()
+
+    for plug, value in _PENDING:
+        if isinstance(value, bool):
+            result.newPlugValueBool(plug, value)
+
+        elif isinstance(value, int):
+            result.newPlugValueInt(plug, value)
+
+        else:
+            result.newPlugValueDouble(plug, float(value))
+
+    return result
+
+
+# --------------------------------------------------------------------------------------
+def _load_plugin():
+    if not mc.pluginInfo(COMMAND, query=True, loaded=True):
+        mc.loadPlugin(_PLUGIN_PATH, quiet=True)
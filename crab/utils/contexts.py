@@ -1,4 +1,5 @@
 import pymel.core as pm
+import maya.api.OpenMaya as om
 
 
 # --------------------------------------------------------------------------------------
@@ -62,3 +63,72 @@ class RestoredSelection(object):
     def __exit__(self, *exc_info):
         if self._selection:
             pm.select(self._selection)
+
+
+# --------------------------------------------------------------------------------------
+class TrackedNodes(object):
+    """
+    Records every dag node created whilst the context is active. This uses
+    a node added callback, so the cost is proportional to the number of
+    nodes created rather than the size of the scene.
+
+    Node names are resolved on exit, so nodes which are renamed after
+    creation are reported by their final name and nodes which are deleted
+    before exiting are not reported at all.
+
+    ..code-block:: python
+
+        >>> with TrackedNodes() as tracker:
+        ...     pm.createNode("transform")
+        >>>
+        >>> print(tracker.names())
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, node_type="dagNode"):
+        self._node_type = node_type
+        self._handles = list()
+        self._callback_id = None
+
+    # ----------------------------------------------------------------------------------
+    def __enter__(self):
+        self._handles = list()
+        self._callback_id = om.MDGMessage.addNodeAddedCallback(
+            self._node_added,
+            self._node_type,
+        )
+        return self
+
+    # ----------------------------------------------------------------------------------
+    def __exit__(self, *exc_info):
+        if self._callback_id is not None:
+            om.MMessage.removeCallback(self._callback_id)
+            self._callback_id = None
+
+    # ----------------------------------------------------------------------------------
+    def _node_added(self, node, *args):
+        self._handles.append(om.MObjectHandle(node))
+
+    # ----------------------------------------------------------------------------------
+    def names(self):
+        """
+        Returns the unique names of all the tracked nodes which still exist,
+        in the order they were created.
+
+        :return: list(str, str, ...)
+        """
+        names = list()
+
+        for handle in self._handles:
+            if not handle.isValid():
+                continue
+
+            node = handle.object()
+
+            if node.hasFn(om.MFn.kDagNode):
+                names.append(om.MFnDagNode(node).partialPathName())
+
+            else:
+                names.append(om.MFnDependencyNode(node).name())
+
+        return names
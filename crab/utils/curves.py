@@ -0,0 +1,264 @@
+"""
+Batched access to nurbs curve geometry. Rather than reading and writing
+cvs one at a time, the cvs of every curve are read with a single api call
+per curve, transformed together and written back with a single setAttr
+call per curve, so the changes can be undone.
+
+Where numpy is available the positions are held as a single (n, 3) array
+covering all the curves, otherwise they are held as a list of om.MPoint.
+"""
+import maya.cmds as mc
+import maya.api.OpenMaya as om
+import pymel.core as pm
+
+# -- Numpy is not available in every maya distribution, so we fall back
+# -- to transforming the points through the maya api when it is not
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+
+# --------------------------------------------------------------------------------------
+def curves(nodes):
+    """
+    Returns all the nurbs curves under the given nodes. The nodes may be
+    transforms or curve shapes.
+
+    :param nodes: Nodes to collect the curves from
+    :type nodes: list(pm.nt.DagNode, ...) or pm.nt.DagNode
+
+    :return: list(pm.nt.NurbsCurve, ...)
+    """
+    if not isinstance(nodes, (list, tuple)):
+        nodes = [nodes]
+
+    result = list()
+
+    for node in nodes:
+        if isinstance(node, pm.nt.Transform):
+            candidates = node.getShapes()
+
+        else:
+            candidates = [node]
+
+        for candidate in candidates:
+            if isinstance(candidate, pm.nt.NurbsCurve) and candidate not in result:
+                result.append(candidate)
+
+    return result
+
+
+# --------------------------------------------------------------------------------------
+def read(curve_nodes, space=om.MSpace.kObject):
+    """
+    Reads the cv positions of all the given curves.
+
+    :param curve_nodes: The curves to read
+    :type curve_nodes: list(pm.nt.NurbsCurve, ...)
+
+    :param space: The space to read the positions in
+    :type space: om.MSpace
+
+    :return: tuple(positions, counts) where positions holds the cvs of every
+        curve one after another and counts holds the number of cvs of each
+        curve.
+    """
+    positions = list()
+    counts = list()
+
+    for curve in curve_nodes:
+        points = _fn(curve).cvPositions(space)
+
+        counts.append(len(points))
+        positions.extend(points)
+
+    if numpy is not None:
+        positions = numpy.array(
+            [(point.x, point.y, point.z) for point in positions],
+            dtype=numpy.float64,
+        ).reshape(-1, 3)
+
+    return positions, counts
+
+
+# --------------------------------------------------------------------------------------
+def write(curve_nodes, positions, counts, space=om.MSpace.kObject):
+    """
+    Writes the given positions (as returned by read) back to the curves,
+    setting all the cvs of each curve with a single setAttr call so that
+    the write is added to the undo queue.
+
+    :param curve_nodes: The curves to write to
+    :type curve_nodes: list(pm.nt.NurbsCurve, ...)
+
+    :param positions: The positions of all the cvs of all the curves
+    :type positions: numpy.ndarray or list(om.MPoint or list(float, ...), ...)
+
+    :param counts: The number of cvs of each curve
+    :type counts: list(int, int, ...)
+
+    :param space: The space to write the positions in
+    :type space: om.MSpace
+
+    :return: None
+    """
+    # -- setAttr expects the positions in ui units
+    to_ui = om.MDistance(1.0).asUnits(om.MDistance.uiUnit())
+
+    start = 0
+
+    for curve, count in zip(curve_nodes, counts):
+        block = positions[start:start + count]
+        start += count
+
+        if not count:
+            continue
+
+        # -- The cv attributes are held in object space, so world space
+        # -- positions are taken back into the space of the curve
+        if space == om.MSpace.kWorld:
+            inverse = _fn(curve).dagPath().inclusiveMatrixInverse()
+
+        else:
+            inverse = None
+
+        if numpy is not None:
+            block = numpy.asarray(block, dtype=numpy.float64)[:, :3]
+
+            if inverse is not None:
+                matrix = numpy.array(list(inverse), dtype=numpy.float64).reshape(4, 4)
+                block = block.dot(matrix[:3, :3]) + matrix[3, :3]
+
+            values = (block * to_ui).flatten().tolist()
+
+        else:
+            values = list()
+
+            for position in block:
+                point = om.MPoint(*position)
+
+                if inverse is not None:
+                    point = point * inverse
+
+                values.extend([point.x * to_ui, point.y * to_ui, point.z * to_ui])
+
+        mc.setAttr(
+            "%s.cv[0:%s]" % (curve.longName(), count - 1),
+            *values
+        )
+
+
+# --------------------------------------------------------------------------------------
+def transform(nodes, matrix, pivot=None, space=om.MSpace.kObject, targets=None):
+    """
+    Transforms all the cvs of all the curves under the given nodes by the
+    given matrix.
+
+    :param nodes: The nodes whose curves should be transformed
+    :type nodes: list(pm.nt.DagNode, ...) or pm.nt.DagNode
+
+    :param matrix: The matrix to transform the cvs by
+    :type matrix: om.MMatrix
+
+    :param pivot: Optional point to transform the cvs around
+    :type pivot: om.MPoint or pm.dt.Vector
+
+    :param space: The space the cvs are transformed in
+    :type space: om.MSpace
+
+    :param targets: Optional nodes to write the transformed cvs to instead
+        of the given nodes. Their curves must have the same cv counts.
+    :type targets: list(pm.nt.DagNode, ...) or pm.nt.DagNode
+
+    :return: None
+    """
+    source_curves = curves(nodes)
+    target_curves = curves(targets) if targets is not None else source_curves
+
+    if not source_curves:
+        return
+
+    if pivot is not None:
+        pivot = om.MVector(pivot[0], pivot[1], pivot[2])
+
+        to_pivot = om.MTransformationMatrix()
+        to_pivot.setTranslation(-pivot, om.MSpace.kTransform)
+
+        from_pivot = om.MTransformationMatrix()
+        from_pivot.setTranslation(pivot, om.MSpace.kTransform)
+
+        matrix = to_pivot.asMatrix() * matrix * from_pivot.asMatrix()
+
+    positions, counts = read(source_curves, space=space)
+
+    if numpy is not None:
+        matrix = numpy.array(list(matrix), dtype=numpy.float64).reshape(4, 4)
+
+        # -- Maya matrices act on row vectors, so the points are multiplied
+        # -- on the left
+        positions = positions.dot(matrix[:3, :3]) + matrix[3, :3]
+
+    else:
+        positions = [point * matrix for point in positions]
+
+    write(target_curves, positions, counts, space=space)
+
+
+# --------------------------------------------------------------------------------------
+def rotation_matrix(x=0.0, y=0.0, z=0.0):
+    """
+    Returns a matrix rotating by the given euler values
+
+    :param x: Rotation around the x axis in degrees
+    :type x: float
+
+    :param y: Rotation around the y axis in degrees
+    :type y: float
+
+    :param z: Rotation around the z axis in degrees
+    :type z: float
+
+    :return: om.MMatrix
+    """
+    return om.MEulerRotation(
+        om.MAngle(x, om.MAngle.kDegrees).asRadians(),
+        om.MAngle(y, om.MAngle.kDegrees).asRadians(),
+        om.MAngle(z, om.MAngle.kDegrees).asRadians(),
+    ).asMatrix()
+
+
+# --------------------------------------------------------------------------------------
+def scale_matrix(x=1.0, y=1.0, z=1.0):
+    """
+    Returns a matrix scaling by the given values. Negative values can be
+    given to mirror across an axis.
+
+    :param x: Scale along the x axis
+    :type x: float
+
+    :param y: Scale along the y axis
+    :type y: float
+
+    :param z: Scale along the z axis
+    :type z: float
+
+    :return: om.MMatrix
+    """
+    return om.MMatrix(
+        [
+            x, 0.0, 0.0, 0.0,
+            0.0, y, 0.0, 0.0,
+            0.0, 0.0, z, 0.0,
+            0.0, 0.0, 0.0, 1.0,
+        ]
+    )
+
+
+# --------------------------------------------------------------------------------------
+def _fn(curve):
+    selection = om.MSelectionList()
+    selection.add(curve.longName())
+
+    return om.MFnNurbsCurve(selection.getDagPath(0))
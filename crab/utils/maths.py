@@ -185,6 +185,43 @@ def get_likely_mirror_plane(node):
         return "XZ"
 
 
+# --------------------------------------------------------------------------------------
+def mirror_signs(matrix, opposite_matrix):
+    """
+    Given the world matrices of two nodes which mirror each other across
+    the YZ plane, this returns the value each local translation axis must
+    be multiplied by to mirror a local translation from one to the other.
+
+    Rotations are axial, so the rotation about each local axis mirrors
+    with the opposite sign to its translation.
+
+    :param matrix: World matrix of the first node as 16 floats
+    :type matrix: list(float, ...)
+
+    :param opposite_matrix: World matrix of the opposite node as 16 floats
+    :type opposite_matrix: list(float, ...)
+
+    :return: list(float, float, float)
+    """
+    signs = list()
+
+    for idx in range(3):
+        axis = matrix[idx * 4:idx * 4 + 3]
+        opposite_axis = opposite_matrix[idx * 4:idx * 4 + 3]
+
+        # -- Reflect the axis across the YZ plane and see whether it points
+        # -- along or against the same axis on the opposite node
+        dot = (
+            -axis[0] * opposite_axis[0]
+            + axis[1] * opposite_axis[1]
+            + axis[2] * opposite_axis[2]
+        )
+
+        signs.append(1.0 if dot >= 0 else -1.0)
+
+    return signs
+
+
 # --------------------------------------------------------------------------------------
 def distance_between(node_a, node_b):
     """
@@ -0,0 +1,896 @@
+"""
+The pose library stores animation poses on disk, with one file per
+character. Each file holds a table of control names along with the channel
+values of every pose as a packed block of float32 values, followed by a json
+index describing which controls each pose holds and where its values sit.
+
+Poses are applied by resolving the control names to plugs once per
+namespace and then setting the values a compound attribute at a time,
+within a single undo chunk. Poses can be applied to a subset of controls
+and can be blended with the current pose.
+
+For interactive blending (such as from a slider) the PoseBlender resolves
+everything up front, so that each update only interpolates the stored
+arrays and writes the results. The final blend is then committed through
+the undo queue.
+
+..code-block:: python
+
+    >>> import crab
+    >>> import pymel.core as pm
+    >>>
+    >>> library = crab.utils.pose_library.PoseLibrary.for_node(pm.selected()[0])
+    >>> library.store("idle", crab.utils.access.get_controls(current_only=True))
+    >>> library.save()
+    >>>
+    >>> crab.utils.pose_library.apply(library.get("idle"), namespace="hero", weight=0.5)
+"""
+import os
+import sys
+import json
+import array
+import struct
+
+import maya.cmds as mc
+import maya.api.OpenMaya as om
+
+from . import access
+from . import contexts
+from .. import config
+from .. import constants
+
+# -- Numpy is not available in every maya distribution, so the pose blender
+# -- falls back to blending through the maya api when it is not
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+
+# -- The channels stored for every control, in the order they are stored
+CHANNELS = [
+    "translateX",
+    "translateY",
+    "translateZ",
+    "rotateX",
+    "rotateY",
+    "rotateZ",
+    "scaleX",
+    "scaleY",
+    "scaleZ",
+]
+
+EXTENSION = ".crabposes"
+
+_MAGIC = b"CRABPOS1"
+_VERSION = 1
+
+# -- magic, version, index offset, index length
+_HEADER = struct.Struct("<8sIQQ")
+
+# -- (namespace, control name) -> (om.MObjectHandle of the control, list of
+# -- om.MPlug for each channel)
+_HANDLES = dict()
+
+# -- The compound attributes the channels are set through, along with the
+# -- index of their first channel
+_COMPOUNDS = [
+    (0, "translate"),
+    (3, "rotate"),
+    (6, "scale"),
+]
+
+
+# --------------------------------------------------------------------------------------
+class Pose(object):
+    """
+    A pose holds the channel values (in internal units) of a set of
+    controls. The controls are held by name without any namespace so the
+    pose can be applied to any instance of the character.
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, name, controls, values):
+        self.name = name
+
+        # -- The names of the controls in the pose
+        self.controls = list(controls)
+
+        # -- The channel values of every control, one after another
+        self.values = array.array("f", values)
+
+    # ----------------------------------------------------------------------------------
+    def control_values(self, control):
+        """
+        Returns the channel values for the given control
+
+        :param control: Name of the control (without a namespace)
+        :type control: str
+
+        :return: list(float, ...) or None
+        """
+        try:
+            idx = self.controls.index(control)
+
+        except ValueError:
+            return None
+
+        start = idx * len(CHANNELS)
+
+        return list(self.values[start:start + len(CHANNELS)])
+
+    # ----------------------------------------------------------------------------------
+    @classmethod
+    def capture(cls, name, nodes):
+        """
+        Creates a pose from the current channel values of the given nodes
+
+        :param name: The name to give the pose
+        :type name: str
+
+        :param nodes: The controls to store in the pose
+        :type nodes: list(pm.nt.Transform, ...)
+
+        :return: Pose
+        """
+        controls = list()
+        values = list()
+
+        for node in nodes:
+            selection = om.MSelectionList()
+            selection.add(node.longName())
+
+            fn = om.MFnDependencyNode(selection.getDependNode(0))
+
+            controls.append(node.nodeName().split(":")[-1])
+            values.extend(
+                fn.findPlug(channel, False).asDouble()
+                for channel in CHANNELS
+            )
+
+        return Pose(name, controls, values)
+
+
+# --------------------------------------------------------------------------------------
+class PoseLibrary(object):
+    """
+    Gives access to the poses stored for a single character. The poses are
+    read from the characters file when first requested and are only written
+    back when save() is called.
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, character, directory=None):
+        self.character = character
+        self.directory = directory or library_directory()
+
+        self._poses = None
+
+    # ----------------------------------------------------------------------------------
+    @classmethod
+    def for_node(cls, node, directory=None):
+        """
+        Returns the pose library for the character which the given node
+        belongs to. The character is named after the description of the rig
+        root, so all instances of a rig share the same library.
+
+        :param node: Any node within the rig
+        :type node: pm.nt.DagNode
+
+        :param directory: Optional directory to read and write the library
+            files from
+        :type directory: str
+
+        :return: PoseLibrary
+        """
+        return cls(character_name(node), directory=directory)
+
+    # ----------------------------------------------------------------------------------
+    def filepath(self):
+        """
+        Returns the path of the file holding the poses for this character
+
+        :return: str
+        """
+        return os.path.join(self.directory, self.character + EXTENSION)
+
+    # ----------------------------------------------------------------------------------
+    def names(self):
+        """
+        Returns the names of all the poses in the library
+
+        :return: list(str, ...)
+        """
+        return list(self._load().keys())
+
+    # ----------------------------------------------------------------------------------
+    def get(self, name):
+        """
+        Returns the pose with the given name
+
+        :param name: Name of the pose
+        :type name: str
+
+        :return: Pose or None
+        """
+        return self._load().get(name)
+
+    # ----------------------------------------------------------------------------------
+    def store(self, name, nodes):
+        """
+        Captures the current pose of the given nodes into the library under
+        the given name, replacing any pose which already has that name.
+
+        :param name: Name of the pose
+        :type name: str
+
+        :param nodes: The controls to store
+        :type nodes: list(pm.nt.Transform, ...)
+
+        :return: Pose
+        """
+        pose = Pose.capture(name, nodes)
+        self._load()[name] = pose
+
+        return pose
+
+    # ----------------------------------------------------------------------------------
+    def remove(self, name):
+        """
+        Removes the pose with the given name from the library
+
+        :param name: Name of the pose
+        :type name: str
+
+        :return: True if a pose was removed
+        """
+        return self._load().pop(name, None) is not None
+
+    # ----------------------------------------------------------------------------------
+    def save(self):
+        """
+        Writes all the poses in the library to the characters file
+
+        :return: None
+        """
+        poses = self._load()
+
+        # -- Every pose shares a single table of control names
+        names = list()
+        name_indices = dict()
+
+        values = array.array("f")
+        index = list()
+
+        for pose in poses.values():
+            for control in pose.controls:
+                if control not in name_indices:
+                    name_indices[control] = len(names)
+                    names.append(control)
+
+            index.append(
+                dict(
+                    name=pose.name,
+                    offset=len(values),
+                    controls=[name_indices[control] for control in pose.controls],
+                ),
+            )
+            values.extend(pose.values)
+
+        # -- The float block is always stored little endian
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        value_bytes = values.tobytes()
+        index_bytes = json.dumps(
+            dict(
+                channels=CHANNELS,
+                controls=names,
+                poses=index,
+            ),
+        ).encode("utf-8")
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        # -- Write to a temporary file first so that a failure part way
+        # -- through does not lose the existing poses
+        temp_path = self.filepath() + ".tmp"
+
+        with open(temp_path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    _VERSION,
+                    _HEADER.size + len(value_bytes),
+                    len(index_bytes),
+                ),
+            )
+            f.write(value_bytes)
+            f.write(index_bytes)
+
+        os.replace(temp_path, self.filepath())
+
+    # ----------------------------------------------------------------------------------
+    def _load(self):
+        """
+        Reads the poses from the characters file if they have not already
+        been read.
+
+        :return: dict
+        """
+        if self._poses is not None:
+            return self._poses
+
+        self._poses = dict()
+
+        if not os.path.exists(self.filepath()):
+            return self._poses
+
+        with open(self.filepath(), "rb") as f:
+            data = f.read()
+
+        magic, version, index_offset, index_length = _HEADER.unpack_from(data, 0)
+
+        if magic != _MAGIC or version != _VERSION:
+            constants.log.warning("%s is not a valid pose library" % self.filepath())
+            return self._poses
+
+        index = json.loads(
+            data[index_offset:index_offset + index_length].decode("utf-8"),
+        )
+
+        values = array.array("f")
+        values.frombytes(data[_HEADER.size:index_offset])
+
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        stride = len(index["channels"])
+
+        for entry in index["poses"]:
+            count = len(entry["controls"]) * stride
+
+            self._poses[entry["name"]] = Pose(
+                entry["name"],
+                [index["controls"][idx] for idx in entry["controls"]],
+                values[entry["offset"]:entry["offset"] + count],
+            )
+
+        return self._poses
+
+
+# --------------------------------------------------------------------------------------
+class PoseBlender(object):
+    """
+    Blends the current pose of a character towards one or more stored poses.
+    Everything which does not change between updates - the plugs, the rotate
+    orders and the starting and target values (with rotations converted to
+    quaternions) - is resolved when the blender is created, so blend() can
+    be called repeatedly at interactive rates.
+
+    Translation and scale are blended linearly and rotations are blended
+    with a spherical linear interpolation.
+
+    The updates made by blend() are written directly and are not added to
+    the undo queue. Once the weights are settled (such as when a slider is
+    released) commit() should be called, which writes the final blend such
+    that undoing it returns to the starting pose.
+
+    ..code-block:: python
+
+        >>> blender = PoseBlender([library.get("idle"), library.get("crouch")], "hero")
+        >>> blender.blend(0.5, 0.25)
+        >>> blender.blend(0.6, 0.2)
+        >>> blender.commit(0.6, 0.2)
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, poses, namespace="", controls=None):
+        self.poses = list(poses)
+        self.namespace = namespace.strip(":")
+
+        allowed = set(controls) if controls else None
+
+        # -- Gather every control which is in any of the poses
+        self.controls = list()
+        self._plugs = list()
+        self._orders = list()
+
+        for pose in self.poses:
+            for control in pose.controls:
+                if control in self.controls:
+                    continue
+
+                if allowed is not None and control not in allowed:
+                    continue
+
+                plugs = handles(self.namespace, control)
+
+                if not plugs:
+                    continue
+
+                self.controls.append(control)
+                self._plugs.append(plugs)
+                self._orders.append(_rotate_order(self.namespace, control))
+
+        # -- Read the starting values
+        self._base = [
+            [plug.asDouble() for plug in plugs]
+            for plugs in self._plugs
+        ]
+
+        # -- Read the target values of each pose, falling back to the
+        # -- starting value for any control the pose does not hold
+        self._targets = list()
+
+        for pose in self.poses:
+            targets = list()
+
+            for control, base in zip(self.controls, self._base):
+                values = pose.control_values(control)
+                targets.append(values if values is not None else list(base))
+
+            self._targets.append(targets)
+
+        # -- The starting rotations are kept as euler rotations too, so the
+        # -- blended rotations can be kept close to them without flipping
+        self._base_eulers = [
+            om.MEulerRotation(values[3], values[4], values[5], order)
+            for values, order in zip(self._base, self._orders)
+        ]
+
+        # -- The values most recently committed, if any
+        self._committed = None
+
+        self._base_rotations = self._quaternions(self._base)
+        self._target_rotations = [
+            self._quaternions(targets)
+            for targets in self._targets
+        ]
+
+        if numpy is not None:
+            self._base = numpy.array(self._base, dtype=numpy.float64).reshape(-1, 9)
+            self._targets = [
+                numpy.array(targets, dtype=numpy.float64).reshape(-1, 9)
+                for targets in self._targets
+            ]
+
+    # ----------------------------------------------------------------------------------
+    def blend(self, *weights):
+        """
+        Blends from the starting pose towards the stored poses by the given
+        weights (one per pose) and writes the result in a single batched
+        pass. Where several poses are weighted they are mixed by their
+        weights, and the total weight (up to 1) controls how far the mix is
+        blended from the starting pose.
+
+        This is not added to the undo queue, so commit() should be called
+        once the weights are settled.
+
+        :param weights: The weight of each pose
+        :type weights: float
+
+        :return: None
+        """
+        self._write(self.values(*weights))
+
+    # ----------------------------------------------------------------------------------
+    def commit(self, *weights):
+        """
+        Writes the blend for the given weights through the undo queue. The
+        starting pose is restored first, so undoing the commit returns the
+        character to the pose it was in when the blender was created,
+        however many times blend() was called before it.
+
+        :param weights: The weight of each pose
+        :type weights: float
+
+        :return: None
+        """
+        values = self.values(*weights)
+
+        self._write(self._base)
+
+        with contexts.UndoChunk():
+            for plugs, control_values in zip(self._plugs, values):
+                set_channels(plugs, control_values)
+
+        self._committed = values
+
+    # ----------------------------------------------------------------------------------
+    def reset(self):
+        """
+        Restores the pose which was current when the blender was created
+
+        :return: None
+        """
+        self._write(self._base)
+
+    # ----------------------------------------------------------------------------------
+    def is_current(self):
+        """
+        Returns True if the character is still in the pose this blender last
+        committed, meaning it can carry on blending from the same starting
+        pose. If the character has been posed (or the commit undone) since
+        then a new blender should be created.
+
+        :return: bool
+        """
+        if self._committed is None:
+            return False
+
+        for plugs, control_values in zip(self._plugs, self._committed):
+            for plug, value in zip(plugs, control_values):
+                if access.writable(plug) and abs(plug.asDouble() - value) > 1e-5:
+                    return False
+
+        return True
+
+    # ----------------------------------------------------------------------------------
+    def values(self, *weights):
+        """
+        Returns the blended channel values for the given weights without
+        applying them.
+
+        :param weights: The weight of each pose
+        :type weights: float
+
+        :return: numpy.ndarray or list(list(float, ...), ...)
+        """
+        weights = list(weights) + [0.0] * (len(self.poses) - len(weights))
+        total = sum(weights)
+
+        # -- A copy is given so the caller cannot alter the starting pose
+        if not self.controls or total <= 0:
+            if numpy is not None:
+                return self._base.copy()
+
+            return [list(values) for values in self._base]
+
+        # -- Mix the poses together, building up a running weighted
+        # -- average of the targets
+        mix = None
+        mix_rotations = None
+        accumulated = 0.0
+
+        for targets, rotations, weight in zip(
+            self._targets,
+            self._target_rotations,
+            weights,
+        ):
+            if weight <= 0:
+                continue
+
+            accumulated += weight
+
+            if mix is None:
+                mix = targets
+                mix_rotations = rotations
+                continue
+
+            mix = _lerp(mix, targets, weight / accumulated)
+            mix_rotations = _slerp(mix_rotations, rotations, weight / accumulated)
+
+        # -- Now blend from the starting pose to the mix
+        amount = min(total, 1.0)
+
+        result = _lerp(self._base, mix, amount)
+        rotations = _slerp(self._base_rotations, mix_rotations, amount)
+
+        # -- Convert the rotations back to euler values in the rotate order
+        # -- of each control, keeping them close to the starting rotation
+        # -- to avoid flipping
+        for idx, (rotation, base) in enumerate(zip(rotations, self._base_eulers)):
+            euler = om.MQuaternion(
+                float(rotation[0]),
+                float(rotation[1]),
+                float(rotation[2]),
+                float(rotation[3]),
+            ).asEulerRotation().reorder(base.order).closestSolution(base)
+
+            result[idx][3] = euler.x
+            result[idx][4] = euler.y
+            result[idx][5] = euler.z
+
+        return result
+
+    # ----------------------------------------------------------------------------------
+    def _quaternions(self, values):
+        """
+        Converts the rotation channels of the given values to quaternions,
+        held as (x, y, z, w)
+        """
+        rotations = list()
+
+        for control_values, order in zip(values, self._orders):
+            quaternion = om.MEulerRotation(
+                control_values[3],
+                control_values[4],
+                control_values[5],
+                order,
+            ).asQuaternion()
+
+            rotations.append([quaternion.x, quaternion.y, quaternion.z, quaternion.w])
+
+        if numpy is not None:
+            return numpy.array(rotations, dtype=numpy.float64).reshape(-1, 4)
+
+        return rotations
+
+    # ----------------------------------------------------------------------------------
+    def _write(self, values):
+        modifier = om.MDGModifier()
+
+        for plugs, control_values in zip(self._plugs, values):
+            for plug, value in zip(plugs, control_values):
+                if access.writable(plug):
+                    modifier.newPlugValueDouble(plug, float(value))
+
+        modifier.doIt()
+
+
+# --------------------------------------------------------------------------------------
+def _lerp(a, b, t):
+    """
+    Linearly interpolates between two sets of values
+    """
+    if numpy is not None:
+        return a + (b - a) * t
+
+    return [
+        [value_a + (value_b - value_a) * t for value_a, value_b in zip(row_a, row_b)]
+        for row_a, row_b in zip(a, b)
+    ]
+
+
+# --------------------------------------------------------------------------------------
+def _slerp(a, b, t):
+    """
+    Spherically interpolates between two sets of (x, y, z, w) quaternions
+    """
+    if numpy is None:
+        result = list()
+
+        for row_a, row_b in zip(a, b):
+            quaternion = om.MQuaternion.slerp(
+                om.MQuaternion(*row_a),
+                om.MQuaternion(*row_b),
+                t,
+            )
+            result.append([quaternion.x, quaternion.y, quaternion.z, quaternion.w])
+
+        return result
+
+    dot = numpy.einsum("ij,ij->i", a, b)
+
+    # -- Always take the shortest path between the rotations
+    b = numpy.where(dot[:, None] < 0, -b, b)
+    dot = numpy.clip(numpy.abs(dot), -1.0, 1.0)
+
+    theta = numpy.arccos(dot)
+    sin_theta = numpy.sin(theta)
+
+    # -- Where the rotations are almost identical fall back to a linear
+    # -- interpolation to avoid dividing by zero
+    close = sin_theta < 1e-6
+    safe = numpy.where(close, 1.0, sin_theta)
+
+    weight_a = numpy.where(close, 1.0 - t, numpy.sin((1.0 - t) * theta) / safe)
+    weight_b = numpy.where(close, t, numpy.sin(t * theta) / safe)
+
+    result = a * weight_a[:, None] + b * weight_b[:, None]
+
+    return result / numpy.linalg.norm(result, axis=1)[:, None]
+
+
+# --------------------------------------------------------------------------------------
+def _rotate_order(namespace, control):
+    selection = om.MSelectionList()
+    selection.add("%s:%s" % (namespace, control) if namespace else control)
+
+    return om.MFnDependencyNode(selection.getDependNode(0)).findPlug(
+        "rotateOrder",
+        False,
+    ).asInt()
+
+
+# --------------------------------------------------------------------------------------
+def apply(pose, namespace="", controls=None, weight=1.0):
+    """
+    Applies the given pose to the character in the given namespace. The
+    whole pose is undone in one go.
+
+    :param pose: The pose to apply
+    :type pose: Pose
+
+    :param namespace: The namespace of the character to apply the pose to
+    :type namespace: str
+
+    :param controls: If given, only these controls (by name, without a
+        namespace) are posed
+    :type controls: list(str, ...)
+
+    :param weight: How much of the pose to apply. At 1.0 the pose is
+        applied fully, below that it is blended with the current pose.
+    :type weight: float
+
+    :return: The number of controls which were posed
+    """
+    namespace = namespace.strip(":")
+    controls = set(controls) if controls else None
+
+    posed = 0
+
+    with contexts.UndoChunk():
+        for idx, control in enumerate(pose.controls):
+            if controls is not None and control not in controls:
+                continue
+
+            plugs = handles(namespace, control)
+
+            if not plugs:
+                continue
+
+            start = idx * len(CHANNELS)
+            values = pose.values[start:start + len(CHANNELS)]
+
+            if weight != 1.0:
+                values = [
+                    plug.asDouble() + (value - plug.asDouble()) * weight
+                    for plug, value in zip(plugs, values)
+                ]
+
+            set_channels(plugs, values)
+            posed += 1
+
+    return posed
+
+
+# --------------------------------------------------------------------------------------
+def set_channels(plugs, values):
+    """
+    Sets the given channel values (in internal units) with setAttr, so they
+    are added to the undo queue. Channels which are locked or driven by
+    anything other than an animation curve are skipped. These are checked
+    as the values are set, as they can change at any time. Where all the
+    channels of translate, rotate or scale can be set they are set together.
+
+    :param plugs: The plug of each channel, as returned by handles
+    :type plugs: list(om.MPlug, ...)
+
+    :param values: The value of each channel
+    :type values: list(float, ...)
+
+    :return: None
+    """
+    name = om.MDagPath.getAPathTo(plugs[0].node()).fullPathName()
+
+    for start, attribute in _COMPOUNDS:
+        channels = range(start, start + 3)
+        settable = [idx for idx in channels if access.writable(plugs[idx])]
+
+        if not settable:
+            continue
+
+        ui_values = dict(
+            (idx, _ui_value(idx, float(values[idx])))
+            for idx in settable
+        )
+
+        if len(settable) == len(channels):
+            mc.setAttr(
+                "%s.%s" % (name, attribute),
+                *[ui_values[idx] for idx in channels]
+            )
+            continue
+
+        for idx in settable:
+            mc.setAttr("%s.%s" % (name, CHANNELS[idx]), ui_values[idx])
+
+
+# --------------------------------------------------------------------------------------
+def _ui_value(idx, value):
+    """
+    Converts the value of the given channel from internal units into the
+    ui units expected by setAttr
+    """
+    if idx < 3:
+        return om.MDistance(value).asUnits(om.MDistance.uiUnit())
+
+    if idx < 6:
+        return om.MAngle(value).asUnits(om.MAngle.uiUnit())
+
+    return value
+
+
+# --------------------------------------------------------------------------------------
+def handles(namespace, control):
+    """
+    Returns the plugs for each stored channel of the given control. These
+    are resolved once and then held for the session. Whether each channel
+    can be set is not decided here, as channels can be locked or connected
+    at any time (see crab.utils.access.writable).
+
+    :param namespace: The namespace of the control
+    :type namespace: str
+
+    :param control: The name of the control without its namespace
+    :type control: str
+
+    :return: list(om.MPlug, ...) or None if the control does not exist
+    """
+    key = (namespace, control)
+
+    # -- Check that the node we resolved has not since been deleted
+    if key in _HANDLES:
+        handle, plugs = _HANDLES[key]
+
+        if handle.isValid():
+            return plugs
+
+        _HANDLES.pop(key)
+
+    selection = om.MSelectionList()
+
+    try:
+        selection.add("%s:%s" % (namespace, control) if namespace else control)
+
+    except RuntimeError:
+        return None
+
+    node = selection.getDependNode(0)
+    fn = om.MFnDependencyNode(node)
+
+    plugs = [fn.findPlug(channel, False) for channel in CHANNELS]
+
+    _HANDLES[key] = (om.MObjectHandle(node), plugs)
+
+    return plugs
+
+
+# --------------------------------------------------------------------------------------
+def character_name(node):
+    """
+    Returns the name of the character the given node belongs to. This is
+    the description of the root of the crab rig the node belongs to. If the
+    node is not part of a crab rig then the top of its hierarchy is used.
+
+    :param node: Any node within the rig
+    :type node: pm.nt.DagNode
+
+    :return: str
+    """
+    # -- Imported here as the rig module depends on the utils
+    from ..core.rig import Rig
+
+    rig_node = Rig(node).node()
+
+    if rig_node:
+        root = rig_node.nodeName()
+
+    else:
+        root = node.longName().split("|")[1]
+
+    root = root.split(":")[-1]
+
+    try:
+        return config.get_description(root)
+
+    except IndexError:
+        return root
+
+
+# --------------------------------------------------------------------------------------
+def library_directory():
+    """
+    Returns the directory pose libraries are stored in. This can be set
+    with the CRAB_POSE_LIBRARY environment variable.
+
+    :return: str
+    """
+    return os.environ.get(
+        constants.POSE_LIBRARY_ENVIRONMENT_VARIABLE,
+        constants.POSE_LIBRARY_PATH,
+    )
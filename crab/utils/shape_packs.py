@@ -0,0 +1,280 @@
+"""
+Shape packs hold many shapes within a single binary file. Rather than parsing
+json, the curve data is memory mapped and read directly from the file.
+
+The layout of a shape pack is:
+
+    * A fixed size header holding the file identifier, the format version,
+        the size of each value (4 for float32, 8 for float64) and the
+        location of the index.
+
+    * A single contiguous block of little endian floats holding the cv
+        positions and knots of every curve.
+
+    * A json index describing each shape - its name, the degree and form of
+        each curve and where its cvs and knots sit within the float block.
+
+Shape packs can be generated from existing json shape files using pack(), and
+any .crabshapes file within the shape search locations is picked up by the
+shape library automatically.
+"""
+import os
+import sys
+import json
+import mmap
+import array
+import types
+import struct
+
+# -- Numpy is not available in every maya distribution, so we fall back
+# -- to reading through a memoryview when it is not
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+
+EXTENSION = ".crabshapes"
+
+_MAGIC = b"CRABSHP1"
+_VERSION = 1
+
+# -- magic, version, value size, index offset, index length
+_HEADER = struct.Struct("<8sIIQQ")
+
+
+# --------------------------------------------------------------------------------------
+class ShapePack(object):
+    """
+    Gives read access to the shapes within a shape pack. The file is memory
+    mapped and the curve data is copied out of it as read only arrays (or
+    tuples when numpy is not available), so the data remains valid once the
+    pack is closed.
+
+    The file stays open until close() is called (or the pack is used as a
+    context manager), and cannot be replaced on Windows until then.
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+        with open(filepath, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, value_size, index_offset, index_length = _HEADER.unpack_from(
+            self._mmap,
+            0,
+        )
+
+        if magic != _MAGIC or version != _VERSION or value_size not in (4, 8):
+            raise ValueError("%s is not a valid shape pack" % filepath)
+
+        self._value_size = value_size
+
+        index = json.loads(
+            self._mmap[index_offset:index_offset + index_length].decode("utf-8"),
+        )
+
+        self._names = [entry["name"] for entry in index["shapes"]]
+        self._entries = dict(
+            (entry["name"], entry)
+            for entry in index["shapes"]
+        )
+
+    # ----------------------------------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    # ----------------------------------------------------------------------------------
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ----------------------------------------------------------------------------------
+    def close(self):
+        """
+        Closes the mapped file
+
+        :return: None
+        """
+        if not self._mmap.closed:
+            self._mmap.close()
+
+    # ----------------------------------------------------------------------------------
+    def names(self):
+        """
+        Returns the names of all the shapes in the pack, in the order they
+        were packed.
+
+        :return: list(str, str, ...)
+        """
+        return list(self._names)
+
+    # ----------------------------------------------------------------------------------
+    def shape(self, name):
+        """
+        Returns the shape data for the given shape. This takes the same form
+        as the data returned by crab.utils.shapes.read, except that it is
+        immutable and the cvs and knots are arrays.
+
+        :param name: Name of the shape
+        :type name: str
+
+        :return: Mapping or None
+        """
+        entry = self._entries.get(name)
+
+        if not entry:
+            return None
+
+        curves = list()
+
+        for curve in entry["curves"]:
+            curves.append(
+                types.MappingProxyType(
+                    dict(
+                        cvs=self._values(curve["cv_offset"], curve["cv_count"], 3),
+                        knots=self._values(curve["knot_offset"], curve["knot_count"]),
+                        degree=curve["degree"],
+                        form=curve["form"],
+                    ),
+                ),
+            )
+
+        return types.MappingProxyType(
+            dict(
+                node=entry["node"],
+                up_axis=entry["up_axis"],
+                curves=tuple(curves),
+            ),
+        )
+
+    # ----------------------------------------------------------------------------------
+    def _values(self, offset, count, columns=1):
+        """
+        Copies values out of the float block
+
+        :param offset: Offset into the float block, in values
+        :type offset: int
+
+        :param count: Number of rows to read
+        :type count: int
+
+        :param columns: Number of values in each row
+        :type columns: int
+
+        :return: numpy.ndarray or tuple
+        """
+        start = _HEADER.size + offset * self._value_size
+
+        if numpy is not None:
+            # -- The values are copied so nothing references the mapped file
+            # -- and it can be closed
+            values = numpy.frombuffer(
+                self._mmap,
+                dtype="<f4" if self._value_size == 4 else "<f8",
+                count=count * columns,
+                offset=start,
+            ).copy()
+            values.setflags(write=False)
+
+            return values.reshape(count, columns) if columns > 1 else values
+
+        with memoryview(self._mmap) as view:
+            with view[start:start + count * columns * self._value_size] as block:
+                with block.cast("f" if self._value_size == 4 else "d") as values:
+                    if columns == 1:
+                        return tuple(values)
+
+                    return tuple(
+                        tuple(values[idx:idx + columns])
+                        for idx in range(0, count * columns, columns)
+                    )
+
+
+# --------------------------------------------------------------------------------------
+def pack(filepath, shape_files, double=False):
+    """
+    Writes the given json shape files (as written by crab.utils.shapes.write)
+    into a single shape pack. Where files share a name only the first is
+    packed.
+
+    :param filepath: Path to write the shape pack to
+    :type filepath: str
+
+    :param shape_files: List of json shape files to pack
+    :type shape_files: list(str, str, ...)
+
+    :param double: If True the values are stored as float64, otherwise
+        they are stored as float32
+    :type double: bool
+
+    :return: The number of shapes packed
+    """
+    values = array.array("d" if double else "f")
+    index = list()
+    packed_names = set()
+
+    for shape_file in shape_files:
+        name = os.path.basename(shape_file).replace(".json", "")
+
+        if name in packed_names:
+            continue
+
+        with open(shape_file, "r") as f:
+            data = json.load(f)
+
+        curves = list()
+
+        for curve_data in data["curves"]:
+            cv_offset = len(values)
+
+            for cv in curve_data["cvs"]:
+                values.extend(cv[:3])
+
+            knot_offset = len(values)
+            values.extend(curve_data["knots"])
+
+            curves.append(
+                dict(
+                    degree=curve_data["degree"],
+                    form=curve_data["form"],
+                    cv_offset=cv_offset,
+                    cv_count=len(curve_data["cvs"]),
+                    knot_offset=knot_offset,
+                    knot_count=len(curve_data["knots"]),
+                ),
+            )
+
+        index.append(
+            dict(
+                name=name,
+                node=data.get("node", name),
+                up_axis=data.get("up_axis", "y"),
+                curves=curves,
+            ),
+        )
+        packed_names.add(name)
+
+    # -- The float block is always stored little endian
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    value_bytes = values.tobytes()
+    index_bytes = json.dumps(dict(shapes=index)).encode("utf-8")
+
+    with open(filepath, "wb") as f:
+        f.write(
+            _HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                values.itemsize,
+                _HEADER.size + len(value_bytes),
+                len(index_bytes),
+            ),
+        )
+        f.write(value_bytes)
+        f.write(index_bytes)
+
+    return len(index)
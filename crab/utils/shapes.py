@@ -1,7 +1,12 @@
 import os
 import json
+import types
+import collections
 import pymel.core as pm
+import maya.api.OpenMaya as om
 
+from . import curves
+from . import shape_packs
 from .. import constants
 
 AXIS = dict(
@@ -17,8 +22,391 @@ AXIS = dict(
     ],
 )
 
-# -- This is called a lot, and rarely changes, so we can cache it
-_SHAPE_NAMES = None
+# -- The shape library is shared across the session
+_LIBRARY = None
+
+
+# --------------------------------------------------------------------------------------
+class ShapeLibrary(object):
+    """
+    The shape library indexes all the shape files available to crab and holds
+    the parsed data of the most recently used shapes in memory. This means
+    that once a shape has been used, creating further controls with it never
+    needs to touch the disk.
+
+    The data handed out by the library is immutable, as it is shared between
+    every caller.
+
+    Shapes can either be stored as individual json files or packed together
+    into .crabshapes files (see crab.utils.shape_packs), which are memory
+    mapped rather than parsed.
+
+    The library does not check the disk on every request. Instead, validate()
+    checks the search locations and the cached files for changes. This is
+    called at the start of every rig build, and the first time a shape cannot
+    be found. Names which still cannot be found are remembered, so repeatedly
+    asking for an unknown shape does not rescan the search locations. Shapes
+    written through write() are discarded from the library straight away.
+    """
+
+    # ----------------------------------------------------------------------------------
+    def __init__(self, max_cached=128):
+        self._max_cached = max_cached
+
+        # -- This is the list of shape files in search order and the names of
+        # -- the shapes they hold, along with an index of shape name to the
+        # -- first file holding a shape of that name
+        self._files = None
+        self._names = None
+        self._index = None
+
+        # -- The shape packs which have been opened, by filepath
+        self._packs = dict()
+
+        # -- The modification times of every directory we searched. Adding
+        # -- or removing a file changes the time of its directory
+        self._directories = dict()
+
+        # -- filepath -> (modification time, shape data), in least recently
+        # -- used order
+        self._cache = collections.OrderedDict()
+
+        # -- Names which were looked for but could not be found
+        self._missing = set()
+
+    # ----------------------------------------------------------------------------------
+    @classmethod
+    def search_paths(cls):
+        """
+        Returns the locations which are searched for shapes, starting with
+        the built in shapes followed by any CRAB_PLUGIN_PATHS locations.
+
+        :return: list(str, str, ...)
+        """
+        paths = [
+            os.path.join(
+                os.path.dirname(os.path.dirname(__file__)),
+                "resources",
+                "shapes",
+            ),
+        ]
+
+        # -- If we have any paths defined by environment
+        # -- variables we should add them here
+        if constants.PLUGIN_ENVIRONMENT_VARIABLE in os.environ:
+            paths.extend(
+                os.environ[constants.PLUGIN_ENVIRONMENT_VARIABLE].split(";"),
+            )
+
+        return paths
+
+    # ----------------------------------------------------------------------------------
+    def files(self):
+        """
+        Returns all the shape files available, in search order
+
+        :return: list(str, str, ...)
+        """
+        if self._files is None:
+            self._build_index()
+
+        return list(self._files)
+
+    # ----------------------------------------------------------------------------------
+    def names(self):
+        """
+        Returns the names of all the shape files available, in search order
+
+        :return: list(str, str, ...)
+        """
+        if self._names is None:
+            self._build_index()
+
+        return list(self._names)
+
+    # ----------------------------------------------------------------------------------
+    def find(self, name):
+        """
+        Returns the filepath of the shape with the given name. Where shapes
+        share a name the first one found in the search locations is returned.
+
+        :param name: Name of the shape
+        :type name: str
+
+        :return: str or None
+        """
+        if self._index is None:
+            self._build_index()
+
+        if name in self._missing:
+            return None
+
+        # -- If we cannot find the shape then it may have been added since
+        # -- we indexed, so validate and try again
+        if name not in self._index and self.validate():
+            self._build_index()
+
+        if name not in self._index:
+            self._missing.add(name)
+            return None
+
+        return self._index[name][0]
+
+    # ----------------------------------------------------------------------------------
+    def get(self, shape):
+        """
+        Returns the immutable shape data for the given shape name or filepath
+
+        :param shape: The name of the shape or an absolute filepath to it
+        :type shape: str
+
+        :return: Mapping or None
+        """
+        # -- Only look at the disk if we are given a path. Shape packs hold
+        # -- many shapes, so they can only be read by shape name
+        if "/" in shape.replace("\\", "/") and os.path.exists(shape):
+            if shape.endswith(shape_packs.EXTENSION):
+                return None
+
+            filepath, packed_name = shape, None
+
+        else:
+            filepath = self.find(shape)
+            packed_name = self._index.get(shape, (None, None))[1]
+
+        if not filepath:
+            return None
+
+        key = (filepath, packed_name)
+
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key][1]
+
+        if packed_name:
+            data = self._pack(filepath).shape(packed_name)
+
+        else:
+            with open(filepath, "r") as f:
+                data = _freeze(json.load(f))
+
+        self._cache[key] = (os.path.getmtime(filepath), data)
+
+        # -- Remove the least recently used shapes if we are holding
+        # -- more than we should
+        while len(self._cache) > self._max_cached:
+            self._cache.popitem(last=False)
+
+        return data
+
+    # ----------------------------------------------------------------------------------
+    def validate(self):
+        """
+        Checks the search locations and the cached shape files for any
+        changes on disk, discarding anything which is out of date.
+
+        :return: True if anything had changed
+        """
+        changed = False
+
+        for key, (mtime, _) in list(self._cache.items()):
+            filepath = key[0]
+
+            if not os.path.exists(filepath) or os.path.getmtime(filepath) != mtime:
+                self._cache.pop(key)
+                self._close_packs([filepath])
+                changed = True
+
+        if self._index is not None:
+            directories = dict()
+
+            for path in self.search_paths():
+                for root, _, __ in os.walk(path):
+                    directories[root] = os.path.getmtime(root)
+
+            if directories != self._directories:
+                self._files = None
+                self._names = None
+                self._index = None
+                self._close_packs()
+                changed = True
+
+        if changed:
+            self._missing = set()
+
+        return changed
+
+    # ----------------------------------------------------------------------------------
+    def discard(self, filepath):
+        """
+        Discards any cached data read from the given file, closing it if it
+        is a shape pack. If the file is a shape pack or is not already
+        indexed (such as a newly written shape) the index is rebuilt on its
+        next use.
+
+        :param filepath: The shape file which has changed
+        :type filepath: str
+
+        :return: None
+        """
+        filepath = os.path.normpath(filepath)
+
+        for key in list(self._cache.keys()):
+            if os.path.normpath(key[0]) == filepath:
+                self._cache.pop(key)
+
+        self._close_packs(
+            [known for known in self._packs if os.path.normpath(known) == filepath]
+        )
+        self._missing = set()
+
+        if self._files is not None and (
+            filepath.endswith(shape_packs.EXTENSION)
+            or filepath not in [os.path.normpath(known) for known in self._files]
+        ):
+            self._files = None
+            self._names = None
+            self._index = None
+
+    # ----------------------------------------------------------------------------------
+    def clear(self):
+        """
+        Clears the index and all the cached shape data
+
+        :return: None
+        """
+        self._files = None
+        self._names = None
+        self._index = None
+        self._close_packs()
+        self._directories = dict()
+        self._cache = collections.OrderedDict()
+        self._missing = set()
+
+    # ----------------------------------------------------------------------------------
+    def _build_index(self):
+        """
+        Searches all the search locations for shape files and shape packs
+
+        :return: None
+        """
+        self._files = list()
+        self._names = list()
+        self._index = dict()
+        self._directories = dict()
+        self._missing = set()
+
+        for path in self.search_paths():
+            for root, _, files in os.walk(path):
+                self._directories[root] = os.path.getmtime(root)
+
+                for filename in files:
+                    filepath = os.path.join(root, filename)
+
+                    if filename.endswith(".json"):
+                        self._add(filename.replace(".json", ""), filepath, None)
+
+                    elif filename.endswith(shape_packs.EXTENSION):
+                        try:
+                            pack = self._pack(filepath)
+
+                        except (IOError, OSError, ValueError):
+                            constants.log.warning("Could not read %s" % filepath)
+                            continue
+
+                        for name in pack.names():
+                            self._add(name, filepath, name)
+
+                    else:
+                        continue
+
+                    if filepath not in self._files:
+                        self._files.append(filepath)
+
+    # ----------------------------------------------------------------------------------
+    def _add(self, name, filepath, packed_name):
+        self._names.append(name)
+        self._index.setdefault(name, (filepath, packed_name))
+
+    # ----------------------------------------------------------------------------------
+    def _close_packs(self, filepaths=None):
+        """
+        Closes the given shape packs (or all of them) and forgets them
+        """
+        for filepath in list(self._packs) if filepaths is None else filepaths:
+            pack = self._packs.pop(filepath, None)
+
+            if pack:
+                pack.close()
+
+    # ----------------------------------------------------------------------------------
+    def _pack(self, filepath):
+        if filepath not in self._packs:
+            self._packs[filepath] = shape_packs.ShapePack(filepath)
+
+        return self._packs[filepath]
+
+
+# --------------------------------------------------------------------------------------
+def library():
+    """
+    Returns the shape library shared across the session
+
+    :return: ShapeLibrary
+    """
+    global _LIBRARY
+
+    if not _LIBRARY:
+        _LIBRARY = ShapeLibrary()
+
+    return _LIBRARY
+
+
+# --------------------------------------------------------------------------------------
+def _freeze(value):
+    """
+    Converts the given json data to an immutable equivalent, with dictionaries
+    becoming read only mappings and lists becoming tuples.
+    """
+    if isinstance(value, dict):
+        return types.MappingProxyType(
+            dict((key, _freeze(item)) for key, item in value.items()),
+        )
+
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
+# --------------------------------------------------------------------------------------
+def pack(filepath, double=False):
+    """
+    Packs all the json shapes currently available into a single shape pack,
+    which is faster to load than the individual json files.
+
+    :param filepath: Path to write the shape pack to. This should have a
+        .crabshapes extension to be picked up by the shape library
+    :type filepath: str
+
+    :param double: If True the cv positions are stored at double precision
+    :type double: bool
+
+    :return: The number of shapes packed
+    """
+    # -- The library may have the pack open, and it cannot be replaced on
+    # -- windows whilst it is
+    library().discard(filepath)
+
+    count = shape_packs.pack(
+        filepath,
+        [path for path in shapes() if path.endswith(".json")],
+        double=double,
+    )
+
+    library().discard(filepath)
+
+    return count
 
 
 # --------------------------------------------------------------------------------------
@@ -42,6 +430,9 @@ def write(node, filepath):
     with open(filepath, "w") as f:
         json.dump(data, f, indent=4, sort_keys=True)
 
+    # -- Make sure the library hands out what we have just written
+    library().discard(filepath)
+
     return data
 
 
@@ -100,26 +491,23 @@ def apply(node, data):
     :param node: Node to apply to
     :type node: pm.nt.DagNode
 
-    :param data: Shape data to apply
+    :param data: Shape data to apply, or the name of (or path to) a shape
     :type data: dict or string
 
     :return: list(pm.nt.NurbsCurve, ...)
     """
-    # -- If the data is a filepath we need to extract it
-    if not isinstance(data, dict):
-        # -- Check for a filepath
-        if not os.path.exists(data) or "/" not in data.replace("\\", "/"):
-            # -- Look for a filename in the shape dir
-            data = find_shape(data)
-
-        # -- If the path still does not exist then we cannot do
+    # -- If the data is a name or filepath we need to get the
+    # -- data from the shape library
+    if not isinstance(data, collections.abc.Mapping):
+        shape_data = library().get(data)
+
+        # -- If the shape could not be found then we cannot do
         # -- anything with it
-        if not data or not os.path.exists(data):
+        if not shape_data:
             constants.log.warning("Could not find shape data for %s" % data)
             return None
 
-        with open(data, "r") as f:
-            data = json.load(f)
+        data = shape_data
 
     # -- Define a list which we will collate all the shapes
     # -- in
@@ -129,15 +517,18 @@ def apply(node, data):
     for curve_data in data["curves"]:
         # -- Create a curve with the given cv"s
         transform = pm.curve(
+            # -- Shape packs hand out numpy values, which pymel does not
+            # -- accept, so everything is converted to python floats
             p=[
-                p # refine_from_up_axis(p, up_axis=data.get("up_axis", "z"))
+                # refine_from_up_axis(p, up_axis=data.get("up_axis", "z"))
+                [float(value) for value in p]
                 for p in curve_data["cvs"]
             ],
             d=curve_data["degree"],
-            k=curve_data["knots"],
+            k=[float(knot) for knot in curve_data["knots"]],
             # per=curve_data["form"],
         )
-        print(123131231)
+
         # -- Parent the shape under the node
         shape = transform.getShape()
 
@@ -201,54 +592,23 @@ def find_shape(name):
 
     :return: Absolute path to shape
     """
-    for path in shapes():
-        shape_name = os.path.basename(path).replace(".json", "")
-
-        if shape_name == name:
-            return path
-
-    return None
+    return library().find(name)
 
 
 # --------------------------------------------------------------------------------------
 def shapes():
     """
-    Returns a list of all the available shapes
+    Returns a list of all the available json shape files. Shape packs are
+    not included, as each holds many shapes.
 
     :return: list
     """
-    # -- Define a list of locations to search for, starting by
-    # -- adding in our builtin shape locations
-    paths = [
-        os.path.join(
-            os.path.dirname(os.path.dirname(__file__)),
-            "resources",
-            "shapes",
-        ),
+    return [
+        filepath
+        for filepath in library().files()
+        if not filepath.endswith(shape_packs.EXTENSION)
     ]
 
-    # -- If we have any paths defined by environment
-    # -- variables we should add them here
-    if constants.PLUGIN_ENVIRONMENT_VARIABLE in os.environ:
-        paths.extend(
-            os.environ[constants.PLUGIN_ENVIRONMENT_VARIABLE].split(";"),
-        )
-
-    shape_list = list()
-
-    for path in paths:
-        for root, _, files in os.walk(path):
-            for filename in files:
-                if filename.endswith(".json"):
-                    shape_list.append(
-                        os.path.join(
-                            root,
-                            filename,
-                        ),
-                    )
-
-    return shape_list
-
 
 # --------------------------------------------------------------------------------------
 def shape_names(refresh=False):
@@ -257,22 +617,10 @@ def shape_names(refresh=False):
 
     :return: list
     """
+    if refresh:
+        library().validate()
 
-    global _SHAPE_NAMES
-
-    if _SHAPE_NAMES and not refresh:
-        return _SHAPE_NAMES
-
-    shape_names = list()
-
-    for shape in shapes():
-        shape_names.append(
-            os.path.basename(shape).split(".")[0],
-        )
-
-    _SHAPE_NAMES = shape_names
-
-    return shape_names
+    return library().names()
 
 
 # --------------------------------------------------------------------------------------
@@ -298,54 +646,19 @@ def spin(node, x=0.0, y=0.0, z=0.0, pivot=None):
 
     :return: None
     """
-    # -- If we"re not given a pivot, then default
-    # -- to a zero vector.
-    pivot = pivot or pm.dt.Vector()
-
     # -- If we"re given a transform as a pivot, then read
     # -- out a worldspace location vector
     if isinstance(pivot, pm.nt.Transform):
         pivot = pivot.getTranslation(space="world")
 
-    # -- Get a list of all the curves we need to modify
-    all_curves = list()
-
-    if isinstance(node, pm.nt.Transform):
-        all_curves.extend(
-            node.getShapes(),
-        )
-
-    elif isinstance(node, pm.nt.NurbsCurve):
-        all_curves.append(node)
-
-    # -- Validate that all entries are nurbs curves
-    all_curves = [curve for curve in all_curves if isinstance(curve, pm.nt.NurbsCurve)]
-
-    for curve in all_curves:
-        for cv in range(curve.numCVs()):
-            # -- Get the cv in worldspace
-            worldspace_cv = pm.dt.Vector(curve.getCV(cv, space="world"))
-
-            # -- Get the relative vector between the cv and pivot
-            relative_cv = worldspace_cv - pivot
-
-            # -- Rotate our relative vector by the rotation values
-            # -- given to us
-            rotated_position = relative_cv.rotateBy(
-                [x * 0.017453, y * 0.017453, z * 0.017453]
-            )
-
-            # -- Add the worldspace pivot vector onto our rotated vector
-            # -- to give ourselves the final vector
-            final_position = rotated_position + pivot
-
-            curve.setCV(
-                cv,
-                final_position,
-                space="world",
-            )
-
-        curve.updateCurve()
+    # -- The cvs are rotated in worldspace about the pivot (or the
+    # -- world origin if we're not given one)
+    curves.transform(
+        node,
+        curves.rotation_matrix(x, y, z),
+        pivot=pivot,
+        space=om.MSpace.kWorld,
+    )
 
 
 # --------------------------------------------------------------------------------------
@@ -368,34 +681,9 @@ def scale(node, x=1, y=1, z=1, uniform=1):
     :param uniform: If given, this will scale all axis by this amount
     :type uniform: float
 
-    :return:
+    :return: None
     """
-
-    all_curves = list()
-
-    if isinstance(node, pm.nt.Transform):
-        all_curves.extend(
-            node.getShapes(),
-        )
-
-    elif isinstance(node, pm.nt.NurbsCurve):
-        all_curves.append(node)
-
-    # -- Validate that all entries are nurbs curves
-    all_curves = [curve for curve in all_curves if isinstance(curve, pm.nt.NurbsCurve)]
-
-    for curve in all_curves:
-        print("curve : %s" % curve)
-        print(x)
-        for cv in range(curve.numCVs()):
-            cv_position = curve.getCV(cv)
-
-            curve.setCV(
-                cv,
-                [
-                    cv_position[0] * x * uniform,
-                    cv_position[1] * y * uniform,
-                    cv_position[2] * z * uniform,
-                ],
-            )
-        curve.updateCurve()
+    curves.transform(
+        node,
+        curves.scale_matrix(x * uniform, y * uniform, z * uniform),
+    )
@@ -0,0 +1,476 @@
+"""
+Bulk access to the A and T poses stored on skeletal joints and guides. The
+poses are held as matrix attributes on each node. Every node is visited
+once through the maya api, and the values are then set with setAttr
+inside a single undo chunk, so any change can be undone in one go.
+
+Poses can also be written to (and read from) a pose file. The layout of a
+pose file is:
+
+    * A fixed size header holding the file identifier, the format version
+        and the location of the index.
+
+    * A single contiguous block of little endian doubles holding 16 values
+        for every stored matrix.
+
+    * A json index holding the pose names and, for each node, its name and
+        the slot of each of its matrices within the block.
+
+..code-block:: python
+
+    >>> import crab
+    >>>
+    >>> nodes = crab.utils.skeleton_poses.nodes()
+    >>> crab.utils.skeleton_poses.define(nodes, "APose")
+    >>> crab.utils.skeleton_poses.save("/path/to/rig.crabskelposes", nodes)
+"""
+import os
+import sys
+import json
+import array
+import struct
+
+import maya.cmds as mc
+import maya.api.OpenMaya as om
+
+from . import access
+from . import contexts
+from .. import config
+from .. import constants
+
+
+# -- The poses which are stored on skeletal nodes
+POSES = [
+    "APose",
+    "TPose",
+]
+
+EXTENSION = ".crabskelposes"
+
+_MAGIC = b"CRABSKP1"
+_VERSION = 1
+
+# -- magic, version, index offset, index length
+_HEADER = struct.Struct("<8sIQQ")
+
+
+# --------------------------------------------------------------------------------------
+def nodes(root=None, selection_only=False):
+    """
+    Returns the skeletal joints and guides which poses are stored on.
+
+    :param root: Optional node to look under. If not given then every
+        skeletal joint and guide in the scene is returned.
+    :type root: pm.nt.DagNode
+
+    :param selection_only: If True the selected nodes are returned instead
+    :type selection_only: bool
+
+    :return: list(str, ...) of long names
+    """
+    if selection_only:
+        return mc.ls(selection=True, long=True) or list()
+
+    if root is not None:
+        joints = mc.listRelatives(
+            root.longName(),
+            allDescendents=True,
+            type="joint",
+            fullPath=True,
+        ) or list()
+
+        transforms = mc.listRelatives(
+            root.longName(),
+            allDescendents=True,
+            type="transform",
+            fullPath=True,
+        ) or list()
+
+        return [
+            node
+            for node in joints
+            if _short_name(node).startswith("%s_" % config.SKELETON)
+        ] + [
+            node
+            for node in transforms
+            if _short_name(node).startswith("%s_" % config.GUIDE)
+        ]
+
+    result = mc.ls("%s_*" % config.SKELETON, type="joint", recursive=True, long=True)
+    result.extend(
+        mc.ls("%s_*" % config.GUIDE, type="transform", recursive=True, long=True),
+    )
+
+    return result
+
+
+# --------------------------------------------------------------------------------------
+def define(node_names, pose):
+    """
+    Stores the current local matrix of each of the given nodes as the
+    given pose, adding the pose attribute where it does not already exist.
+
+    :param node_names: The nodes to store the pose on
+    :type node_names: list(str, ...)
+
+    :param pose: The name of the pose (such as APose)
+    :type pose: str
+
+    :return: The number of nodes the pose was stored on
+    """
+    fns = _fns(node_names)
+
+    with contexts.UndoChunk():
+        for fn in fns:
+            name = _path(fn)
+
+            if not fn.hasAttribute(pose):
+                mc.addAttr(name, longName=pose, attributeType="matrix")
+
+            mc.setAttr(
+                "%s.%s" % (name, pose),
+                *list(_matrix(fn, "matrix")),
+                type="matrix"
+            )
+
+    return len(fns)
+
+
+# --------------------------------------------------------------------------------------
+def apply(node_names, pose, rotate_only=False, translate_only=False):
+    """
+    Puts the given nodes into the given pose. Nodes without the pose are
+    skipped, as are any channels which are locked or driven by anything
+    other than an animation curve.
+
+    :param node_names: The nodes to apply the pose to
+    :type node_names: list(str, ...)
+
+    :param pose: The name of the pose (such as APose)
+    :type pose: str
+
+    :param rotate_only: If True the translation of the nodes is left as it is
+    :type rotate_only: bool
+
+    :param translate_only: If True the rotation of the nodes is left as it is
+    :type translate_only: bool
+
+    :return: The number of nodes the pose was applied to
+    """
+    attributes = ["scale"]
+
+    if not rotate_only:
+        attributes.append("translate")
+
+    if not translate_only:
+        attributes.append("rotate")
+
+    count = 0
+
+    with contexts.UndoChunk():
+        for fn in _fns(node_names):
+            if not fn.hasAttribute(pose):
+                continue
+
+            name = _path(fn)
+
+            for attribute, values in zip(
+                ["translate", "rotate", "scale"],
+                _decompose(fn, _matrix(fn, pose)),
+            ):
+                if attribute not in attributes:
+                    continue
+
+                values = [_ui_value(attribute, value) for value in values]
+
+                settable = [
+                    (axis, value)
+                    for axis, value in zip("XYZ", values)
+                    if access.writable(fn.findPlug(attribute + axis, False))
+                ]
+
+                # -- Set all three channels together where we can
+                if len(settable) == 3:
+                    mc.setAttr("%s.%s" % (name, attribute), *values)
+                    continue
+
+                for axis, value in settable:
+                    mc.setAttr("%s.%s%s" % (name, attribute, axis), value)
+
+            count += 1
+
+    return count
+
+
+# --------------------------------------------------------------------------------------
+def read(node_names):
+    """
+    Reads every pose stored on the given nodes
+
+    :param node_names: The nodes to read the poses from
+    :type node_names: list(str, ...)
+
+    :return: dict(node name -> dict(pose -> list(float, ...)))
+    """
+    result = dict()
+
+    for fn in _fns(node_names):
+        poses = dict(
+            (pose, list(_matrix(fn, pose)))
+            for pose in POSES
+            if fn.hasAttribute(pose)
+        )
+
+        if poses:
+            result[fn.name()] = poses
+
+    return result
+
+
+# --------------------------------------------------------------------------------------
+def write(data):
+    """
+    Sets the poses held in the given data (as returned by read or load) on
+    the nodes of the scene. Nodes which do not exist or do not have the
+    pose attribute are skipped.
+
+    :param data: The poses to set
+    :type data: dict(node name -> dict(pose -> list(float, ...)))
+
+    :return: The number of nodes which were updated
+    """
+    count = 0
+
+    with contexts.UndoChunk():
+        for node_name, poses in data.items():
+            fns = _fns([node_name])
+
+            if not fns:
+                constants.log.info("%s does not exist. Skipping." % node_name)
+                continue
+
+            fn = fns[0]
+            name = _path(fn)
+
+            for pose, values in poses.items():
+                if values and fn.hasAttribute(pose):
+                    mc.setAttr(
+                        "%s.%s" % (name, pose),
+                        *[float(value) for value in values],
+                        type="matrix"
+                    )
+
+            count += 1
+
+    return count
+
+
+# --------------------------------------------------------------------------------------
+def save(filepath, node_names):
+    """
+    Writes the poses stored on the given nodes to a pose file
+
+    :param filepath: The file to write
+    :type filepath: str
+
+    :param node_names: The nodes to store the poses of
+    :type node_names: list(str, ...)
+
+    :return: None
+    """
+    values = array.array("d")
+    entries = list()
+
+    for node_name, poses in read(node_names).items():
+        entry = dict(name=node_name)
+
+        for pose, matrix in poses.items():
+            entry[pose] = len(values) // 16
+            values.extend(matrix)
+
+        entries.append(entry)
+
+    # -- The matrix block is always stored little endian
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    value_bytes = values.tobytes()
+    index_bytes = json.dumps(
+        dict(
+            poses=POSES,
+            nodes=entries,
+        ),
+    ).encode("utf-8")
+
+    directory = os.path.dirname(filepath)
+
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    # -- Write to a temporary file first so that a failure part way
+    # -- through does not lose the existing poses
+    temp_path = filepath + ".tmp"
+
+    with open(temp_path, "wb") as f:
+        f.write(
+            _HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                _HEADER.size + len(value_bytes),
+                len(index_bytes),
+            ),
+        )
+        f.write(value_bytes)
+        f.write(index_bytes)
+
+    os.replace(temp_path, filepath)
+
+
+# --------------------------------------------------------------------------------------
+def load(filepath):
+    """
+    Reads the poses from a pose file. Json files written by older versions
+    of crab are also supported.
+
+    :param filepath: The file to read
+    :type filepath: str
+
+    :return: dict(node name -> dict(pose -> list(float, ...)))
+    """
+    if filepath.lower().endswith(".json"):
+        with open(filepath, "r") as f:
+            return json.load(f)
+
+    with open(filepath, "rb") as f:
+        data = f.read()
+
+    magic, version, index_offset, index_length = _HEADER.unpack_from(data, 0)
+
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("%s is not a valid pose file" % filepath)
+
+    index = json.loads(
+        data[index_offset:index_offset + index_length].decode("utf-8"),
+    )
+
+    values = array.array("d")
+    values.frombytes(data[_HEADER.size:index_offset])
+
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    result = dict()
+
+    for entry in index["nodes"]:
+        result[entry["name"]] = dict(
+            (pose, values[entry[pose] * 16:(entry[pose] + 1) * 16].tolist())
+            for pose in index["poses"]
+            if entry.get(pose) is not None
+        )
+
+    return result
+
+
+# --------------------------------------------------------------------------------------
+def _fns(node_names):
+    """
+    Returns a function set for each of the given nodes which exist
+    """
+    fns = list()
+
+    for node_name in node_names:
+        selection = om.MSelectionList()
+
+        try:
+            selection.add(node_name)
+
+        except RuntimeError:
+            continue
+
+        fns.append(om.MFnDependencyNode(selection.getDependNode(0)))
+
+    return fns
+
+
+# --------------------------------------------------------------------------------------
+def _path(fn):
+    """
+    Returns the unique name of the node of the given function set, which
+    is its full path for dag nodes
+    """
+    if fn.object().hasFn(om.MFn.kDagNode):
+        return om.MDagPath.getAPathTo(fn.object()).fullPathName()
+
+    return fn.name()
+
+
+# --------------------------------------------------------------------------------------
+def _ui_value(attribute, value):
+    """
+    Converts the value of the given attribute from internal units into the
+    ui units expected by setAttr
+    """
+    if attribute == "translate":
+        return om.MDistance(value).asUnits(om.MDistance.uiUnit())
+
+    if attribute == "rotate":
+        return om.MAngle(value).asUnits(om.MAngle.uiUnit())
+
+    return value
+
+
+# --------------------------------------------------------------------------------------
+def _short_name(node_name):
+    return node_name.split("|")[-1].split(":")[-1]
+
+
+# --------------------------------------------------------------------------------------
+def _matrix(fn, attribute):
+    return om.MFnMatrixData(fn.findPlug(attribute, False).asMObject()).matrix()
+
+
+# --------------------------------------------------------------------------------------
+def _decompose(fn, matrix):
+    """
+    Splits the given local matrix into the translate, rotate (in radians)
+    and scale values of the node, taking its rotate axis (and joint orient
+    for joints) into account. The rotation is kept as close as possible to
+    the current rotation of the node so it does not flip.
+
+    :return: tuple(translation, rotation, scale)
+    """
+    transformation = om.MTransformationMatrix(matrix)
+
+    translation = transformation.translation(om.MSpace.kTransform)
+    scale = transformation.scale(om.MSpace.kTransform)
+
+    # -- The local rotation is made up of the rotate axis, the rotation
+    # -- and (for joints) the joint orient, so the other two are removed
+    # -- to leave the rotation
+    rotation = transformation.rotation(asQuaternion=True)
+    rotation = _quaternion(fn, "rotateAxis").inverse() * rotation
+
+    if fn.object().hasFn(om.MFn.kJoint):
+        rotation = rotation * _quaternion(fn, "jointOrient").inverse()
+
+    order = fn.findPlug("rotateOrder", False).asInt()
+
+    current = om.MEulerRotation(
+        [fn.findPlug("rotate" + axis, False).asDouble() for axis in "XYZ"],
+        order,
+    )
+
+    euler = rotation.asEulerRotation().reorder(order).closestSolution(current)
+
+    return (
+        [translation.x, translation.y, translation.z],
+        [euler.x, euler.y, euler.z],
+        scale,
+    )
+
+
+# --------------------------------------------------------------------------------------
+def _quaternion(fn, attribute):
+    return om.MEulerRotation(
+        [fn.findPlug(attribute + axis, False).asDouble() for axis in "XYZ"],
+    ).asQuaternion()
@@ -1,6 +1,30 @@
+import maya.cmds as mc
 import pymel.core as pm
+import maya.api.OpenMaya as om
 
+from . import contexts
 from .. import create
+from .. import constants
+
+# -- Range snapping does not account for pivots, so any node with a non zero
+# -- value on these is snapped frame by frame
+_PIVOT_ATTRIBUTES = [
+    "rotatePivot",
+    "scalePivot",
+    "rotatePivotTranslate",
+    "scalePivotTranslate",
+]
+
+# -- (namespace, label) -> snap relationships with that label in that
+# -- namespace, ordered by the depth of the node being snapped. This is None
+# -- until it is first needed
+_REGISTRY = None
+
+# -- long name of a snappable node -> the labels of its snap relationships
+_LABELS = None
+
+# -- Ids of the scene callbacks which clear the registry
+_CALLBACK_IDS = list()
 
 
 # --------------------------------------------------------------------------------------
@@ -72,6 +96,8 @@ def new(node, target, label="", resets=None):
             )
             node_to_zero.message.connect(plug)
 
+    invalidate()
+
     return snap_node
 
 
@@ -110,6 +136,8 @@ def remove(node, label=None):
     delete_count = len(to_delete)
     pm.delete(to_delete)
 
+    invalidate()
+
     return delete_count
 
 
@@ -123,9 +151,9 @@ def labels(node):
 
     :return: list(str, str, str, ...)
     """
-    found_labels = [snap_node.label.get() for snap_node in get(node)]
+    _build_registry()
 
-    return list(set(found_labels))
+    return list(_LABELS.get(node.longName(), set()))
 
 
 # --------------------------------------------------------------------------------------
@@ -147,34 +175,169 @@ def members(label, namespace=None, from_nodes=None):
 
     :return: list(pm.nt.Transform, pm.nt.Transform, ...)
     """
-    # -- Get all the snap nodes
-    snap_nodes = pm.ls("*.isCrabSnap", r=True, o=True)
+    return [
+        relationship["snap_node"]
+        for relationship in relationships(label, namespace, from_nodes)
+    ]
 
-    # -- Define our output
-    matched = list()
 
-    for snap_node in snap_nodes:
-        # -- Skip nodes which do not have matching labels
-        if snap_node.label.get() != label:
-            continue
+# --------------------------------------------------------------------------------------
+def relationships(label, namespace=None, from_nodes=None):
+    """
+    Returns the resolved snap relationships with the given label, ordered
+    such that parents are always snapped before their children. Each
+    relationship is a dictionary holding the snap_node, the node being
+    snapped, the target, the offset_matrix and the nodes_to_zero.
+
+    :param label: The label to query for
+    :type label: str
+
+    :param namespace: Optional argument to only return relationships within
+        the given namespace. An empty string is the root namespace.
+    :type namespace: str
+
+    :param from_nodes: An optional argument to filter only nodes within
+        a specific node list
+    :type from_nodes: list(pm.nt.Transform, ..)
+
+    :return: list(dict, ...)
+    """
+    _build_registry()
+
+    if namespace is not None:
+        matched = _REGISTRY.get((namespace.strip(":"), label), list())
+
+    else:
+        matched = sorted(
+            [
+                relationship
+                for (_, registered_label), registered in _REGISTRY.items()
+                if registered_label == label
+                for relationship in registered
+            ],
+            key=lambda relationship: relationship["depth"],
+        )
+
+    # -- If any of the snap nodes have been removed outside of crab then
+    # -- the registry is stale
+    if not all(relationship["snap_node"].exists() for relationship in matched):
+        invalidate()
+        return relationships(label, namespace, from_nodes)
+
+    # -- Filter by the node list if given
+    if from_nodes:
+        allowed = set(node.longName() for node in from_nodes)
+
+        matched = [
+            relationship
+            for relationship in matched
+            if relationship["node"].longName() in allowed
+        ]
+
+    return list(matched)
+
+
+# --------------------------------------------------------------------------------------
+def invalidate():
+    """
+    Clears the snap registry. This is done automatically whenever snap
+    relationships are created or removed through this module, when a rig
+    is built or edited and whenever a scene or reference is loaded. If you
+    alter snap relationships outside of crab you should call this yourself.
+
+    :return: None
+    """
+    global _REGISTRY
+    global _LABELS
+
+    _REGISTRY = None
+    _LABELS = None
 
-        # -- Filter any namespace differences if required
-        if namespace and namespace not in snap_node.name():
+
+# --------------------------------------------------------------------------------------
+def _build_registry():
+    """
+    Reads every snap relationship in the scene into the registry if it is
+    not already built.
+
+    :return: None
+    """
+    global _REGISTRY
+    global _LABELS
+
+    _register_callbacks()
+
+    if _REGISTRY is not None:
+        return
+
+    _REGISTRY = dict()
+    _LABELS = dict()
+
+    for snap_node in pm.ls("*.isCrabSnap", r=True, o=True):
+
+        targets = snap_node.snapTarget.inputs()
+        nodes = snap_node.snapSource.inputs()
+
+        if not targets or not nodes:
             continue
 
-        # -- Filter by the node list if given
-        if from_nodes:
-            source_node = snap_node.snapSource.inputs()
+        label = snap_node.label.get()
+        long_name = nodes[0].longName()
+
+        zero_these = list()
+
+        if snap_node.hasAttr("nodesToZero"):
+            zero_these = snap_node.nodesToZero.inputs()
+
+        _REGISTRY.setdefault(
+            (snap_node.namespace().strip(":"), label),
+            list(),
+        ).append(
+            dict(
+                snap_node=snap_node,
+                node=nodes[0],
+                target=targets[0],
+                offset_matrix=snap_node.offsetMatrix.get(),
+                nodes_to_zero=zero_these,
+                depth=long_name.count("|"),
+            ),
+        )
 
-            if not source_node:
-                continue
+        _LABELS.setdefault(long_name, set()).add(label)
 
-            if source_node[0] not in from_nodes:
-                continue
+    for registered in _REGISTRY.values():
+        registered.sort(key=lambda relationship: relationship["depth"])
 
-        matched.append(snap_node)
 
-    return sorted(matched, key=lambda x: x.snapSource.inputs()[0].longName().count("|"))
+# --------------------------------------------------------------------------------------
+# noinspection PyUnusedLocal
+def _scene_changed(*args):
+    invalidate()
+
+
+# --------------------------------------------------------------------------------------
+def _register_callbacks():
+    """
+    Registers the scene callbacks which clear the registry. This is only
+    done once per session.
+
+    :return: None
+    """
+    if _CALLBACK_IDS:
+        return
+
+    for message in [
+        om.MSceneMessage.kAfterNew,
+        om.MSceneMessage.kAfterOpen,
+        om.MSceneMessage.kAfterCreateReference,
+        om.MSceneMessage.kAfterRemoveReference,
+        om.MSceneMessage.kAfterLoadReference,
+        om.MSceneMessage.kAfterUnloadReference,
+        om.MSceneMessage.kAfterImport,
+    ]:
+        _CALLBACK_IDS.append(
+            om.MSceneMessage.addCallback(message, _scene_changed),
+        )
 
 
 # --------------------------------------------------------------------------------------
@@ -290,40 +453,27 @@ def snap(node, target, start_time=None, end_time=None, key=True):
 
     # -- Get the list of nodes to reset
     zero_these = list()
-    if snap_nodes[0].hasAttr("nodesToZero"):
+    if snap_nodes and snap_nodes[0].hasAttr("nodesToZero"):
         zero_these = snap_nodes[0].nodesToZero.inputs()
 
-    # -- Use the current time if we"re not given specific
-    # -- frame ranges
-    start_time = start_time if start_time is not None else int(pm.currentTime())
-    end_time = end_time if end_time is not None else int(pm.currentTime())
-
-    # -- Cycle the frame range ensuring we dont accidentally
-    # -- drop off the last frame
-    for frame in range(start_time, end_time + 1):
-        pm.setCurrentTime(frame)
-
-        _set_worldspace_matrix(
-            node,
-            target,
-            offset_matrix,
-        )
-
-        # -- Zero any nodes which require it
-        for node_to_zero in zero_these:
-            _zero_node(node_to_zero)
-
-            if key or start_time != end_time:
-                pm.setKeyframe(node_to_zero)
-
-        # -- Check if we need to key
-        if key or start_time != end_time:
-            pm.setKeyframe(node)
+    _apply(
+        [(node, target, offset_matrix, zero_these)],
+        start_time=start_time,
+        end_time=end_time,
+        key=key,
+    )
 
 
 # --------------------------------------------------------------------------------------
 # noinspection PyUnresolvedReferences
-def snap_label(label=None, restrict_to=None, start_time=None, end_time=None, key=True):
+def snap_label(
+    label=None,
+    restrict_to=None,
+    start_time=None,
+    end_time=None,
+    key=True,
+    namespace=None,
+):
     """
     This will match all the members of the snap group.
 
@@ -347,77 +497,665 @@ def snap_label(label=None, restrict_to=None, start_time=None, end_time=None, key
         be keyed.
     :type key: bool
 
+    :param namespace: If given, only members within this namespace will
+        be matched.
+    :type namespace: str
+
     :return:
     """
-    # -- Get a list of all the snap nodes with this label
-    snap_nodes = members(label, from_nodes=restrict_to)
+    # -- Get the resolved relationships with this label
+    entries = [
+        (
+            relationship["node"],
+            relationship["target"],
+            relationship["offset_matrix"],
+            relationship["nodes_to_zero"],
+        )
+        for relationship in relationships(
+            label,
+            namespace=namespace,
+            from_nodes=restrict_to,
+        )
+    ]
+
+    _apply(
+        entries,
+        start_time=start_time,
+        end_time=end_time,
+        key=key,
+    )
+
+
+# --------------------------------------------------------------------------------------
+def _apply(entries, start_time=None, end_time=None, key=True):
+    """
+    Performs the given snaps over the given frame range. Where a range of
+    frames is given the snap is resolved without changing the current time
+    if possible, otherwise it is performed frame by frame.
+
+    :param entries: List of (node, target, offset matrix, nodes to zero)
+        tuples, ordered such that parents are snapped before their children
+    :type entries: list(tuple, ...)
+
+    :param start_time: The time to start from. If this is not given then
+        the match will only occur on the current frame
+    :type start_time: int
 
+    :param end_time: The time to stop at. If this is not given then the
+        match will only occur on the current frame
+    :type end_time: int
+
+    :param key: If true the matching will be keyed. This is ignored when
+        a range is given as the motion is always keyed.
+    :type key: bool
+
+    :return: None
+    """
     # -- Use the current time if we"re not given specific
     # -- frame ranges
     start_time = start_time if start_time is not None else int(pm.currentTime())
     end_time = end_time if end_time is not None else int(pm.currentTime())
 
-    # -- Log some information, which is useful to know
-    print("Snap Nodes : %s" % snap_nodes)
-    print("start time : %s" % start_time)
-    print("end time : %s" % end_time)
+    # -- The whole snap is undone in one go, however many frames it covers
+    with contexts.UndoChunk():
+        if start_time != end_time and _can_snap_range(entries):
+            _snap_range(entries, start_time, end_time)
 
-    # -- Cycle the frame range ensuring we dont accidentally
-    # -- drop off the last frame
-    for frame in range(start_time, end_time + 1):
-        pm.setCurrentTime(frame)
+        else:
+            _snap_frames(entries, start_time, end_time, key)
 
-        for snap_node in snap_nodes:
-            # -- NOTE: We *could* group the target/node together
-            # -- outside the frame iteration as an optimisation. For
-            # -- the sake of code simplicity on the first pass its
-            # -- done during iteration.
-            pass
 
-            # -- Get the target node - if there is no target
-            # -- we do nothing
-            targets = snap_node.snapTarget.inputs()
+# --------------------------------------------------------------------------------------
+def _snap_frames(entries, start_time, end_time, key):
+    """
+    Performs the given snaps frame by frame, changing the current time to
+    each frame in turn.
 
-            if not targets:
-                continue
+    :param entries: List of (node, target, offset matrix, nodes to zero)
+    :type entries: list(tuple, ...)
+
+    :param start_time: The first frame
+    :type start_time: int
 
-            # -- Pull out the target as a named variable for
-            # -- code clarity
-            target = targets[0]
+    :param end_time: The last frame
+    :type end_time: int
 
-            # -- Pull out the node to modify
-            nodes = snap_node.snapSource.inputs()
+    :param key: If true the matching will be keyed
+    :type key: bool
 
-            if not nodes:
-                continue
+    :return: None
+    """
+    # -- The rotation each node was last given, by long name
+    previous = dict()
 
-            # -- Pull out the node as a named variable for
-            # -- code clarity
-            node = nodes[0]
+    # -- Cycle the frame range ensuring we dont accidentally
+    # -- drop off the last frame
+    for frame in range(start_time, end_time + 1):
+        pm.setCurrentTime(frame)
+
+        for node, target, offset_matrix, zero_these in entries:
+            name = node.longName()
+
+            if name not in previous:
+                previous[name] = _euler(name)
 
             # -- Match the two objects with the offset matrix
             _set_worldspace_matrix(
                 node,
                 target,
-                snap_node.offsetMatrix.get(),
+                offset_matrix,
             )
 
-            # -- Get the list of nodes to reset
-            if snap_node.hasAttr("nodesToZero"):
-                zero_these = snap_node.nodesToZero.inputs()
+            # -- Keep the rotation continuous, exactly as a range snap does
+            previous[name] = _set_closest_rotation(name, previous[name])
 
-                # -- Zero any nodes which require it
-                for node_to_zero in zero_these:
-                    _zero_node(node_to_zero)
+            # -- Zero any nodes which require it
+            for node_to_zero in zero_these:
+                _zero_node(node_to_zero)
 
-                    if key or start_time != end_time:
-                        pm.setKeyframe(node_to_zero)
+                if key or start_time != end_time:
+                    pm.setKeyframe(node_to_zero)
 
             # -- Key the match if we need to
             if key or start_time != end_time:
                 pm.setKeyframe(node)
 
 
+# --------------------------------------------------------------------------------------
+def _euler(name):
+    """
+    Returns the current rotation of the given node, in radians and in its
+    rotate order
+    """
+    return om.MEulerRotation(
+        [
+            om.MAngle(value, om.MAngle.uiUnit()).asRadians()
+            for value in mc.getAttr("%s.rotate" % name)[0]
+        ],
+        mc.getAttr("%s.rotateOrder" % name),
+    )
+
+
+# --------------------------------------------------------------------------------------
+def _set_closest_rotation(name, previous):
+    """
+    Sets the rotation of the given node to the euler solution of its current
+    orientation which is closest to the given rotation. Both the frame by
+    frame and the range snaps use this solution so they give the same keys.
+
+    :param name: The long name of the node
+    :type name: str
+
+    :param previous: The rotation to stay close to
+    :type previous: om.MEulerRotation
+
+    :return: The rotation which was set
+    """
+    current = _euler(name)
+    closest = om.MEulerRotation(current).closestSolution(previous)
+
+    if closest != current:
+        try:
+            mc.setAttr(
+                "%s.rotate" % name,
+                *[
+                    om.MAngle(value).asUnits(om.MAngle.uiUnit())
+                    for value in [closest.x, closest.y, closest.z]
+                ]
+            )
+
+        except RuntimeError:
+            return current
+
+    return closest
+
+
+# --------------------------------------------------------------------------------------
+def _can_snap_range(entries):
+    """
+    Range snapping evaluates the targets at each frame before anything is
+    changed. This is only valid when nothing which is being changed can
+    affect a target or the parent space of a node being snapped (other than
+    another node being snapped), either through the hierarchy or through
+    connections such as constraints, and when the nodes do not use pivots.
+
+    :param entries: List of (node, target, offset matrix, nodes to zero)
+    :type entries: list(tuple, ...)
+
+    :return: bool
+    """
+    changed = set()
+    for node, _, _, zero_these in entries:
+        changed.add(node.longName())
+        changed.update(node_to_zero.longName() for node_to_zero in zero_these)
+
+    zeroed = changed - set(node.longName() for node, _, _, _ in entries)
+
+    for node, target, _, _ in entries:
+
+        # -- Targets must not be changed or live under anything which
+        # -- is changed
+        if _under(target.longName(), changed):
+            return False
+
+        # -- Nodes must not be zeroed or live under anything which is
+        # -- zeroed
+        if _under(node.longName(), zeroed):
+            return False
+
+        # -- Pivots are not accounted for when decomposing the matrices
+        for attribute in _PIVOT_ATTRIBUTES:
+            if any(mc.getAttr("%s.%s" % (node.longName(), attribute))[0]):
+                return False
+
+    # -- Finally, nothing which is changed may drive a target, a node being
+    # -- snapped or anything above them through the dependency graph
+    driven = _driven(changed)
+
+    for node, target, _, _ in entries:
+        if _under(target.longName(), driven) or _under(node.longName(), driven):
+            return False
+
+    return True
+
+
+# --------------------------------------------------------------------------------------
+def _driven(long_names):
+    """
+    Returns the long names of every node which is driven through the
+    dependency graph by the given nodes or anything beneath them. Message
+    connections are not followed, as they carry relationships rather
+    than values.
+
+    :param long_names: The long names of the nodes which are changed
+    :type long_names: set(str, ...)
+
+    :return: set(str, ...)
+    """
+    pending = list(long_names)
+
+    for long_name in long_names:
+        pending.extend(
+            mc.listRelatives(long_name, allDescendents=True, fullPath=True) or list()
+        )
+
+    visited = set(pending)
+    driven = set()
+
+    while pending:
+        connections = mc.listConnections(
+            pending.pop(),
+            source=False,
+            destination=True,
+            connections=True,
+            plugs=True,
+            skipConversionNodes=False,
+        ) or list()
+
+        for source, destination in zip(connections[::2], connections[1::2]):
+            if source.rpartition(".")[2] == "message":
+                continue
+
+            name = mc.ls(destination.split(".")[0], long=True)[0]
+            driven.add(name)
+
+            if name not in visited:
+                visited.add(name)
+                pending.append(name)
+
+    return driven
+
+
+# --------------------------------------------------------------------------------------
+def _under(long_name, long_names):
+    """
+    Returns True if the given node, or any of its parents, are in the
+    given set of long names
+    """
+    parts = long_name.split("|")
+
+    return any(
+        "|".join(parts[:idx]) in long_names
+        for idx in range(2, len(parts) + 1)
+    )
+
+
+# --------------------------------------------------------------------------------------
+def _snap_range(entries, start_time, end_time):
+    """
+    Snaps and keys the given entries over the frame range without changing
+    the current time. The target and parent matrices for every frame are
+    evaluated in a time context, the local transforms are resolved for all
+    the frames and then each channel is written to its animation curve in
+    one go.
+
+    :param entries: List of (node, target, offset matrix, nodes to zero)
+    :type entries: list(tuple, ...)
+
+    :param start_time: The first frame
+    :type start_time: int
+
+    :param end_time: The last frame
+    :type end_time: int
+
+    :return: None
+    """
+    frames = list(range(start_time, end_time + 1))
+
+    # -- The values to key, by plug name, holding one value per frame
+    values = dict()
+
+    # -- Every keyable channel of the nodes being snapped or zeroed is
+    # -- keyed, as setKeyframe would do
+    keyed = list()
+
+    for node, _, _, zero_these in entries:
+        for keyed_node in [node] + list(zero_these):
+            if keyed_node.longName() not in keyed:
+                keyed.append(keyed_node.longName())
+
+    channels = [
+        plug_name
+        for name in keyed
+        for plug_name in _keyable_channels(name)
+    ]
+
+    # -- Resolve each entry once, working out which (if any) of the
+    # -- earlier entries is the closest snapped parent
+    resolved = list()
+    snapped = dict()
+
+    for node, target, offset_matrix, zero_these in entries:
+        name = node.longName()
+        parts = name.split("|")
+
+        ancestor = None
+
+        for idx in range(len(parts) - 1, 1, -1):
+            if "|".join(parts[:idx]) in snapped:
+                ancestor = "|".join(parts[:idx])
+                break
+
+        resolved.append(
+            dict(
+                name=name,
+                target=_plug("%s.worldMatrix[0]" % target.longName()),
+                parent=_plug("%s.parentMatrix[0]" % name),
+                world=_plug("%s.worldMatrix[0]" % name),
+                offset=om.MMatrix([value for row in offset_matrix for value in row]),
+                ancestor=ancestor,
+                joint_orient=_joint_orient(node),
+                rotate_axis=_rotation(name, "rotateAxis"),
+                rotate_order=mc.getAttr("%s.rotateOrder" % name),
+                rotate=[_plug("%s.rotate%s" % (name, axis)) for axis in "XYZ"],
+                previous=None,
+                zero=[node_to_zero.longName() for node_to_zero in zero_these],
+            ),
+        )
+        snapped[name] = resolved[-1]
+
+    for frame in frames:
+        context = om.MDGContext(om.MTime(frame, om.MTime.uiUnit()))
+
+        # -- Start by reading the current values of every channel at
+        # -- this frame
+        for plug_name in channels:
+            values.setdefault(plug_name, list()).append(
+                _evaluate(_plug(plug_name), context, matrix=False),
+            )
+
+        # -- The new world matrices of the snapped nodes at this frame
+        worlds = dict()
+
+        for entry in resolved:
+            world = entry["offset"] * _evaluate(entry["target"], context)
+            parent = _evaluate(entry["parent"], context)
+
+            # -- If a parent of this node has been snapped then the parent
+            # -- space moves with it
+            if entry["ancestor"]:
+                ancestor = snapped[entry["ancestor"]]
+
+                parent = (
+                    parent
+                    * _evaluate(ancestor["world"], context).inverse()
+                    * worlds[entry["ancestor"]]
+                )
+
+            worlds[entry["name"]] = world
+
+            local = om.MTransformationMatrix(world * parent.inverse())
+
+            # -- The rotation is kept continuous with the previous frame, or
+            # -- with the rotation the node already has on the first frame,
+            # -- so the keys do not flip between equivalent solutions
+            if entry["previous"] is None:
+                x, y, z = [
+                    _evaluate(plug, context, matrix=False)
+                    for plug in entry["rotate"]
+                ]
+                entry["previous"] = om.MEulerRotation(x, y, z, entry["rotate_order"])
+
+            # -- Take the rotate axis and joint orient out of the rotation
+            rotation = (
+                entry["rotate_axis"].inverse()
+                * local.rotation(asQuaternion=True)
+                * entry["joint_orient"].inverse()
+            ).asEulerRotation().reorder(entry["rotate_order"])
+            rotation = rotation.closestSolution(entry["previous"])
+            entry["previous"] = rotation
+
+            translation = local.translation(om.MSpace.kTransform)
+            scale = local.scale(om.MSpace.kTransform)
+
+            for attribute, value in zip(
+                [
+                    "translateX", "translateY", "translateZ",
+                    "rotateX", "rotateY", "rotateZ",
+                    "scaleX", "scaleY", "scaleZ",
+                ],
+                [
+                    translation.x, translation.y, translation.z,
+                    rotation.x, rotation.y, rotation.z,
+                    scale[0], scale[1], scale[2],
+                ],
+            ):
+                plug_name = "%s.%s" % (entry["name"], attribute)
+
+                if plug_name in values:
+                    values[plug_name][-1] = value
+
+            # -- Zero any nodes which require it
+            for name in entry["zero"]:
+                for plug_name, value in _zero_values(name).items():
+                    if plug_name in values:
+                        values[plug_name][-1] = value
+
+    for plug_name in channels:
+        _write_keys(plug_name, frames, values[plug_name])
+
+
+# --------------------------------------------------------------------------------------
+def _plug(name):
+    selection = om.MSelectionList()
+    selection.add(name)
+
+    return selection.getPlug(0)
+
+
+# --------------------------------------------------------------------------------------
+def _evaluate(plug, context, matrix=True):
+    """
+    Evaluates the given plug at the given time context without changing
+    the current time.
+
+    :param plug: The plug to evaluate
+    :type plug: om.MPlug
+
+    :param context: The time context to evaluate in
+    :type context: om.MDGContext
+
+    :param matrix: If True the plug is read as a matrix, otherwise as a
+        double (in internal units)
+    :type matrix: bool
+
+    :return: om.MMatrix or float
+    """
+    # -- From maya 2022 the context must be made current rather than
+    # -- being passed to the plug
+    if hasattr(context, "makeCurrent"):
+        previous = context.makeCurrent()
+
+        try:
+            value = plug.asMObject() if matrix else plug.asDouble()
+
+        finally:
+            previous.makeCurrent()
+
+    else:
+        value = plug.asMObject(context) if matrix else plug.asDouble(context)
+
+    if matrix:
+        return om.MFnMatrixData(value).matrix()
+
+    return value
+
+
+# --------------------------------------------------------------------------------------
+def _joint_orient(node):
+    if not isinstance(node, pm.nt.Joint):
+        return om.MQuaternion()
+
+    return _rotation(node.longName(), "jointOrient")
+
+
+# --------------------------------------------------------------------------------------
+def _rotation(name, attribute):
+    """
+    Reads the given (xyz ordered) rotation attribute as a quaternion
+    """
+    return om.MEulerRotation(
+        *[
+            om.MAngle(value, om.MAngle.uiUnit()).asRadians()
+            for value in mc.getAttr("%s.%s" % (name, attribute))[0]
+        ]
+    ).asQuaternion()
+
+
+# --------------------------------------------------------------------------------------
+def _keyable_channels(name):
+    """
+    Returns the plugs which setKeyframe would key on the given node, being
+    the keyable and unlocked attributes which are not driven by anything
+    other than an animation curve.
+
+    :param name: The long name of the node
+    :type name: str
+
+    :return: list(str, ...)
+    """
+    channels = list()
+
+    attributes = mc.listAttr(name, keyable=True, unlocked=True, scalar=True)
+
+    for attribute in attributes or list():
+        plug_name = "%s.%s" % (name, attribute)
+
+        try:
+            plug = _plug(plug_name)
+
+        except RuntimeError:
+            continue
+
+        if plug.isDestination and not plug.source().node().hasFn(om.MFn.kAnimCurve):
+            continue
+
+        channels.append(plug_name)
+
+    return channels
+
+
+# --------------------------------------------------------------------------------------
+def _zero_values(name):
+    """
+    Returns the values (in internal units) which _zero_node would set on
+    the given node, by plug name.
+
+    :param name: The long name of the node
+    :type name: str
+
+    :return: dict
+    """
+    values = dict()
+
+    for attribute in mc.listAttr(name, keyable=True) or list():
+        if "scale" in attribute:
+            values["%s.%s" % (name, attribute)] = 1.0
+
+        elif "translate" in attribute or "rotate" in attribute:
+            values["%s.%s" % (name, attribute)] = 0.0
+
+    for attribute in mc.listAttr(name, keyable=True, userDefined=True) or list():
+        default = mc.attributeQuery(attribute, node=name, listDefault=True)
+
+        if default:
+            values["%s.%s" % (name, attribute)] = default[0]
+
+    return values
+
+
+# --------------------------------------------------------------------------------------
+def _write_keys(plug_name, frames, values):
+    """
+    Keys the given values on the given plug in a single undoable write to
+    its animation curve. Keys are first made on every frame with one
+    setKeyframe call, after which the time and value of every key within
+    the range are set with one setAttr call on the key array of the curve.
+
+    Keys on the given frames are replaced and keys outside of the range are
+    left untouched. Keys between the frames are also left untouched, but are
+    reported as they no longer follow the snapped motion.
+
+    :param plug_name: The name of the plug to key
+    :type plug_name: str
+
+    :param frames: The frames to key at
+    :type frames: list(int, ...)
+
+    :param values: The value to key at each frame, in internal units
+    :type values: list(float, ...)
+
+    :return: None
+    """
+    to_ui = _ui_units(_plug(plug_name))
+
+    mc.setKeyframe(plug_name, time=frames)
+
+    curve = mc.listConnections(
+        plug_name,
+        source=True,
+        destination=False,
+        type="animCurve",
+    )[0]
+
+    time_range = (frames[0], frames[-1])
+
+    indices = mc.keyframe(curve, query=True, time=time_range, indexValue=True)
+    times = mc.keyframe(curve, query=True, time=time_range, timeChange=True)
+    current = mc.keyframe(curve, query=True, time=time_range, valueChange=True)
+
+    by_frame = dict(zip(frames, values))
+    subframes = list()
+    key_values = list()
+
+    for time, value in zip(times, current):
+        if time in by_frame:
+            value = to_ui(by_frame[time])
+
+        else:
+            subframes.append(time)
+
+        key_values.extend([time, value])
+
+    if subframes:
+        constants.log.warning(
+            "%s has keys between frames which have been left in place: %s" % (
+                plug_name,
+                ", ".join(str(time) for time in subframes),
+            )
+        )
+
+    mc.setAttr(
+        "%s.keyTimeValue[%s:%s]" % (curve, min(indices), max(indices)),
+        *key_values
+    )
+
+
+# --------------------------------------------------------------------------------------
+def _ui_units(plug):
+    """
+    Returns a function which converts a value of the given plug from
+    internal units into the ui units expected by commands.
+
+    :param plug: The plug the values belong to
+    :type plug: om.MPlug
+
+    :return: callable
+    """
+    attribute = plug.attribute()
+
+    if attribute.hasFn(om.MFn.kUnitAttribute):
+        unit_type = om.MFnUnitAttribute(attribute).unitType()
+
+        if unit_type == om.MFnUnitAttribute.kAngle:
+            return lambda value: om.MAngle(value).asUnits(om.MAngle.uiUnit())
+
+        if unit_type == om.MFnUnitAttribute.kDistance:
+            return lambda value: om.MDistance(value).asUnits(om.MDistance.uiUnit())
+
+    return lambda value: value
+
+
 # --------------------------------------------------------------------------------------
 def _new_node():
     """
@@ -0,0 +1,84 @@
+"""
+Checks that importing crab stays cheap. Crab is imported in every mayapy
+batch build, so importing the package must not pull in the user interfaces
+(and with them Qt) and must stay within a time budget.
+
+These tests need maya, so they are skipped when it is not available. The
+budget can be overridden with the CRAB_IMPORT_BUDGET environment variable,
+given in seconds.
+"""
+import os
+import re
+import sys
+import unittest
+import importlib.util
+import subprocess
+
+
+# -- The most time importing crab (and everything it imports) may take
+IMPORT_BUDGET = float(os.environ.get("CRAB_IMPORT_BUDGET", "2.0"))
+
+# -- Modules which must only be imported when they are used
+DEFERRED_MODULES = [
+    "crab.apps.animator",
+    "crab.apps.creator",
+    "crab.apps.menu",
+    "crab.core.behaviour_ui",
+    "crab.vendor.qute",
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --------------------------------------------------------------------------------------
+def _run(code, *flags):
+    return subprocess.run(
+        [sys.executable] + list(flags) + ["-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+# --------------------------------------------------------------------------------------
+@unittest.skipIf(importlib.util.find_spec("maya") is None, "maya is not available")
+class ImportTimeTest(unittest.TestCase):
+
+    # ----------------------------------------------------------------------------------
+    def test_import_budget(self):
+        result = _run("import crab", "-X", "importtime")
+
+        # -- Each line of the report is "import time: self | cumulative | name"
+        # -- with the times given in microseconds
+        cumulative = None
+
+        for line in result.stderr.splitlines():
+            match = re.match(r"import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*crab$", line)
+
+            if match:
+                cumulative = int(match.group(1)) / 1000000.0
+
+        self.assertIsNotNone(cumulative, "crab did not appear in the import report")
+        self.assertLessEqual(
+            cumulative,
+            IMPORT_BUDGET,
+            "importing crab took %.3fs, the budget is %.3fs" % (cumulative, IMPORT_BUDGET),
+        )
+
+    # ----------------------------------------------------------------------------------
+    def test_deferred_modules(self):
+        result = _run("import sys, crab; crab.Rig; print(' '.join(sorted(sys.modules)))")
+
+        imported = set(result.stdout.split())
+
+        for module_name in DEFERRED_MODULES:
+            self.assertNotIn(module_name, imported)
+
+    # ----------------------------------------------------------------------------------
+    def test_behaviour_ui_alias(self):
+        _run("from crab.core.behaviour import BehaviourUI")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Checks that resetting a full character stays fast enough to use
+interactively, and that the reset can be undone.
+
+These tests need maya, so they are skipped when it is not available. The
+budget defaults to a single frame at 24fps and can be overridden with the
+CRAB_RESET_BUDGET environment variable, given in seconds.
+"""
+import os
+import time
+import unittest
+import importlib.util
+
+
+# -- The most time resetting every control of a character may take
+RESET_BUDGET = float(os.environ.get("CRAB_RESET_BUDGET", str(1.0 / 24.0)))
+
+# -- The number of controls on the character being reset
+CONTROL_COUNT = 500
+
+
+# --------------------------------------------------------------------------------------
+@unittest.skipIf(importlib.util.find_spec("maya") is None, "maya is not available")
+class ResetTimingTest(unittest.TestCase):
+
+    # ----------------------------------------------------------------------------------
+    @classmethod
+    def setUpClass(cls):
+        import maya.standalone
+        maya.standalone.initialize()
+
+    # ----------------------------------------------------------------------------------
+    def setUp(self):
+        import maya.cmds as mc
+        import crab
+
+        mc.file(new=True, force=True)
+        mc.undoInfo(state=True)
+
+        rig = crab.Rig.create("Timing")
+
+        for idx in range(CONTROL_COUNT):
+            name = mc.createNode(
+                "transform",
+                name="CTL_Timing_%s_MD" % (idx + 1),
+                parent=rig.control_org().longName(),
+            )
+            mc.addAttr(name, longName="blend", attributeType="float", keyable=True)
+            mc.addAttr(name, longName="follow", attributeType="bool", keyable=True)
+
+        # -- This is what a build does once the controls are in place
+        rig.store_defaults_table()
+
+        self.nodes = crab.utils.access.controls()
+
+        for node in self.nodes:
+            name = node.longName()
+
+            mc.setAttr(name + ".translate", 1, 2, 3)
+            mc.setAttr(name + ".rotate", 10, 20, 30)
+            mc.setAttr(name + ".scale", 2, 2, 2)
+            mc.setAttr(name + ".blend", 0.5)
+            mc.setAttr(name + ".follow", True)
+
+    # ----------------------------------------------------------------------------------
+    def test_controls(self):
+        self.assertEqual(len(self.nodes), CONTROL_COUNT)
+
+    # ----------------------------------------------------------------------------------
+    def test_reset_budget(self):
+        import maya.cmds as mc
+        import crab
+
+        # -- The first reset resolves the plugs of every control, which
+        # -- happens once per rig, so only the resets after it are timed
+        crab.utils.access.reset(self.nodes)
+        mc.undo()
+
+        start = time.time()
+        crab.utils.access.reset(self.nodes)
+        elapsed = time.time() - start
+
+        self.assertLessEqual(
+            elapsed,
+            RESET_BUDGET,
+            "resetting %s controls took %.3fs, the budget is %.3fs" % (
+                CONTROL_COUNT,
+                elapsed,
+                RESET_BUDGET,
+            ),
+        )
+
+        name = self.nodes[-1].longName()
+
+        self.assertEqual(mc.getAttr(name + ".translate")[0], (0.0, 0.0, 0.0))
+        self.assertEqual(mc.getAttr(name + ".rotate")[0], (0.0, 0.0, 0.0))
+        self.assertEqual(mc.getAttr(name + ".scale")[0], (1.0, 1.0, 1.0))
+        self.assertFalse(mc.getAttr(name + ".follow"))
+
+    # ----------------------------------------------------------------------------------
+    def test_reset_undo(self):
+        import maya.cmds as mc
+        import crab
+
+        crab.utils.access.reset(self.nodes)
+        mc.undo()
+
+        for node in self.nodes:
+            name = node.longName()
+
+            self.assertEqual(mc.getAttr(name + ".translate")[0], (1.0, 2.0, 3.0))
+            self.assertEqual(mc.getAttr(name + ".blend"), 0.5)
+            self.assertTrue(mc.getAttr(name + ".follow"))
+
+    # ----------------------------------------------------------------------------------
+    def test_reset_skips_locked(self):
+        import maya.cmds as mc
+        import crab
+
+        name = self.nodes[0].longName()
+
+        # -- Lock a channel after the defaults were stored
+        crab.utils.access.reset(self.nodes)
+        mc.undo()
+        mc.setAttr(name + ".translateY", lock=True)
+
+        crab.utils.access.reset(self.nodes)
+
+        self.assertEqual(mc.getAttr(name + ".translate")[0], (0.0, 2.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()